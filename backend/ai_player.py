@@ -0,0 +1,81 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from PyQt5.QtCore import pyqtSignal, QObject
+
+
+# Computer opponent that searches for its moves in a separate process
+# The search never runs on the Qt event loop's thread, so the UI stays responsive while it thinks
+class AIPlayer(QObject):
+    # *************** SIGNALS
+    # Emitted with the chosen move in the search's ("place", node) format
+    moveChosen = pyqtSignal(object)
+
+    # Emitted from the worker's callback thread, then passed on to the main thread
+    searchFinished = pyqtSignal(int, object)
+
+    def __init__(self, player, budget=1.0) -> None:
+        super().__init__()
+
+        # ID of the player the computer plays as
+        self.player = player
+
+        # Time the computer gets for each move in seconds
+        self.budget = budget
+
+        # Stats of the last search: (move, score, depth, positions searched)
+        self.lastSearch = None
+
+        # Identifies the current search so the results of cancelled ones can be ignored
+        self.searchId = 0
+        self.thinking = False
+
+        # Qt doesn't survive being forked, so the worker is started from scratch
+        self.executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"))
+
+        self.searchFinished.connect(self.on_searchFinished)
+
+    # Starts looking for a move in the position
+    def think(self, position):
+        # The search is only imported by the first game against the computer to keep startup fast
+        from backend.shax_search import chooseMove
+
+        self.searchId += 1
+        self.thinking = True
+
+        future = self.executor.submit(chooseMove, position, self.budget)
+        future.add_done_callback(partial(self.on_futureDone, self.searchId))
+
+    # Ignores the result of the search that's currently running
+    def cancel(self):
+        self.searchId += 1
+        self.thinking = False
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Runs on one of the executor's threads
+    def on_futureDone(self, searchId, future):
+        if future.cancelled():
+            return
+
+        try:
+            result = future.result()
+        except Exception as e:
+            print("The computer's search failed: ", e)
+            result = None
+
+        self.searchFinished.emit(searchId, result)
+
+    def on_searchFinished(self, searchId, result):
+        if searchId != self.searchId:
+            return
+
+        self.thinking = False
+        if result is None or result[0] is None:
+            return
+
+        self.lastSearch = result
+        self.moveChosen.emit(result[0])
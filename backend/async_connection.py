@@ -0,0 +1,110 @@
+import asyncio
+
+from backend.connection_base import ConnectionBase
+
+
+# Websocket connection to the shax server for clients that run on asyncio instead of Qt
+# Uses the optional 'websockets' package, which is only imported once the connection is opened
+# Responses are handled by the reader task as they arrive, and messages are queued and sent in order by
+# the writer task, so GameClients can use it from plain (non-async) code like a ServerConnection
+class AsyncConnection(ConnectionBase):
+    def __init__(self, url, multiplexed=False) -> None:
+        super().__init__(multiplexed)
+
+        self.url = url
+        self.websocket = None
+
+        # Messages waiting to be written to the socket
+        self.queue = asyncio.Queue()
+
+        self.reader = None
+        self.writer = None
+
+        # Called with the reconnection delay in ms whenever the connection drops, and once it's back
+        self.onConnectionLost = None
+        self.onReconnected = None
+
+    # Connects to the server and starts handling its messages
+    # Raises an OSError (or a websockets error) if the server can't be reached
+    async def open(self):
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("Asyncio clients need the 'websockets' package: pip install websockets") from None
+
+        self.websockets = websockets
+        self.websocket = await websockets.connect(self.url)
+        self.connectionOpened()
+
+        self.reader = asyncio.ensure_future(self.read())
+        self.writer = asyncio.ensure_future(self.write())
+
+    # Closes the connection without trying to reconnect
+    async def close(self):
+        if self.closing:
+            return
+
+        self.closing = True
+        self.status = False
+
+        if self.writer is not None:
+            self.writer.cancel()
+        if self.websocket is not None:
+            await self.websocket.close()
+        if self.reader is not None:
+            await asyncio.gather(self.reader, return_exceptions=True)
+
+    # ****************************** TASKS ******************************
+    # Passes every message on to its game, reconnecting whenever the connection drops
+    async def read(self):
+        while not self.closing:
+            try:
+                async for message in self.websocket:
+                    if isinstance(message, str):
+                        self.receiveText(message)
+                    else:
+                        self.receiveBinary(message)
+            except self.websockets.ConnectionClosed:
+                pass
+
+            self.status = False
+            if self.closing or not await self.reconnect():
+                return
+
+            self.connectionOpened()
+            if self.onReconnected is not None:
+                self.onReconnected()
+
+    # Tries to connect again after a short, random delay until it works or the connection is closed
+    # Returns False if the connection was closed in the meantime
+    async def reconnect(self):
+        while not self.closing:
+            delay = self.reconnectDelay()
+            if self.onConnectionLost is not None:
+                self.onConnectionLost(delay)
+
+            await asyncio.sleep(delay / 1000)
+            try:
+                self.websocket = await self.websockets.connect(self.url)
+                return True
+            except (OSError, self.websockets.WebSocketException) as e:
+                print("Couldn't reconnect to the server: ", e)
+
+        return False
+
+    # Writes the queued messages in the order they were sent
+    # Messages that were being written when the connection dropped are lost, the resync recovers from that
+    async def write(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send(message)
+            except self.websockets.ConnectionClosed:
+                pass
+
+    # ****************************** MESSAGES ******************************
+    def sendText(self, message):
+        self.queue.put_nowait(message)
+
+    def sendBinary(self, message):
+        self.queue.put_nowait(message)
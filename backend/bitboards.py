@@ -0,0 +1,114 @@
+import numpy as np
+
+from backend.game_stage import GameStage
+
+
+# Counts the set bits of every value in a uint64 array
+# np.bitwise_count was only added in NumPy 2, so older versions add up the counts of each byte instead
+if hasattr(np, "bitwise_count"):
+    popcount = np.bitwise_count
+else:
+    BYTE_COUNTS = np.array([bin(byte).count("1") for byte in range(256)], np.uint8)
+
+    def popcount(values):
+        values = np.ascontiguousarray(values, np.uint64)
+        return BYTE_COUNTS[values.reshape(values.shape + (1,)).view(np.uint8)].sum(axis=-1, dtype=np.uint8)
+
+
+# Gets the IDs of the nodes in a bitboard
+def nodesOf(bitboard):
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+# Bitboard masks of a board layout
+# Every node is one bit, so a set of nodes (e.g. one player's pieces) fits in a single integer
+# Single positions use plain Python ints, while the batch functions work on uint64 arrays
+# so many positions can be handled in one vectorized pass
+class BoardMasks:
+    def __init__(self, boardGraph) -> None:
+        self.size = len(boardGraph)
+        if self.size > 64:
+            raise ValueError("Bitboards only support boards with up to 64 nodes.")
+
+        # Every node on the board
+        self.full = (1 << self.size) - 1
+
+        # Nodes connected to each node
+        self.neighbourBits = [sum(1 << int(end) for end in boardGraph.neighbours(node)) for node in range(self.size)]
+
+        # Nodes of every line a player has to fill to make a jare
+        self.lineBits = [sum(1 << node for node in line) for line in boardGraph.lines.tolist()]
+
+        # Masks of the lines passing through each node
+        self.linesThroughBits = [[self.lineBits[line] for line in lines] for lines in boardGraph.linesThrough()]
+
+        self.neighbourMasks = np.array(self.neighbourBits, np.uint64)
+        self.lineMasks = np.array(self.lineBits, np.uint64)
+        self.nodeMasks = np.left_shift(np.uint64(1), np.arange(self.size, dtype=np.uint64))
+
+    # ****************************** SINGLE POSITIONS ******************************
+    # Counts the jare of the player's pieces through the node
+    def countJare(self, own, node):
+        return sum(own & line == line for line in self.linesThroughBits[node])
+
+    # Gets the empty nodes each of the player's pieces can move to, keyed by the piece's node
+    def moveTargets(self, own, opp):
+        empty = self.full & ~(own | opp)
+        return {node: self.neighbourBits[node] & empty for node in nodesOf(own)
+                if self.neighbourBits[node] & empty}
+
+    # Checks if any of the player's pieces can move
+    def canMove(self, own, opp):
+        empty = self.full & ~(own | opp)
+        return any(self.neighbourBits[node] & empty for node in nodesOf(own))
+
+    # Counts the lines where the player is one piece away from a jare
+    def countThreats(self, own, opp):
+        return sum((own & line).bit_count() == 2 and not opp & line for line in self.lineBits)
+
+    # Counts the moves available to each of the player's pieces
+    def mobility(self, own, opp):
+        empty = self.full & ~(own | opp)
+        return sum((self.neighbourBits[node] & empty).bit_count() for node in nodesOf(own))
+
+    # ****************************** BATCHES ******************************
+    # The batch functions take uint64 arrays of shape (B,) with the pieces of each position
+
+    # Counts the complete lines of the player in each position
+    def batchJare(self, own):
+        lines = self.lineMasks
+        return np.count_nonzero((own[:, None] & lines) == lines, axis=1)
+
+    # Counts the lines where the player is one piece away from a jare in each position
+    def batchThreats(self, own, opp):
+        lines = self.lineMasks
+        return np.count_nonzero((popcount(own[:, None] & lines) == 2) & ((opp[:, None] & lines) == 0), axis=1)
+
+    # Generates the legal moves of every position in one pass
+    # Returns the nodes a piece can be placed on, the opponent pieces that can be removed,
+    # and a (B, N) array of the nodes each node's piece can move to
+    def batchMoves(self, own, opp):
+        empty = np.uint64(self.full) & ~(own | opp)
+
+        occupied = (own[:, None] & self.nodeMasks) != 0
+        targets = np.where(occupied, self.neighbourMasks & empty[:, None], np.uint64(0))
+
+        return empty, opp, targets
+
+    # Counts the moves available to the player in each position
+    def batchMobility(self, own, opp):
+        return popcount(self.batchMoves(own, opp)[2]).sum(axis=1, dtype=np.int64)
+
+    # Counts the legal moves of each position given the stage of the game
+    def batchMoveCounts(self, own, opp, stages):
+        placements, removals, targets = self.batchMoves(own, opp)
+
+        counts = np.zeros(len(own), np.int64)
+        counts = np.where(stages == GameStage.PLACEMENT.value, popcount(placements), counts)
+        removing = (stages == GameStage.FIRST_REMOVAL.value) | (stages == GameStage.REMOVAL.value)
+        counts = np.where(removing, popcount(removals), counts)
+        counts = np.where(stages == GameStage.MOVEMENT.value, popcount(targets).sum(axis=1), counts)
+        return counts
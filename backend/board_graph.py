@@ -0,0 +1,140 @@
+import math
+import time
+
+import numpy as np
+
+
+# Compact graph of the nodes on a board and the connections between them
+# Node coordinates are stored in an (N, 2) array and the connections in CSR form:
+# the neighbours of node i are indices[indptr[i]:indptr[i + 1]]
+# Nodes are referred to by their index in the coordinates array
+class BoardGraph:
+    def __init__(self, coords, indptr, indices, buildTime=0.0) -> None:
+        self.coords = coords
+        self.indptr = indptr
+        self.indices = indices
+
+        # Grid covering the board that maps board coordinates to node IDs (-1 where there's no node)
+        self.origin = tuple(int(val) for val in coords.min(axis=0)) if len(coords) else (0, 0)
+        size = coords.max(axis=0) - self.origin + 1 if len(coords) else (0, 0)
+        self.nodeLookup = np.full(size, -1, np.int32)
+        self.nodeLookup[coords[:, 0] - self.origin[0], coords[:, 1] - self.origin[1]] = np.arange(len(coords))
+
+        # Sets of three nodes on a straight, connected line
+        self.lines = self.findLines()
+
+        # Time taken to build the graph in seconds
+        self.buildTime = buildTime
+
+    # Builds the graph from the server's "adjacent_pieces" format
+    @classmethod
+    def fromAdjacency(cls, adjacentPieces):
+        start = time.perf_counter()
+
+        nodes = sorted(adjacentPieces)
+        nodeIds = {node: ID for ID, node in enumerate(nodes)}
+
+        neighbours = [sorted(nodeIds[tuple(piece)] for piece in adjacentPieces[node]) for node in nodes]
+
+        coords = np.array(nodes, np.int16).reshape(-1, 2)
+        indptr = np.zeros(len(nodes) + 1, np.int32)
+        indptr[1:] = np.cumsum([len(connected) for connected in neighbours])
+        indices = np.fromiter((ID for connected in neighbours for ID in connected), np.int32, indptr[-1])
+
+        graph = cls(coords, indptr, indices)
+        graph.buildTime = time.perf_counter() - start
+        return graph
+
+    # Total number of nodes on the board
+    def __len__(self):
+        return len(self.coords)
+
+    # Gets the ID of the node at the board coordinates
+    # Returns -1 if there isn't a node there
+    def nodeId(self, x, y):
+        x -= self.origin[0]
+        y -= self.origin[1]
+
+        if 0 <= x < self.nodeLookup.shape[0] and 0 <= y < self.nodeLookup.shape[1]:
+            return int(self.nodeLookup[x, y])
+        return -1
+
+    # Gets the ID of the node closest to a point in board coordinates
+    # Returns -1 if there isn't a node within 'margin' of the point
+    # Nodes sit on whole numbers, so the lookup grid works as a hash grid with one node per cell
+    def nearestNode(self, x, y, margin):
+        cellX = round(x)
+        cellY = round(y)
+
+        # Only the closest cell can be in range for margins under half a cell
+        reach = 0 if margin < 0.5 else math.ceil(margin)
+
+        nearest = -1
+        nearestDistance = margin * margin
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                ID = self.nodeId(cellX + dx, cellY + dy)
+                if ID < 0:
+                    continue
+
+                distance = (cellX + dx - x) ** 2 + (cellY + dy - y) ** 2
+                if distance <= nearestDistance:
+                    nearest = ID
+                    nearestDistance = distance
+
+        return nearest
+
+    # Gets the board coordinates of a node
+    def node(self, ID):
+        x, y = self.coords[ID]
+        return (int(x), int(y))
+
+    # Gets the IDs of the nodes connected to a node
+    def neighbours(self, ID):
+        return self.indices[self.indptr[ID]:self.indptr[ID + 1]]
+
+    # Checks if two nodes are connected
+    def isAdjacent(self, ID1, ID2):
+        return ID2 in self.neighbours(ID1)
+
+    # Gets every connection between two nodes once as an (M, 2) array
+    def edges(self):
+        sources = np.repeat(np.arange(len(self.coords), dtype=np.int32), np.diff(self.indptr))
+        edges = np.column_stack((sources, self.indices))
+        return edges[edges[:, 0] < edges[:, 1]]
+
+    # Finds every set of three nodes that lie on a straight, connected line
+    # These are the lines a player has to fill to make a "jare"
+    # Returns an (L, 3) array of node IDs
+    def findLines(self):
+        lines = set()
+
+        for middle in range(len(self.coords)):
+            # Get the direction of each connection from the middle node
+            directions = {}
+            for piece in self.neighbours(middle).tolist():
+                dx, dy = (int(val) for val in self.coords[piece] - self.coords[middle])
+                divisor = math.gcd(dx, dy)
+                directions[(dx // divisor, dy // divisor)] = piece
+
+            # A line is formed by two connections going in opposite directions
+            for (dx, dy), piece in directions.items():
+                opposite = directions.get((-dx, -dy))
+                if opposite is not None:
+                    lines.add(tuple(sorted((piece, middle, opposite))))
+
+        return np.array(sorted(lines), np.int32).reshape(-1, 3)
+
+    # Gets the IDs of the lines passing through each node
+    def linesThrough(self):
+        lines = [[] for _ in range(len(self.coords))]
+        for lineId, line in enumerate(self.lines.tolist()):
+            for node in line:
+                lines[node].append(lineId)
+        return lines
+
+    # Total memory used by the graph's arrays in bytes
+    @property
+    def nbytes(self):
+        return self.coords.nbytes + self.indptr.nbytes + self.indices.nbytes + \
+            self.nodeLookup.nbytes + self.lines.nbytes
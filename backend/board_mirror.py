@@ -0,0 +1,135 @@
+from array import array
+
+EMPTY = -1
+
+MASK_64 = (1 << 64) - 1
+
+
+# Gets the random-looking 64 bit key of a piece standing at the board coordinates (x, y)
+# Keys are made from the coordinates and piece ID instead of node IDs, so anything that knows the board's
+# coordinates (the server, the engine, the client) computes the same checksum
+# Uses the SplitMix64 finalizer, which needs no table of random numbers
+def pieceKey(x, y, ID):
+    z = ((x & 0xFFFF) << 48 | (y & 0xFFFF) << 32 | (ID & 0xFFFFFFFF)) + 0x9E3779B97F4A7C15 & MASK_64
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & MASK_64
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & MASK_64
+    return z ^ (z >> 31)
+
+
+# Gets the checksum of a board from its pieces' IDs and coordinates
+# The XOR of the keys of every piece, so it doesn't depend on the order of the pieces
+def boardChecksum(pieces):
+    checksum = 0
+    for ID, x, y in pieces:
+        checksum ^= pieceKey(x, y, ID)
+    return checksum
+
+
+# Client's copy of the pieces on the board, kept in step with the server one response at a time
+# The piece on every node and the node of every piece are stored in flat arrays, and the checksum of the
+# board is updated with every change so it can be compared with the server's without going over the board
+# Every change returns False instead of being applied if it doesn't fit the board as the client knows it,
+# which means the client and the server no longer agree
+class BoardMirror:
+    def __init__(self, boardGraph, idShift=2) -> None:
+        self.boardGraph = boardGraph
+        self.ID_SHIFT = idShift
+
+        # Board coordinates of every node
+        self.coords = [boardGraph.node(node) for node in range(len(boardGraph))]
+
+        # Nodes connected to every node, as plain tuples so the move lookups don't go through NumPy
+        self.adjacency = [tuple(int(end) for end in boardGraph.neighbours(node)) for node in range(len(boardGraph))]
+
+        # ID of the piece on every node
+        self.nodes = array("i", [EMPTY]) * len(boardGraph)
+
+        # Node of every piece, indexed by the piece's ID
+        # Grows as pieces with higher IDs are placed
+        self.pieceNodes = array("i")
+
+        # Number of pieces each player has on the board
+        self.counts = array("H", [0, 0])
+
+        self.checksum = 0
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def __contains__(self, ID):
+        return 0 <= ID < len(self.pieceNodes) and self.pieceNodes[ID] != EMPTY
+
+    # Gets the node the piece is on, or EMPTY if it isn't on the board
+    def nodeOf(self, ID):
+        return self.pieceNodes[ID] if 0 <= ID < len(self.pieceNodes) else EMPTY
+
+    # Gets the ID of the piece on the node, or EMPTY if the node is empty
+    def pieceAt(self, node):
+        return self.nodes[node]
+
+    # Gets the board coordinates of the piece, or None if it isn't on the board
+    def position(self, ID):
+        node = self.nodeOf(ID)
+        return self.coords[node] if node != EMPTY else None
+
+    # Gets the node of every piece on the board
+    def pieces(self):
+        return {ID: node for ID, node in enumerate(self.pieceNodes) if node != EMPTY}
+
+    # Gets the empty nodes next to the node, i.e. where a piece on it can be moved to
+    def emptyNeighbours(self, node):
+        return [end for end in self.adjacency[node] if self.nodes[end] == EMPTY]
+
+    # Gets the ID of the player who owns a game piece
+    def owner(self, ID):
+        return ID & (2**self.ID_SHIFT - 1)
+
+    # Gets the checksum as the hex string sent by the server
+    def hexChecksum(self):
+        return f"{self.checksum:016x}"
+
+    # ****************************** CHANGES ******************************
+    def place(self, ID, node):
+        if node < 0 or self.nodes[node] != EMPTY or ID in self:
+            return False
+
+        if ID >= len(self.pieceNodes):
+            self.pieceNodes.extend([EMPTY] * (ID + 1 - len(self.pieceNodes)))
+
+        self.nodes[node] = ID
+        self.pieceNodes[ID] = node
+        self.counts[self.owner(ID)] += 1
+        self.checksum ^= pieceKey(*self.coords[node], ID)
+        return True
+
+    def remove(self, ID):
+        node = self.nodeOf(ID)
+        if node == EMPTY:
+            return False
+
+        self.nodes[node] = EMPTY
+        self.pieceNodes[ID] = EMPTY
+        self.counts[self.owner(ID)] -= 1
+        self.checksum ^= pieceKey(*self.coords[node], ID)
+        return True
+
+    def move(self, ID, node):
+        start = self.nodeOf(ID)
+        if start == EMPTY or node < 0 or (self.nodes[node] != EMPTY and node != start):
+            return False
+
+        self.nodes[start] = EMPTY
+        self.nodes[node] = ID
+        self.pieceNodes[ID] = node
+        self.checksum ^= pieceKey(*self.coords[start], ID) ^ pieceKey(*self.coords[node], ID)
+        return True
+
+    # Replaces the whole board with the pieces, given as a dict of piece IDs to nodes
+    def load(self, pieces):
+        self.nodes = array("i", [EMPTY]) * len(self.nodes)
+        self.pieceNodes = array("i")
+        self.counts = array("H", [0, 0])
+        self.checksum = 0
+
+        for ID, node in pieces.items():
+            self.place(ID, node)
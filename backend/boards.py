@@ -0,0 +1,61 @@
+# Board layouts that can be played without a server
+# Each layout uses the same format as the server's "adjacent_pieces" map:
+# a dict of (x, y) board indices to a list of [x, y] adjacent board indices
+
+
+# Builds the three nested squares of the shax board
+# The corners of the squares are joined by diagonals if 'diagonals' is set
+def squareBoard(diagonals=True):
+    edges = []
+
+    for ring in range(3):
+        low = ring
+        mid = 3
+        high = 6 - ring
+        corners = [(low, low), (mid, low), (high, low), (high, mid),
+                   (high, high), (mid, high), (low, high), (low, mid)]
+
+        # Connect the points going around the square
+        for i in range(len(corners)):
+            edges.append((corners[i], corners[(i + 1) % len(corners)]))
+
+    # Connect the midpoints of neighbouring squares
+    for ring in range(2):
+        edges.append(((3, ring), (3, ring + 1)))
+        edges.append(((6 - ring, 3), (5 - ring, 3)))
+        edges.append(((3, 6 - ring), (3, 5 - ring)))
+        edges.append(((ring, 3), (ring + 1, 3)))
+
+        # Connect the corners of neighbouring squares
+        if diagonals:
+            low, high = ring, 6 - ring
+            edges.append(((low, low), (low + 1, low + 1)))
+            edges.append(((high, low), (high - 1, low + 1)))
+            edges.append(((high, high), (high - 1, high - 1)))
+            edges.append(((low, high), (low + 1, high - 1)))
+
+    adjacentPieces = {}
+    for a, b in edges:
+        adjacentPieces.setdefault(a, []).append(list(b))
+        adjacentPieces.setdefault(b, []).append(list(a))
+
+    return adjacentPieces
+
+
+# All the board layouts available to local games, keyed by game type
+BOARDS = {
+    1: squareBoard(diagonals=True),
+    2: squareBoard(diagonals=False),
+}
+
+
+# Converts an adjacency map into the JSON friendly format sent by the server
+def serializeAdjacency(adjacentPieces):
+    return {f"({x}, {y})": [list(piece) for piece in connectedPieces]
+            for (x, y), connectedPieces in adjacentPieces.items()}
+
+
+# Converts the server's adjacency map back to a python dict
+def parseAdjacency(adjacentPieces_raw):
+    return {tuple(int(val) for val in key.strip('()').split(',')): [[int(val1), int(val2)] for val1, val2 in value]
+            for key, value in adjacentPieces_raw.items()}
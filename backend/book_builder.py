@@ -0,0 +1,199 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.bitboards import BoardMasks
+from backend.board_graph import BoardGraph
+from backend.boards import BOARDS
+from backend.game_record import ACTION_PLACE, ACTION_REMOVE, openRecords
+from backend.game_stage import GameStage
+from backend.opening_book import HEADER, MAGIC, VERSION, bookName, defaultBookDir, encodeMove
+from backend.shax_search import Position, Searcher, Topology
+from backend.tablebase import layoutDigest
+from backend.topology_cache import TopologyCache
+
+# Games that haven't finished after this many moves are counted as draws
+MAX_ACTIONS = 400
+
+
+# Collects the statistics of the opening moves of many games
+class BookBuilder:
+    def __init__(self, topology, minPieces, maxPieces, plies) -> None:
+        self.topology = topology
+        self.MIN_PIECES = minPieces
+        self.MAX_PIECES = maxPieces
+
+        # Number of moves from the start of each game that are added to the book
+        self.plies = plies
+
+        # [games, points] keyed by (position key, move code)
+        self.stats = {}
+
+    # Adds the opening of a game given its moves and the winner (None for a draw)
+    def addGame(self, moves, winner):
+        position = Position(self.topology, self.MIN_PIECES, self.MAX_PIECES)
+
+        for move in moves[:self.plies]:
+            if position.gameState != GameStage.PLACEMENT or move not in position.legalMoves():
+                break
+
+            player = position.current_turn
+            stats = self.stats.setdefault((position.key(), encodeMove(move)), [0, 0])
+            stats[0] += 1
+            stats[1] += 1 if winner is None else 2 * (winner == player)
+
+            position = position.play(move)
+
+    # Adds the statistics collected by another builder
+    def merge(self, stats):
+        for entry, (games, points) in stats.items():
+            total = self.stats.setdefault(entry, [0, 0])
+            total[0] += games
+            total[1] += points
+
+    # Adds the games of a file of game records that were played with the same layout and piece limits
+    # Returns the number of games that were added
+    def addRecords(self, path, topologies):
+        digest = layoutDigest(self.topology.masks)
+        digests = {}
+        added = 0
+
+        for record in openRecords(path):
+            if (record.MIN_PIECES, record.MAX_PIECES) != (self.MIN_PIECES, self.MAX_PIECES):
+                continue
+
+            if record.layoutHash not in digests:
+                boardGraph = topologies.lookup(record.layoutHash)
+                digests[record.layoutHash] = layoutDigest(BoardMasks(boardGraph)) if boardGraph else None
+
+            if digests[record.layoutHash] != digest:
+                continue
+
+            # Convert the records' piece IDs to the nodes used by the search
+            nodes = {}
+            moves = []
+            for recorded in record.moves():
+                if recorded.action == ACTION_PLACE:
+                    moves.append(("place", recorded.node))
+                elif recorded.action == ACTION_REMOVE:
+                    moves.append(("remove", nodes.get(recorded.ID, -1)))
+                else:
+                    moves.append(("move", nodes.get(recorded.ID, -1), recorded.node))
+                nodes[recorded.ID] = recorded.node
+
+                if len(moves) >= self.plies:
+                    break
+
+            self.addGame(moves, record.winner)
+            added += 1
+
+        return added
+
+    # Writes the book, leaving out the moves played in fewer than 'minGames' games
+    def write(self, path, minGames=1):
+        entries = sorted((key, code, games, points) for (key, code), (games, points) in self.stats.items()
+                         if games >= minGames)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.MIN_PIECES, self.MAX_PIECES,
+                                   bytes.fromhex(layoutDigest(self.topology.masks)), len(entries)))
+            file.write(np.array([entry[0] for entry in entries], np.uint64).tobytes())
+            file.write(np.array([entry[2] for entry in entries], np.uint32).tobytes())
+            file.write(np.array([min(entry[3], 0xFFFFFFFF) for entry in entries], np.uint32).tobytes())
+            file.write(np.array([entry[1] for entry in entries], np.uint16).tobytes())
+        os.replace(path + ".tmp", path)
+
+        return len(entries)
+
+
+# Plays a game between two searchers that start with a few random moves
+# The searcher's table is cleared first so the game only depends on its seed
+# Returns the moves of the game and the winner (None for a draw)
+def selfPlayGame(topology, minPieces, maxPieces, searcher, depth, randomPlies, seed):
+    rng = random.Random(seed)
+    position = Position(topology, minPieces, maxPieces)
+    moves = []
+    searcher.table.clear()
+
+    while position.winner is None and len(moves) < MAX_ACTIONS:
+        legal = position.legalMoves()
+        if not legal:
+            break
+
+        if len(moves) < randomPlies:
+            move = rng.choice(legal)
+        else:
+            move = searcher.search(position, float("inf"), depth)[0]
+
+        moves.append(move)
+        position = position.play(move)
+
+    return moves, position.winner
+
+
+# Builders of the worker process, keyed by their settings
+builders = {}
+
+
+# Plays a batch of self-play games in a worker process and returns their statistics
+def selfPlayBatch(settings, seeds):
+    gameType, minPieces, maxPieces, plies, depth, randomPlies = settings
+    if settings not in builders:
+        topology = Topology(BoardGraph.fromAdjacency(BOARDS[gameType]))
+        builders[settings] = (topology, Searcher(ttBits=16))
+
+    topology, searcher = builders[settings]
+    builder = BookBuilder(topology, minPieces, maxPieces, plies)
+    for seed in seeds:
+        builder.addGame(*selfPlayGame(topology, minPieces, maxPieces, searcher, depth, randomPlies, seed))
+
+    return builder.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds an opening book from self-play and recorded games.")
+    parser.add_argument("--game-type", type=int, default=1, choices=sorted(BOARDS))
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=10)
+    parser.add_argument("--plies", type=int, default=12, help="moves from the start of each game to add")
+    parser.add_argument("--games", type=int, default=1000, help="self-play games to play")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the self-play games")
+    parser.add_argument("--random-plies", type=int, default=4, help="random moves at the start of each game")
+    parser.add_argument("--records", nargs="*", default=[], help="files of recorded games to add")
+    parser.add_argument("--min-games", type=int, default=2, help="leave out moves played in fewer games")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=defaultBookDir())
+    args = parser.parse_args()
+
+    topology = Topology(BoardGraph.fromAdjacency(BOARDS[args.game_type]))
+    builder = BookBuilder(topology, args.min_pieces, args.max_pieces, args.plies)
+
+    start = time.perf_counter()
+    if args.games:
+        settings = (args.game_type, args.min_pieces, args.max_pieces, args.plies, args.depth, args.random_plies)
+        seeds = [args.seed * args.games + game for game in range(args.games)]
+        batches = [seeds[start:start + args.batch_size] for start in range(0, len(seeds), args.batch_size)]
+
+        with ProcessPoolExecutor(args.workers) as executor:
+            for stats in executor.map(selfPlayBatch, [settings] * len(batches), batches):
+                builder.merge(stats)
+        print(f"{args.games} self-play games in {time.perf_counter() - start:.1f} s")
+
+    topologies = TopologyCache()
+    for path in args.records:
+        print(f"{builder.addRecords(path, topologies)} recorded games added from {path}")
+
+    path = os.path.join(args.output, bookName(topology.masks, args.min_pieces, args.max_pieces))
+    count = builder.write(path, args.min_games)
+    print(f"Wrote {count:,} moves to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import json
+import random
+
+from backend.protocol import PROTOCOL_BINARY, PROTOCOL_JSON, addChannel, decodeResponse, encodeRequest, splitChannel
+
+
+# Part of a connection to the shax server that doesn't depend on how the messages are carried
+# Packs the messages of the games using the connection, routes the responses back to them and
+# keeps track of the reconnection state
+# Subclasses provide the websocket: they must implement sendText() and sendBinary(), and call
+# connectionOpened(), receiveText() and receiveBinary() when the socket connects or a message arrives
+# Creating a subclass that's missing one of them raises a TypeError. The check stands in for
+# abc.abstractmethod, whose metaclass can't be mixed with QObject's
+# A multiplexed connection carries several games at once: every message is tagged with
+# the game ID of the client that sent it, and responses are routed back by that ID
+class ConnectionBase:
+    # Methods every transport has to implement
+    TRANSPORT_METHODS = ("sendText", "sendBinary")
+
+    def __init__(self, multiplexed=False) -> None:
+        missing = [name for name in self.TRANSPORT_METHODS
+                   if not callable(getattr(self, name, None))]
+        if missing:
+            raise TypeError(f"{type(self).__name__} doesn't implement {', '.join(missing)}")
+
+        # Prints every message received from the server
+        self.DEBUG = False
+
+        # Tracks if the websocket is connected
+        self.status = False
+
+        # Wire format agreed on with the server in the join_game handshake
+        self.protocol = PROTOCOL_JSON
+
+        # ********************* SESSION VARIABLES ***************************
+        # Tracks if messages are tagged with the game they belong to
+        self.multiplexed = multiplexed
+
+        # Tracks if the server echoes the game IDs back
+        # Servers that don't know about game IDs only get to run a single game on the connection
+        self.serverMultiplexed = False
+
+        # Clients using the connection, keyed by their game ID
+        self.managers = {}
+        self.nextGameId = 1
+
+        # ********************* RECONNECTION VARIABLES **********************
+        # Delay before the first reconnection attempt, doubled after every failed attempt
+        self.RECONNECT_BASE_MS = 50
+        self.RECONNECT_MAX_MS = 5000
+
+        # Number of failed reconnection attempts in a row
+        self.reconnectAttempts = 0
+
+        # Tracks if the connection has ever been established
+        self.everConnected = False
+
+        # Tracks if the connection was closed on purpose
+        self.closing = False
+
+        # Messages sent while disconnected and the clients that sent them
+        # Replayed once the connection is back
+        self.outbox = []
+
+    # ****************************** GAMES ******************************
+    # Adds a client to the connection and returns the ID of its game
+    def register(self, manager):
+        gameId = self.nextGameId
+        self.nextGameId += 1
+
+        self.managers[gameId] = manager
+        return gameId
+
+    def unregister(self, manager):
+        self.managers = {gameId: other for gameId, other in self.managers.items() if other is not manager}
+        self.outbox = [(other, message) for other, message in self.outbox if other is not manager]
+
+    # Tracks if messages are routed by their game ID in both directions
+    @property
+    def channels(self):
+        return self.multiplexed and self.serverMultiplexed
+
+    # Tracks if another game can be added to the connection
+    # Until the server has echoed a game ID back, every response is routed to the first game,
+    # so games that need their own responses (e.g. watched games) have to open their own connection
+    @property
+    def shareable(self):
+        return not self.managers or self.channels
+
+    # Gets the client a response belongs to
+    def route(self, gameId):
+        if self.channels:
+            return self.managers.get(gameId)
+
+        return next(iter(self.managers.values()), None)
+
+    # ****************************** CONNECTION STATE ******************************
+    # Gets every game back in sync with the server and replays the queued messages
+    # Returns True if it's the first time the connection was established
+    def connectionOpened(self):
+        self.status = True
+        self.reconnectAttempts = 0
+
+        # A new socket starts out with JSON until the server picks a protocol again
+        # The protocol belongs to the socket, so it's only reset here and not by the games using it
+        self.protocol = PROTOCOL_JSON
+
+        # Get every game back in sync with the server before replaying the queued messages
+        if self.everConnected:
+            for manager in list(self.managers.values()):
+                if manager.running:
+                    manager.resync()
+
+        outbox = self.outbox
+        self.outbox = []
+        for manager, message in outbox:
+            self.send(manager, message)
+
+        firstConnection = not self.everConnected
+        self.everConnected = True
+        return firstConnection
+
+    # Gets how long to wait before the next reconnection attempt in milliseconds
+    # Exponential backoff with jitter so many clients don't all reconnect at once
+    def reconnectDelay(self):
+        delay = min(self.RECONNECT_MAX_MS, self.RECONNECT_BASE_MS * 2 ** self.reconnectAttempts)
+        self.reconnectAttempts += 1
+        return int(delay * random.uniform(0.5, 1.0))
+
+    # ****************************** MESSAGES ******************************
+    # Sends a client's message to the WebSocket server
+    # Uses the binary format if the server supports it and JSON otherwise
+    def send(self, manager, message):
+        if self.multiplexed:
+            message["game_id"] = manager.gameId
+
+        # Hold on to the message until the connection is back
+        if not self.status:
+            self.outbox.append((manager, message))
+            return
+
+        if self.protocol == PROTOCOL_BINARY:
+            packedMessage = encodeRequest(message, manager.player_tokens)
+            if packedMessage is not None:
+                if self.channels:
+                    packedMessage = addChannel(manager.gameId, packedMessage)
+
+                manager.metrics.messageSent(message, len(packedMessage))
+                self.sendBinary(packedMessage)
+                return
+
+        textMessage = json.dumps(message)
+        manager.metrics.messageSent(message, len(textMessage))
+        self.sendText(textMessage)
+
+    # Receives a JSON response from the WebSocket server
+    def receiveText(self, message):
+        if self.DEBUG:
+            print(f"\nReceived message: {message}")
+
+        data = json.loads(message)
+        if "game_id" in data:
+            self.serverMultiplexed = True
+
+        self.deliver(data, len(message))
+
+    # Receives a binary response from the WebSocket server
+    def receiveBinary(self, message):
+        if self.channels:
+            gameId, packedResponse = splitChannel(message)
+            data = decodeResponse(packedResponse)
+            data["game_id"] = gameId
+        else:
+            data = decodeResponse(message)
+
+        if self.DEBUG:
+            print(f"\nReceived message: {data}")
+
+        self.deliver(data, len(message))
+
+    # Passes a response on to the client of its game
+    def deliver(self, data, size):
+        # Games that were just closed can still get the response to their last message
+        manager = self.route(data.get("game_id"))
+        if manager is None:
+            return
+
+        manager.metrics.messageReceived(data, size)
+        manager.handleResponse(data)
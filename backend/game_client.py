@@ -0,0 +1,791 @@
+import struct
+import time
+
+from backend.board_mirror import EMPTY, BoardMirror
+from backend.game_record import GameRecorder
+from backend.game_stage import GameStage
+from backend.metrics import ClientMetrics
+from backend.protocol import PROTOCOL_BINARY, PROTOCOL_JSON
+from backend.topology_cache import TopologyCache
+
+
+# Client side of a game of shax that doesn't depend on Qt
+# Builds the requests, tracks the state of the game from the server's responses and
+# validates and predicts moves before they're confirmed
+# Messages go through a connection (a ConnectionBase) or straight to a local engine, and the outcome
+# of every response is published as an event, e.g. ("placePieceEvaluated", success, error, ...)
+# The BoardManager turns the events into Qt signals, headless clients subscribe to them directly
+class GameClient:
+    def __init__(self, minPieces, maxPieces, connection=None, local=False) -> None:
+        # ********************** SETTING VALUES ******************************
+        # Total number of players
+        self.TOTAL_PLAYERS = 2
+
+        # Maximum number of pieces each player can have
+        self.MAX_PIECES = maxPieces
+
+        # Minimum number of pieces a player can have or its game over
+        self.MIN_PIECES = minPieces
+
+        # How far off a piece can be from the center of its new location
+        # Goes from 0 to 1
+        self.MARGIN_OF_ERROR = .2
+
+        # How far the pieces' ID needs to bit shifted to the left to store the player ID with it
+        self.ID_SHIFT = 2
+
+        # Prints debug messages about the moves being sent
+        self.DEBUG = False
+
+        # ***************** GAME VARIABLES **************************
+        # Tracks if a game is currently running or not
+        self.running = False
+
+        # Tracks if the client is waiting for a game
+        self.waiting = False
+
+        # Tracks what stage the game is currently in
+        self.gameState = GameStage.STOPPED
+
+        # Represents whose turn it is
+        # 0 indexed so for example, a value of 0 means it's player 1's turn
+        self.current_turn = 0
+
+        # Array for keeping track of how many pieces each player has
+        self.total_pieces = [0] * self.TOTAL_PLAYERS
+
+        # Tracks the ID of the player who first made a jare in the placement stage
+        # Determines which player goes first in the "first_removal" stage
+        self.firstToJare = None
+
+        # Array containing the total number of "jare" each player has made
+        self.currentJare = [0] * self.TOTAL_PLAYERS
+
+        self.player_tokens = [0, 0]
+
+        # Graph of the nodes on the board and the connections between them
+        self.boardGraph = None
+
+        # Type of board used by the game
+        self.gameType = 1
+
+        # Board layouts that have already been sent by the server
+        self.topologies = TopologyCache()
+
+        # Copy of the board as confirmed by the server, created once the layout is known
+        self.mirror = None
+
+        # Tracks if the server was asked for its board because the local copy stopped matching it
+        self.resyncing = False
+
+        # IDs of the pieces that can be moved next
+        self.activePieces = set()
+
+        # Key of the player whose game is being watched, None when playing
+        self.spectating = None
+
+        # ********************* RECORDING VARIABLES ************************
+        # File the games are appended to, None to not record them
+        # Only the player's own games are recorded, so clients have to opt in by setting it
+        self.recordPath = None
+
+        # Record of the game being played
+        self.recorder = None
+
+        # ********************* LOCAL GAME VARIABLES ************************
+        # Local games are evaluated by an in-process engine instead of the server
+        # The engine is created when the first message is sent
+        self.local = local
+        self.engine = None
+
+        # ********************* PREDICTION VARIABLES ************************
+        # Moves sent to the server are validated and shown before the server replies
+        # Local games don't need this since the engine replies straight away
+        self.predicting = not self.local
+
+        # Sequence number of the last request that was sent
+        self.sequence = 0
+
+        # Predicted moves waiting on a response, keyed by their sequence number
+        self.pendingMoves = {}
+
+        # ********************* CONNECTION VARIABLES ************************
+        self.connection = None if self.local else connection
+
+        # ID of the game on the connection, used to route the server's responses back here
+        self.gameId = self.connection.register(self) if self.connection else 0
+
+        # Round trip times and traffic of the messages exchanged with the server
+        self.metrics = ClientMetrics()
+
+        # Callbacks subscribed to each event
+        self.listeners = {}
+
+    # Stops using the connection
+    def close(self):
+        self.stopRecording()
+
+        if self.connection is not None:
+            self.connection.unregister(self)
+
+    # ****************************** EVENTS ******************************
+    # Calls the callback with the event's arguments whenever the event is published
+    def subscribe(self, event, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def publish(self, event, *args):
+        for callback in self.listeners.get(event, ()):
+            callback(*args)
+
+    # ****************************** MESSAGES ******************************
+    # Tracks if messages can currently be sent to the server
+    @property
+    def status(self):
+        return self.local or self.connection.status
+
+    # Wire format agreed on with the server, shared by every game on the connection
+    @property
+    def protocol(self):
+        return PROTOCOL_JSON if self.local else self.connection.protocol
+
+    @protocol.setter
+    def protocol(self, protocol):
+        if not self.local:
+            self.connection.protocol = protocol
+
+    # Sends a message to the WebSocket server
+    # Local games get their response straight from the engine
+    def sendMessage(self, message):
+        if self.local:
+            if self.engine is None:
+                from backend.shax_engine import ShaxEngine
+                self.engine = ShaxEngine(self.MIN_PIECES, self.MAX_PIECES)
+
+            self.metrics.messageSent(message, 0)
+            response = self.engine.handleMessage(message)
+            self.metrics.messageReceived(response, 0)
+            self.handleResponse(response)
+            return
+
+        self.connection.send(self, message)
+
+    # Routes a response to the appropriate response function
+    def handleResponse(self, data):
+        start = time.perf_counter()
+        prediction = self.resolvePrediction(data)
+
+        # Pass the response to the appropriate handler
+        action = data["action"]
+        if action == "join_game":
+            self.startGame_Response(data)
+        elif action == "end":
+            self.end_Response(data)
+        elif action == "place_piece":
+            self.placePiece_Response(data)
+        elif action == "remove_piece":
+            self.removePiece_Response(data)
+        elif action == "move_piece":
+            self.movePiece_Response(data, prediction)
+        elif action == "resync":
+            self.resync_Response(data)
+        elif action == "spectate":
+            self.spectate_Response(data)
+
+        self.metrics.handlerFinished(time.perf_counter() - start)
+
+    # Sends a request for a game to be started to the shax API
+    def startGame(self):
+        # Allow players to join different types of games
+        message = {"action": "join_game",
+                   "game_type": self.gameType,
+                   "protocols": [PROTOCOL_BINARY, PROTOCOL_JSON],
+                   "active_pieces_delta": True}
+
+        # Let the server skip sending the board layout if it's already been cached
+        layoutHash = self.topologies.knownHash(self.gameType)
+        if layoutHash is not None:
+            message["topology_hash"] = layoutHash
+
+        self.sendMessage(message)
+
+    # Handles the response data from the shax API when a startGame action is sent
+    def startGame_Response(self, data):
+        # Check that the response contains all the required keys
+        required_keys = ("success", "waiting")
+        if not all(key in data for key in required_keys):
+            print("Received an unexpected response from the websocket server.")
+            return
+
+        # Load all the game parameters
+        success: bool = data["success"]
+        error: str = data["error"]
+        self.waiting: bool = data["waiting"]
+        self.player_num = data["player_num"]
+        if self.DEBUG:
+            print(data["player1_key"])
+            print(data["player2_key"])
+        self.player_tokens[0] = data["player1_key"]
+        self.player_tokens[1] = data["player2_key"]
+        gameState = data["next_state"]
+        self.current_turn = data["next_player"]
+
+        # Servers that don't know about the binary format won't pick a protocol
+        self.protocol = data.get("protocol", PROTOCOL_JSON)
+
+        # Update the game state
+        self.gameState = GameStage[gameState]
+
+        # Check if the game started successfully
+        if success:
+            self.running = True
+
+        # Convert the adjacent pieces array to a graph of the board
+        # The server only sends the layout's hash if the client already has the layout
+        adjacentPieces_raw: dict | None = data.get("adjacent_pieces")
+        if adjacentPieces_raw is not None:
+            layoutHash, boardGraph = self.topologies.store(self.gameType, adjacentPieces_raw)
+        else:
+            layoutHash = data.get("topology_hash", "")
+            boardGraph = self.topologies.load(self.gameType, layoutHash) if layoutHash else None
+
+        # Players on the waiting list don't need the board yet
+        if boardGraph is None and not self.waiting:
+            self.running = False
+            self.publish("startGameEvaluated", False, "The board layout couldn't be loaded.",
+                         self.waiting, gameState, self.current_turn, None, "")
+            return
+
+        # Start tracking the new board
+        self.spectating = None
+        self.boardGraph = boardGraph
+        self.mirror = BoardMirror(boardGraph, self.ID_SHIFT) if boardGraph is not None else None
+        self.resyncing = False
+        self.activePieces = set()
+        self.pendingMoves = {}
+
+        if success and not self.waiting:
+            self.startRecording(layoutHash)
+
+        # Notifies the main window about the outcome of the start game request
+        self.publish("startGameEvaluated", success, error, self.waiting, gameState,
+                     self.current_turn, boardGraph, layoutHash)
+        return
+
+    # Places a new game piece on the board at the scene coordinates (x, y)
+    def placePiece(self, x, y):
+        if self.DEBUG:
+            print("Attempting to place a piece...")
+            print(self.player_tokens)
+        error = self.turnError()
+        if error:
+            self.publish("placePieceEvaluated", False, error, 0, 0, 0, self.gameState.name, self.current_turn)
+            return
+
+        message = {"action": "place_piece",
+                   "x": x,
+                   "y": y,
+                   "player_key": self.player_tokens[self.current_turn]}
+
+        if self.predicting:
+            node = (int(x), int(y))
+            error = self.validatePlacement(node)
+            if error:
+                self.publish("placePieceEvaluated", False, error, 0, 0, 0, self.gameState.name, self.current_turn)
+                return
+
+            seq = self.addPrediction(message, node=node)
+            self.publish("placePiecePredicted", seq, node[0], node[1], self.current_turn)
+
+        self.sendMessage(message)
+
+    def placePiece_Response(self, data):
+        try:
+            success: bool = data["success"]
+            next_state: str = data["next_state"]
+            next_player: int = data["next_player"]
+
+            # Updates the game state
+            self.gameState = getattr(GameStage, next_state, self.gameState)
+            self.current_turn = next_player
+
+            # Only return the error msg if the move failed
+            if not success:
+                error: str = data["error"]
+                self.publish("placePieceEvaluated", success, error, 0, 0, 0, "", 0)
+            else:
+                # Load the rest of the response data
+                ID: int = data["new_piece_ID"]
+                x: int = data["new_x"]
+                y: int = data["new_y"]
+
+                node = self.boardGraph.nodeId(int(x), int(y))
+                self.checkMirror(self.mirror.place(ID, node), data)
+                self.recordMove("place", ID, node)
+
+                # Notifies the UI about the moves outcome
+                self.publish("placePieceEvaluated", success, "", ID, x, y, next_state, self.current_turn)
+        except Exception as e:
+            print("Received an unexpected response: ", e)
+
+    # Removes game piece from scene and list of pieces
+    def removePiece(self, pieceID):
+        if self.DEBUG:
+            print("Attempting to remove a piece...")
+        error = self.turnError()
+        if error:
+            self.publish("removePieceEvaluated", False, error, 0, self.gameState.name, self.current_turn, [])
+            return
+
+        message = {"action": "remove_piece",
+                   "piece_ID": pieceID,
+                   "player_key": self.player_tokens[self.current_turn]}
+
+        if self.predicting:
+            error = self.validateRemoval(pieceID)
+            if error:
+                self.publish("removePieceEvaluated", False, error, 0, self.gameState.name, self.current_turn, [])
+                return
+
+            seq = self.addPrediction(message, ID=pieceID)
+            self.publish("removePiecePredicted", seq, pieceID)
+
+        self.sendMessage(message)
+
+    def removePiece_Response(self, data):
+        try:
+            success: bool = data["success"]
+            next_state: str = data["next_state"]
+            next_player: int = data["next_player"]
+
+            # Updates the game state
+            self.gameState = getattr(GameStage, next_state, self.gameState)
+            self.current_turn = next_player
+
+            # If the move failed, only return the error msg
+            if not success:
+                error: str = data["error"]
+                self.publish("removePieceEvaluated", success, error, 0, next_state, self.current_turn, [])
+
+            else:
+                # Load the rest of the response data
+                ID: int = data["removed_piece"]
+                self.checkMirror(self.mirror.remove(ID), data)
+                self.activePieces.discard(ID)
+                self.recordMove("remove", ID)
+
+                active_pieces: list = self.updateActivePieces(data)
+
+                # Notify the UI about the results
+                self.publish("removePieceEvaluated", success, "", ID, next_state, self.current_turn, active_pieces)
+
+                # Check if the game has finished
+                self.checkGameOver(data)
+
+        except Exception as e:
+            print("Received an unexpected response: ", e)
+
+    # Takes in a game piece's x and y
+    # Returns None if there is no nearby valid position
+    # Returns new x and y values if the position is valid
+    # Snaps to grid
+    def movePiece(self, ID, new_x, new_y):
+        if self.DEBUG:
+            print("Attempting to remove a piece...")
+        error = self.turnError()
+        if error:
+            self.publish("movePieceEvaluated", False, error, ID, 0, 0, self.gameState.name, self.current_turn, [])
+            return
+
+        message = {"action": "move_piece",
+                   "piece_ID": ID,
+                   "new_x": new_x,
+                   "new_y": new_y,
+                   "player_key": self.player_tokens[self.current_turn]}
+
+        if self.predicting:
+            node = (int(new_x), int(new_y))
+            error = self.validateMove(ID, node)
+            if error:
+                self.publish("movePieceEvaluated", False, error, ID, 0, 0, self.gameState.name, self.current_turn, [])
+                return
+
+            seq = self.addPrediction(message, ID=ID, node=node)
+            self.publish("movePiecePredicted", seq, ID, node[0], node[1])
+
+        self.sendMessage(message)
+
+    # Takes in the predicted move the response belongs to, if there was one
+    def movePiece_Response(self, data, prediction=None):
+        try:
+            success: bool = data["success"]
+            next_state: str = data["next_state"]
+            next_player: int = data["next_player"]
+
+            # Updates the game state
+            self.gameState = getattr(GameStage, next_state, self.gameState)
+            self.current_turn = next_player
+
+            if not success:
+                error: str = data["error"]
+
+                # Servers that don't say which piece was rejected are matched by the predicted move
+                ID = data.get("moved_piece", prediction["ID"] if prediction is not None else EMPTY)
+                self.publish("movePieceEvaluated", success, error, ID, 0, 0, next_state, self.current_turn, [])
+
+            else:
+                # Loads the rest of the response data
+                ID: int = data["moved_piece"]
+                x: float = data["new_x"]
+                y: float = data["new_y"]
+                active_pieces: list = self.updateActivePieces(data)
+
+                node = self.boardGraph.nodeId(int(x), int(y))
+                self.checkMirror(self.mirror.move(ID, node), data)
+                self.recordMove("move", ID, node)
+
+                # Notifies the UI
+                self.publish("movePieceEvaluated", success, "", ID, x, y, next_state, self.current_turn, active_pieces)
+
+                # Check if the game has finished
+                self.checkGameOver(data)
+        except Exception as e:
+            print("Received an unexpected response: ", e)
+
+    # Gets the pieces that can be moved next
+    # Servers can send either the full list or only the pieces that changed since the last move
+    def updateActivePieces(self, data):
+        if "active_pieces" in data:
+            self.activePieces = set(data["active_pieces"])
+        else:
+            self.activePieces.difference_update(data.get("deactivated", []))
+            self.activePieces.update(data.get("activated", []))
+
+        return list(self.activePieces)
+
+    # Stops the game and notifies the UI if the response ended the game
+    def checkGameOver(self, data):
+        if not data.get("game_over", False):
+            return
+
+        self.running = False
+        self.gameState = GameStage.STOPPED
+        self.stopRecording(data.get("winner"))
+
+        # Moves sent after the last one of the game are never answered
+        self.metrics.dropPending()
+        self.publish("gameEnded")
+
+    # ****************************** MOVE PREDICTION ******************************
+    # Tags the message with a sequence number and stores the predicted move
+    def addPrediction(self, message, **prediction):
+        # Sequence numbers wrap around to fit in the binary format, skipping 0
+        self.sequence = self.sequence % 0xFFFF + 1
+        message["seq"] = self.sequence
+
+        prediction["action"] = message["action"]
+        self.pendingMoves[self.sequence] = prediction
+
+        return self.sequence
+
+    # Confirms or rolls back the predicted move that the response belongs to
+    # Returns the prediction, or None if the response doesn't belong to one
+    def resolvePrediction(self, data):
+        action = data.get("action")
+
+        # Servers that don't echo the sequence number reply in the order the moves were sent
+        seq = data.get("seq")
+        if seq is None:
+            seq = next((seq for seq, prediction in self.pendingMoves.items()
+                        if prediction["action"] == action), None)
+
+        prediction = self.pendingMoves.pop(seq, None)
+        if prediction is not None:
+            self.publish("predictionResolved", seq, bool(data.get("success", False)))
+
+        return prediction
+
+    # Gets the board as it will be once all the pending moves are accepted
+    # Maps each occupied node to the ID of the piece on it (None if it isn't known yet)
+    def predictedBoard(self):
+        positions = {ID: self.mirror.coords[node] for ID, node in self.mirror.pieces().items()}
+        board = {}
+
+        for prediction in self.pendingMoves.values():
+            if prediction["action"] == "place_piece":
+                board[prediction["node"]] = None
+            elif prediction["action"] == "remove_piece":
+                positions.pop(prediction["ID"], None)
+            elif prediction["action"] == "move_piece":
+                positions[prediction["ID"]] = prediction["node"]
+
+        board.update({node: ID for ID, node in positions.items()})
+        return board
+
+    # Gets the ID of the player who owns a game piece
+    def owner(self, ID):
+        return ID & (2**self.ID_SHIFT - 1)
+
+    # Returns an error message if the current player can't place a piece on the node
+    def validatePlacement(self, node):
+        if self.pendingMoves:
+            return "Waiting for the last move to be confirmed."
+        if self.gameState != GameStage.PLACEMENT:
+            return "Pieces can only be placed in the placement stage."
+        if self.boardGraph.nodeId(*node) < 0:
+            return "There is no node at that position."
+        if node in self.predictedBoard():
+            return "That node is already taken."
+        return ""
+
+    # Returns an error message if the current player can't remove the piece
+    def validateRemoval(self, ID):
+        if self.pendingMoves:
+            return "Waiting for the last move to be confirmed."
+        if self.gameState not in (GameStage.FIRST_REMOVAL, GameStage.REMOVAL):
+            return "Pieces can only be removed in the removal stages."
+        if ID not in self.predictedBoard().values():
+            return "That piece doesn't exist."
+        if self.owner(ID) == self.current_turn:
+            return "You can't remove your own piece."
+        return ""
+
+    # Returns an error message if the current player can't move the piece anywhere right now
+    def validateMovingPiece(self, ID):
+        if self.pendingMoves:
+            return "Waiting for the last move to be confirmed."
+        if self.gameState != GameStage.MOVEMENT:
+            return "Pieces can only be moved in the movement stage."
+        if ID not in self.mirror or self.owner(ID) != self.current_turn:
+            return "You can only move your own pieces."
+        return ""
+
+    # Returns an error message if the current player can't move the piece to the node
+    def validateMove(self, ID, node):
+        error = self.validateMovingPiece(ID)
+        if error:
+            return error
+        if self.boardGraph.nodeId(*node) not in self.mirror.emptyNeighbours(self.mirror.nodeOf(ID)):
+            return "Pieces can only be moved to an adjacent empty node."
+        return ""
+
+    # Gets the nodes the piece can be moved to, or an empty list if the player can't move it right now
+    # Lets the UI show where a piece can go as soon as it's picked up
+    def moveTargets(self, ID):
+        if self.mirror is None or self.turnError() or self.validateMovingPiece(ID):
+            return []
+        return self.mirror.emptyNeighbours(self.mirror.nodeOf(ID))
+
+    # Returns an error message if the current player isn't allowed to move right now
+    # Clients where some of the players aren't controlled by the user override it
+    def turnError(self):
+        return ""
+
+    # ****************************** RECORDING ******************************
+    # Starts a new record of the game
+    def startRecording(self, layoutHash):
+        self.stopRecording()
+        if self.recordPath is None:
+            return
+
+        try:
+            self.recorder = GameRecorder(self.recordPath, self.gameType, self.MIN_PIECES, self.MAX_PIECES,
+                                         layoutHash, self.gameState, self.current_turn)
+        except (OSError, struct.error) as e:
+            print("Couldn't start recording the game: ", e)
+
+    # Adds a move confirmed by the server to the record
+    def recordMove(self, action, ID, node=None):
+        if self.recorder is None:
+            return
+
+        if action == "place":
+            self.writeRecord(self.recorder.place, ID, node, self.gameState, self.current_turn)
+        elif action == "remove":
+            self.writeRecord(self.recorder.remove, ID, self.gameState, self.current_turn)
+        else:
+            self.writeRecord(self.recorder.move, ID, node, self.gameState, self.current_turn)
+
+    # Calls one of the recorder's methods
+    # The game goes on without being recorded if the record can't be written,
+    # e.g. if the disk is full or a piece or node doesn't fit in the record
+    def writeRecord(self, method, *args):
+        try:
+            method(*args)
+        except (OSError, struct.error) as e:
+            print("Couldn't save the record of the game: ", e)
+            self.recorder.close()
+            self.recorder = None
+
+    # Writes the record of the game to the file
+    # Games that were left before they were over are saved without a winner
+    def stopRecording(self, winner=None):
+        if self.recorder is None:
+            return
+
+        recorder = self.recorder
+        self.recorder = None
+        try:
+            recorder.finish(winner)
+        except (OSError, struct.error) as e:
+            print("Couldn't save the record of the game: ", e)
+
+    # ****************************** RESYNCING ******************************
+    # Asks the server for the current state of the game after reconnecting
+    def resync(self):
+        # Spectators simply start watching the game again
+        if self.spectating is not None:
+            self.spectate(self.spectating)
+            return
+
+        # Moves that were sent but never answered may or may not have reached the server
+        # so their predictions are dropped and the resync decides what happened to them
+        queued = {message.get("seq") for manager, message in self.connection.outbox if manager is self}
+
+        # Requests sent over the old connection will never be answered, so they aren't timed
+        self.metrics.dropPending()
+        for seq in [seq for seq in self.pendingMoves if seq not in queued]:
+            del self.pendingMoves[seq]
+            self.publish("predictionResolved", seq, False)
+
+        message = {"action": "resync",
+                   "player_key": self.player_tokens[self.player_num],
+                   "protocols": [PROTOCOL_BINARY, PROTOCOL_JSON]}
+        self.sendMessage(message)
+
+    # Compares the server's board with the local one and passes on only the differences
+    def resync_Response(self, data):
+        try:
+            if not data["success"]:
+                print("Couldn't resync with the server: ", data.get("error", ""))
+                return
+
+            next_state: str = data["next_state"]
+            self.gameState = getattr(GameStage, next_state, self.gameState)
+            self.current_turn = data["next_player"]
+            self.protocol = data.get("protocol", PROTOCOL_JSON)
+
+            # Find the pieces that were added, moved or removed while disconnected
+            serverPositions = {ID: (x, y) for ID, x, y in data["pieces"]}
+            changed = {ID: position for ID, position in serverPositions.items()
+                       if self.mirror.position(ID) != position}
+            removed = [ID for ID in self.mirror.pieces() if ID not in serverPositions]
+
+            serverNodes = {ID: self.boardGraph.nodeId(int(x), int(y)) for ID, (x, y) in serverPositions.items()}
+            self.mirror.load(serverNodes)
+            self.resyncing = False
+            active_pieces = self.updateActivePieces(data)
+
+            # Moves made while disconnected are missing from the record, so it continues from the new board
+            if self.recorder is not None and (changed or removed):
+                self.writeRecord(self.recorder.resync, serverNodes, self.gameState, self.current_turn)
+
+            self.publish("boardResynced", changed, removed, next_state, self.current_turn, active_pieces)
+            self.checkGameOver(data)
+
+        except Exception as e:
+            print("Received an unexpected response: ", e)
+
+    # Checks that a change sent by the server fit the local board and that both boards have the same checksum
+    # Servers that don't send a checksum are only checked against the local board
+    def checkMirror(self, applied, data):
+        checksum = data.get("board_hash")
+        if applied and (checksum is None or checksum == self.mirror.hexChecksum()):
+            return
+
+        self.requestResync()
+
+    # Asks the server for its board once the local copy stops matching it
+    # The answer is handled like a resync after reconnecting, so only the pieces that differ get redrawn
+    def requestResync(self):
+        if self.resyncing:
+            return
+
+        print("The board no longer matches the server's, resyncing")
+        self.resyncing = True
+
+        if self.spectating is not None:
+            self.spectate(self.spectating)
+            return
+
+        message = {"action": "resync",
+                   "player_key": self.player_tokens[self.player_num],
+                   "protocols": [PROTOCOL_BINARY, PROTOCOL_JSON]}
+        self.sendMessage(message)
+
+    # ****************************** SPECTATING ******************************
+    # Starts watching the game of the player with the given key
+    # The server sends every move made in the game from then on
+    def spectate(self, player_key):
+        self.spectating = player_key
+        self.predicting = False
+
+        message = {"action": "spectate",
+                   "player_key": player_key,
+                   "protocols": [PROTOCOL_BINARY, PROTOCOL_JSON]}
+
+        # Let the server skip sending the board layout if it's already been cached
+        layoutHash = self.topologies.knownHash(self.gameType)
+        if layoutHash is not None:
+            message["topology_hash"] = layoutHash
+
+        self.sendMessage(message)
+
+    # Loads the watched game's board, then passes on its pieces like a resync
+    def spectate_Response(self, data):
+        try:
+            success: bool = data["success"]
+            next_state: str = data["next_state"]
+            self.current_turn = data["next_player"]
+
+            if not success:
+                self.spectating = None
+                self.publish("startGameEvaluated", False, data["error"], False, next_state, self.current_turn, None, "")
+                return
+
+            adjacentPieces_raw: dict | None = data.get("adjacent_pieces")
+            if adjacentPieces_raw is not None:
+                layoutHash, boardGraph = self.topologies.store(self.gameType, adjacentPieces_raw)
+            else:
+                layoutHash = data["topology_hash"]
+                boardGraph = self.topologies.load(self.gameType, layoutHash)
+
+            if boardGraph is None:
+                self.spectating = None
+                self.publish("startGameEvaluated", False, "The board layout couldn't be loaded.",
+                             False, next_state, self.current_turn, None, "")
+                return
+
+            # Only redraw the board when it's the first response, not after reconnecting
+            if not self.running:
+                self.running = True
+                self.boardGraph = boardGraph
+                self.mirror = BoardMirror(boardGraph, self.ID_SHIFT)
+                self.activePieces = set()
+                self.publish("startGameEvaluated", True, "", False, next_state, self.current_turn,
+                             boardGraph, layoutHash)
+
+            self.resync_Response(data)
+
+        except Exception as e:
+            print("Received an unexpected response: ", e)
+
+    def end(self):
+        message = {"action": "end"}
+        self.sendMessage(message)
+
+    def end_Response(self, data: dict):
+        try:
+            success = data["success"]
+            msg = data["msg"]
+            won = data.get("won", False)
+
+            self.publish("endEvaluated", success, msg, won, self.waiting)
+
+            self.pendingMoves = {}
+            self.stopRecording()
+
+            self.running = False
+            self.waiting = False
+
+        except Exception as e:
+            print("Received an unexpected response: ", e)
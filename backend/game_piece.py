@@ -1,6 +1,6 @@
 import typing
 from PyQt5.QtWidgets import QGraphicsItem, QGraphicsEllipseItem, QGraphicsObject
-from PyQt5.QtCore import QRectF, QPointF, pyqtSlot, pyqtSignal
+from PyQt5.QtCore import QRectF, QPointF, QTimer, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QPen, QColor, QBrush
 from backend import board_manager
 
@@ -8,6 +8,17 @@ from backend import board_manager
 class GamePiece(QGraphicsObject):
     # *************** SIGNALS
     pieceMoved = pyqtSignal(int, float, float)
+    dragStarted = pyqtSignal(int)
+    dragMoved = pyqtSignal(int, float, float)
+
+    # Width of the outline around the piece
+    PEN_WIDTH = 2
+
+    # Shortest time between two dragMoved signals in milliseconds, about one frame at 60 Hz
+    DRAG_INTERVAL = 16
+
+    # Pens and brushes shared by all the pieces, keyed by the piece color and whether it's activated
+    styles = {}
 
     def __init__(self, ID, x, y, radius, color) -> None:
         super().__init__()
@@ -19,57 +30,144 @@ class GamePiece(QGraphicsObject):
 
         self.activated = False
 
+        # Shape of the piece and the area it paints, including its outline
+        self.rect = QRectF(-self.radius, -self.radius / 2, self.radius * 2, self.radius)
+        margin = self.PEN_WIDTH / 2
+        self.paintRect = self.rect.adjusted(-margin, -margin, margin, margin)
+
+        # Keep the painted piece in a pixmap so moving it around is just a blit
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+
         # Move item to starting position
         self.setPos(self.x, self.y)
 
         self.item_pos = QPointF(x, y)
 
+        # Tracks if the piece is being dragged by the user
+        self.dragging = False
+
+        # Coalesces the position changes of a drag into one dragMoved signal per frame
+        # Created the first time the piece is dragged since most pieces never are
+        self.dragTimer = None
+
     # Gets the bounding rect of the item in item coordinates
     def boundingRect(self):
-        return QRectF(-self.radius, -self.radius / 2,
-                      self.radius * 2, self.radius)
+        return self.paintRect
+
+    # Gets the pen and brush for painting a piece, creating them the first time they're needed
+    @classmethod
+    def style(cls, color, activated):
+        key = (color.rgba(), activated)
+
+        if key not in cls.styles:
+            outline = QColor(0, 150, 0) if activated else QColor(0, 0, 0)
+            cls.styles[key] = (QPen(outline, cls.PEN_WIDTH), QBrush(color))
+
+        return cls.styles[key]
 
     # Paints the item to the scene
     def paint(self, painter, option, widget):
-        rect = self.boundingRect()
-
-        if self.activated:
-            painter.setPen(QPen(QColor(0, 150, 0), 2))
-        else:
-            painter.setPen(QPen(QColor(0, 0, 0), 2))
+        pen, brush = self.style(self.color, self.activated)
 
-        painter.setBrush(QBrush(self.color))
+        painter.setPen(pen)
+        painter.setBrush(brush)
 
-        painter.drawEllipse(rect)
+        painter.drawEllipse(self.rect)
 
     # Makes game piece movable
     def activate(self):
+        if self.activated:
+            return
+
         self.setFlag(QGraphicsItem.ItemIsMovable)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
 
         self.activated = True
 
+        # Repaint the cached piece with the new outline
+        self.update()
+
     # Makes game piece unmovable
     def deactivate(self):
+        if not self.activated:
+            return
+
         self.setFlag(QGraphicsItem.ItemIsMovable, False)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, False)
 
         self.activated = False
 
+        # Repaint the cached piece with the new outline
+        self.update()
+
     # Updates the item position if the game piece is being moved around
     def itemChange(self, change: 'QGraphicsItem.GraphicsItemChange', value: typing.Any) -> typing.Any:
         if (change == QGraphicsItem.ItemPositionChange):
             self.item_pos = value
 
+            # Only pass on the latest position once per frame, however often the mouse moves
+            if self.dragging and not self.dragTimer.isActive():
+                self.dragTimer.start()
+
         return super().itemChange(change, value)
 
+    # Notifies the main window that the piece has been picked up
+    def mousePressEvent(self, event: 'QGraphicsSceneMouseEvent') -> None:
+        super().mousePressEvent(event)
+
+        if not self.activated:
+            return
+
+        if self.dragTimer is None:
+            self.dragTimer = QTimer(self)
+            self.dragTimer.setSingleShot(True)
+            self.dragTimer.setInterval(self.DRAG_INTERVAL)
+            self.dragTimer.timeout.connect(self.dragTimer_Timeout)
+
+        self.dragging = True
+        self.dragStarted.emit(self.ID)
+
+    @pyqtSlot()
+    def dragTimer_Timeout(self):
+        if self.dragging:
+            self.dragMoved.emit(self.ID, self.item_pos.x(), self.item_pos.y())
+
     # Notifies the main window that the piece has been moved
     def mouseReleaseEvent(self, event: 'QGraphicsSceneMouseEvent') -> None:
+        self.dragging = False
+        if self.dragTimer is not None:
+            self.dragTimer.stop()
 
         self.pieceMoved.emit(self.ID, self.item_pos.x(), self.item_pos.y())
 
         return super().mouseReleaseEvent(event)
 
+    # Turns the piece into another one as if it had just been created, so pooled pieces can be reused
+    def reset(self, ID, x, y, color):
+        self.deactivate()
+
+        self.dragging = False
+        if self.dragTimer is not None:
+            self.dragTimer.stop()
+
+        self.ID = ID
+        self.x = x
+        self.y = y
+        self.item_pos = QPointF(x, y)
+        self.setPos(x, y)
+
+        self.setOpacity(1)
+
+        # Repaint the cached piece if its color changed
+        if self.color != color:
+            self.color = color
+            self.update()
+
+    # Shows the piece at a new position without committing to it
+    # Calling movePiece() without any arguments moves it back
+    def previewMove(self, x, y):
+        self.setPos(x, y)
+
     # Updates the pieces position
 
     def movePiece(self, x=None, y=None):
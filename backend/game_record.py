@@ -0,0 +1,405 @@
+import mmap
+import os
+import struct
+from array import array
+
+from backend.game_stage import GameStage
+
+# Records are locked while they're written so two games never write to the same file at once
+# Not available on Windows, where games are assumed to be recorded one at a time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Compact, append-only log of the moves of a game
+# A file holds one or more game records back to back, so finished games can be archived by
+# appending them to a single file. Every record starts with a one byte tag:
+#   bits 0-1: the action of a move (1 = place, 2 = remove, 3 = move), or 0 for the other records
+#   bits 2-4: the stage after the move, bit 5: the next player, bit 6: the owner of the piece
+# Moves are followed by the piece's count (its ID without the owner) and the node it moved to,
+# 2 bytes each, so a move takes 3-5 bytes. The other records use bits 2-7 of the tag for their type
+ACTION_PLACE = 1
+ACTION_REMOVE = 2
+ACTION_MOVE = 3
+ACTIONS = {ACTION_PLACE: "place_piece", ACTION_REMOVE: "remove_piece", ACTION_MOVE: "move_piece"}
+
+TAG_KEYFRAME = 1 << 2
+TAG_END = 2 << 2
+TAG_INDEX = 3 << 2
+TAG_HEADER = 4 << 2
+
+STAGE_SHIFT = 2
+PLAYER_SHIFT = 5
+OWNER_SHIFT = 6
+
+# How far the pieces' ID needs to bit shifted to the left to store the player ID with it
+ID_SHIFT = 2
+
+# ****************************** RECORD LAYOUTS ******************************
+MAGIC = b"SHXR"
+TRAILER_MAGIC = b"SHXE"
+VERSION = 2
+
+# Tag, magic, version, game type, min pieces, max pieces, keyframe interval, layout hash
+HEADER = struct.Struct("<B4sBBBBB20s")
+
+MOVE = struct.Struct("<BHH")  # tag, piece count, node
+REMOVE = struct.Struct("<BH")  # tag, piece count
+
+# Full state of the board after a number of moves, followed by a (piece ID, node) pair per piece
+KEYFRAME = struct.Struct("<BIBBH")  # tag, move number, stage, next player, number of pieces
+KEYFRAME_PIECE = struct.Struct("<HH")
+
+END = struct.Struct("<BB")  # tag, winner
+
+# Written once the game is finished: the offset of every regular keyframe, then the trailer
+INDEX = struct.Struct("<BI")  # tag, number of keyframes
+TRAILER = struct.Struct("<IIIB4s")  # number of keyframes, number of moves, record length, winner, magic
+
+NO_WINNER = 0xFF
+
+
+# Gets the default file the finished games are appended to
+def defaultRecordPath():
+    dataHome = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+    return os.path.join(dataHome, "qt-shax", "games.shxr")
+
+
+# Records the moves of a game by appending them to a file as the game goes on
+# Moves are buffered and written along with every keyframe, so a game that's interrupted by a crash
+# leaves a readable record of everything up to its last keyframe
+# The file stays locked until the game is over so no other game's record ends up inside this one.
+# Games started while the file is locked are recorded to a numbered file next to it instead
+class GameRecorder:
+    def __init__(self, path, gameType, minPieces, maxPieces, layoutHash, stage=GameStage.PLACEMENT, player=0,
+                 keyframeInterval=16) -> None:
+        self.path = path
+        self.keyframeInterval = keyframeInterval
+
+        # Part of the record that hasn't been written yet
+        self.buffer = bytearray()
+
+        # Size of the part of the record that's already in the file
+        # Offsets are stored relative to the start of the record so records can be moved between files
+        self.written = 0
+        self.file = None
+
+        # Current board, used to write the keyframes
+        self.pieces = {}
+        self.stage = stage
+        self.player = player
+
+        self.moveCount = 0
+        self.keyframes = []
+        self.finished = False
+
+        self.buffer += HEADER.pack(TAG_HEADER, MAGIC, VERSION, gameType, minPieces, maxPieces, keyframeInterval,
+                                   bytes.fromhex(layoutHash) if layoutHash else bytes(20))
+        self.keyframe()
+
+    # Writes the current state of the board
+    # Regular keyframes are indexed so any move can be reached in a bounded number of steps
+    # Keyframes written at other times (e.g. after a resync) are only used while reading forward
+    def keyframe(self):
+        if len(self.keyframes) * self.keyframeInterval == self.moveCount:
+            self.keyframes.append(self.written + len(self.buffer))
+
+        self.buffer += KEYFRAME.pack(TAG_KEYFRAME, self.moveCount, self.stage.value, self.player, len(self.pieces))
+        for ID, node in self.pieces.items():
+            self.buffer += KEYFRAME_PIECE.pack(ID, node)
+
+        self.flush()
+
+    # Replaces the board after the client had to resync with the server
+    def resync(self, pieces, stage, player):
+        self.pieces = dict(pieces)
+        self.stage = stage
+        self.player = player
+        self.keyframe()
+
+    def place(self, ID, node, stage, player):
+        self.pieces[ID] = node
+        self.addMove(ACTION_PLACE, ID, node, stage, player)
+
+    def remove(self, ID, stage, player):
+        self.pieces.pop(ID, None)
+        self.addMove(ACTION_REMOVE, ID, None, stage, player)
+
+    def move(self, ID, node, stage, player):
+        self.pieces[ID] = node
+        self.addMove(ACTION_MOVE, ID, node, stage, player)
+
+    def addMove(self, action, ID, node, stage, player):
+        tag = action | stage.value << STAGE_SHIFT | player << PLAYER_SHIFT | (ID & 1) << OWNER_SHIFT
+        if node is None:
+            self.buffer += REMOVE.pack(tag, ID >> ID_SHIFT)
+        else:
+            self.buffer += MOVE.pack(tag, ID >> ID_SHIFT, node)
+
+        self.stage = stage
+        self.player = player
+        self.moveCount += 1
+
+        if self.moveCount % self.keyframeInterval == 0:
+            self.keyframe()
+
+    # Ends the record with the winner and the index of the keyframes, and releases the file
+    def finish(self, winner=None):
+        if self.finished:
+            return
+        self.finished = True
+
+        winner = NO_WINNER if winner is None else winner
+        self.buffer += END.pack(TAG_END, winner)
+        self.buffer += INDEX.pack(TAG_INDEX, len(self.keyframes))
+        self.buffer += array("I", self.keyframes).tobytes()
+        self.buffer += TRAILER.pack(len(self.keyframes), self.moveCount,
+                                    self.written + len(self.buffer) + TRAILER.size, winner, TRAILER_MAGIC)
+
+        try:
+            self.flush()
+        finally:
+            self.close()
+
+    # Releases the file without finishing the record, e.g. after the record couldn't be written
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # Appends the buffered part of the record to the file in a single write
+    def flush(self):
+        if self.file is None:
+            self.file = self.openFile()
+
+        self.file.write(self.buffer)
+        self.written += len(self.buffer)
+        self.buffer = bytearray()
+
+    # Opens the file for appending and locks it for the rest of the game
+    # Tries games-2.shxr, games-3.shxr, ... if another game is being recorded to the file
+    def openFile(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        root, extension = os.path.splitext(self.path)
+
+        number = 1
+        while True:
+            file = open(self.path, "ab", buffering=0)
+            if fcntl is None:
+                return file
+
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return file
+            except BlockingIOError:
+                file.close()
+                number += 1
+                self.path = f"{root}-{number}{extension}"
+
+
+# A move read back from a record
+class RecordedMove:
+    __slots__ = ("action", "ID", "node", "stage", "player")
+
+    def __init__(self, action, ID, node, stage, player) -> None:
+        self.action = action
+        self.ID = ID
+        self.node = node
+        self.stage = stage
+        self.player = player
+
+    def __repr__(self):
+        return f"RecordedMove({ACTIONS[self.action]}, {self.ID}, {self.node}, {self.stage.name}, {self.player})"
+
+
+# Read-only view of one game record inside a buffer (usually a memory-mapped file)
+# Nothing is parsed until it's needed, so scanning an archive only reads each record's trailer
+class GameRecord:
+    def __init__(self, buffer, start, end=None) -> None:
+        self.buffer = buffer
+        self.start = start
+
+        (tag, magic, version, self.gameType, self.MIN_PIECES, self.MAX_PIECES,
+         self.keyframeInterval, layoutHash) = HEADER.unpack_from(buffer, start)
+        if tag != TAG_HEADER or magic != MAGIC or version != VERSION:
+            raise ValueError("Not a game record.")
+
+        self.layoutHash = layoutHash.hex()
+
+        # Finished records are read through their trailer
+        # Unfinished ones (e.g. from a crash) are indexed by reading them from the start
+        self.end = end
+        if end is not None:
+            keyframeCount, self.moveCount, length, winner, _ = TRAILER.unpack_from(buffer, end - TRAILER.size)
+            self.winner = None if winner == NO_WINNER else winner
+            self.finished = True
+
+            indexStart = end - TRAILER.size - keyframeCount * 4
+            self.keyframes = struct.unpack_from(f"<{keyframeCount}I", buffer, indexStart)
+        else:
+            self.scan()
+
+    # Gets the size of the record at the offset, or 0 if it's cut off or belongs to the next game
+    def recordSize(self, offset):
+        buffer = self.buffer
+        tag = buffer[offset]
+        action = tag & 0b11
+
+        if action == ACTION_REMOVE:
+            size = REMOVE.size
+        elif action:
+            size = MOVE.size
+        elif tag == TAG_KEYFRAME and offset + KEYFRAME.size <= len(buffer):
+            size = KEYFRAME.size + KEYFRAME.unpack_from(buffer, offset)[4] * KEYFRAME_PIECE.size
+        elif tag == TAG_END:
+            size = END.size
+        elif tag == TAG_INDEX and offset + INDEX.size <= len(buffer):
+            size = INDEX.size + INDEX.unpack_from(buffer, offset)[1] * 4 + TRAILER.size
+        else:
+            return 0
+
+        return size if offset + size <= len(buffer) else 0
+
+    # Reads the record from the start to find its end, moves and keyframes
+    def scan(self):
+        self.moveCount = 0
+        self.winner = None
+        self.finished = False
+
+        keyframes = []
+        offset = self.start + HEADER.size
+        while offset < len(self.buffer):
+            size = self.recordSize(offset)
+            if not size:
+                break
+
+            tag = self.buffer[offset]
+            if tag & 0b11:
+                self.moveCount += 1
+            elif tag == TAG_KEYFRAME:
+                if KEYFRAME.unpack_from(self.buffer, offset)[1] == len(keyframes) * self.keyframeInterval:
+                    keyframes.append(offset - self.start)
+            elif tag == TAG_END:
+                winner = self.buffer[offset + 1]
+                self.winner = None if winner == NO_WINNER else winner
+            elif tag == TAG_INDEX:
+                self.finished = True
+
+            offset += size
+            if self.finished:
+                break
+
+        self.end = offset
+        self.keyframes = keyframes
+
+    def __len__(self):
+        return self.moveCount
+
+    # Reads the records between two offsets and calls the callbacks for each one
+    # Stops once 'limit' moves have been read
+    def read(self, offset, onMove, onKeyframe, limit=None):
+        buffer = self.buffer
+        end = self.end
+        moves = 0
+
+        while offset < end:
+            tag = buffer[offset]
+            action = tag & 0b11
+
+            if action:
+                if moves == limit:
+                    break
+
+                if action == ACTION_REMOVE:
+                    _, count = REMOVE.unpack_from(buffer, offset)
+                    node = None
+                    offset += REMOVE.size
+                else:
+                    _, count, node = MOVE.unpack_from(buffer, offset)
+                    offset += MOVE.size
+
+                ID = count << ID_SHIFT | (tag >> OWNER_SHIFT) & 1
+                onMove(RecordedMove(action, ID, node, GameStage((tag >> STAGE_SHIFT) & 0b111),
+                                    (tag >> PLAYER_SHIFT) & 1))
+                moves += 1
+            elif tag == TAG_KEYFRAME:
+                _, moveNumber, stage, player, count = KEYFRAME.unpack_from(buffer, offset)
+                offset += KEYFRAME.size
+                pieces = dict(KEYFRAME_PIECE.iter_unpack(buffer[offset:offset + count * KEYFRAME_PIECE.size]))
+                onKeyframe(moveNumber, pieces, GameStage(stage), player)
+                offset += count * KEYFRAME_PIECE.size
+            else:
+                break
+
+        return offset
+
+    # Gets every move in the record
+    def moves(self):
+        moves = []
+        self.read(self.start + HEADER.size, moves.append, lambda *args: None)
+        return moves
+
+    # Gets the board after the given number of moves
+    # Starts from the closest keyframe before it, so it never reads more than one keyframe interval
+    # Returns the pieces as {ID: node}, the stage and the next player
+    def stateAt(self, moveNumber):
+        moveNumber = max(0, min(moveNumber, self.moveCount))
+        slot = min(moveNumber // self.keyframeInterval, len(self.keyframes) - 1)
+
+        state = {}
+
+        def onKeyframe(number, pieces, stage, player):
+            state.update(pieces=pieces, stage=stage, player=player)
+
+        def onMove(move):
+            if move.action == ACTION_REMOVE:
+                state["pieces"].pop(move.ID, None)
+            else:
+                state["pieces"][move.ID] = move.node
+            state.update(stage=move.stage, player=move.player)
+
+        # The indexed keyframe is read first, then the moves after it
+        self.read(self.start + int(self.keyframes[slot]), onMove, onKeyframe, moveNumber - slot * self.keyframeInterval)
+
+        return state["pieces"], state["stage"], state["player"]
+
+
+# Opens a file of game records
+# The file is memory-mapped and the records are found by walking back through their trailers,
+# so even archives of many games are opened without reading the moves
+def openRecords(path):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    records = []
+    end = len(buffer)
+    while end > 0:
+        if end < TRAILER.size or buffer[end - 4:end] != TRAILER_MAGIC:
+            break
+
+        length = TRAILER.unpack_from(buffer, end - TRAILER.size)[2]
+        if length > end:
+            break
+        records.append(GameRecord(buffer, end - length, end))
+        end -= length
+
+    records.reverse()
+
+    # Records that were never finished break the chain of trailers, so the rest is read from the start
+    if end > 0:
+        scanned = []
+        offset = 0
+        while offset < end:
+            try:
+                record = GameRecord(buffer, offset)
+            except (ValueError, struct.error):
+                # Anything after a damaged record can't be found again
+                break
+            scanned.append(record)
+            offset = record.end
+        records = scanned + records
+
+    return records
@@ -0,0 +1,12 @@
+from enum import Enum
+
+# Enum for tracking what stage the game is in
+# TODO: Come up with a better name for the 'MOVEMENT' game stage
+
+
+class GameStage(Enum):
+    STOPPED = 0
+    PLACEMENT = 1
+    FIRST_REMOVAL = 2
+    REMOVAL = 3
+    MOVEMENT = 4
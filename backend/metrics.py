@@ -0,0 +1,140 @@
+import json
+import time
+from collections import OrderedDict, deque
+
+
+# Keeps the most recent samples of a timing and the total number of samples seen
+class RollingHistogram:
+    def __init__(self, size=1000) -> None:
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    # Gets the value below which the given fraction of the recent samples fall
+    # Returns None if there are no samples yet
+    def percentile(self, fraction):
+        if not self.samples:
+            return None
+
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    # Summarizes the recent samples in milliseconds
+    def summary(self):
+        summary = {"count": self.count}
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+            value = self.percentile(fraction)
+            summary[name + "_ms"] = None if value is None else value * 1000
+        return summary
+
+
+# Timing and traffic counters for the messages exchanged with the server
+# Every request is stamped when it's sent and matched to its response when it arrives,
+# either by its sequence number or, for servers that don't echo it, by being the oldest request
+# of the same action
+class ClientMetrics:
+    ACTIONS = ("join_game", "place_piece", "remove_piece", "move_piece", "end")
+
+    # Most requests of an action that can wait for a response before the oldest one is given up on
+    MAX_PENDING = 64
+
+    def __init__(self, size=1000) -> None:
+        # Round trip times of each action
+        self.latencies = {action: RollingHistogram(size) for action in self.ACTIONS}
+
+        # Time spent handling each response on the client
+        self.handlerTimes = RollingHistogram(size)
+
+        self.messagesSent = 0
+        self.messagesReceived = 0
+        self.bytesSent = 0
+        self.bytesReceived = 0
+
+        # Send times of the requests still waiting for a response, oldest first
+        # Keyed by their sequence number, or by a negative number for requests without one
+        self.pending = {action: OrderedDict() for action in self.ACTIONS}
+        self.unnumbered = 0
+
+        self.startTime = time.perf_counter()
+
+    # Stamps a request as it's sent
+    def messageSent(self, message, size):
+        self.messagesSent += 1
+        self.bytesSent += size
+
+        pending = self.pending.get(message.get("action"))
+        if pending is None:
+            return
+
+        key = message.get("seq")
+        if key is None:
+            self.unnumbered -= 1
+            key = self.unnumbered
+
+        pending[key] = time.perf_counter()
+        if len(pending) > self.MAX_PENDING:
+            pending.popitem(last=False)
+
+    # Matches a response to its request and records the round trip time
+    def messageReceived(self, data, size):
+        self.messagesReceived += 1
+        self.bytesReceived += size
+
+        # Responses the client didn't ask for have no round trip
+        pending = self.pending.get(data.get("action"))
+        if not pending:
+            return
+
+        seq = data.get("seq")
+        if seq is None:
+            _, sentAt = pending.popitem(last=False)
+        elif seq in pending:
+            sentAt = pending.pop(seq)
+        else:
+            return
+
+        self.latencies[data["action"]].add(time.perf_counter() - sentAt)
+
+    # Forgets the requests that will never get a response, e.g. after the connection dropped
+    def dropPending(self):
+        for pending in self.pending.values():
+            pending.clear()
+
+    def handlerFinished(self, duration):
+        self.handlerTimes.add(duration)
+
+    # Summarizes all the timings and counters
+    def summary(self):
+        elapsed = time.perf_counter() - self.startTime
+        return {"elapsed_s": elapsed,
+                "messages_sent": self.messagesSent,
+                "messages_received": self.messagesReceived,
+                "bytes_sent": self.bytesSent,
+                "bytes_received": self.bytesReceived,
+                "messages_per_s": (self.messagesSent + self.messagesReceived) / elapsed if elapsed else 0,
+                "round_trips": {action: histogram.summary() for action, histogram in self.latencies.items()},
+                "handler": self.handlerTimes.summary()}
+
+    # Writes the summary to a JSON file
+    def export(self, path):
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=4)
+
+    # Gets a single line overview of the metrics for the status bar
+    def overview(self):
+        parts = []
+        for action, histogram in self.latencies.items():
+            p50 = histogram.percentile(0.5)
+            if p50 is not None:
+                parts.append(f"{action.split('_')[0]} {p50 * 1000:.1f}/{histogram.percentile(0.99) * 1000:.1f} ms")
+
+        handler = self.handlerTimes.percentile(0.5)
+        if handler is not None:
+            parts.append(f"handler {handler * 1000:.2f} ms")
+
+        parts.append(f"in {self.messagesReceived} msg/{self.bytesReceived / 1024:.1f} kB")
+        parts.append(f"out {self.messagesSent} msg/{self.bytesSent / 1024:.1f} kB")
+        return "RTT p50/p99: " + " | ".join(parts)
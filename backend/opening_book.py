@@ -0,0 +1,103 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from backend.tablebase import layoutDigest
+
+# Opening book of the placement stage
+# Every (position, move) pair seen in the games the book was built from is stored with the number of
+# games it was played in and the points the player who made it scored (2 for a win, 1 for a draw)
+# Entries are sorted by the position's Zobrist key, so a lookup is a binary search over the keys
+MAGIC = b"SHXB"
+VERSION = 1
+
+# Magic, version, min pieces, max pieces, layout digest, number of entries
+HEADER = struct.Struct("<4sBBBx20s4xQ")
+
+# Size of an entry: key, games, points and move
+ENTRY_SIZE = 8 + 4 + 4 + 2
+
+# Moves are packed into 16 bits: the kind of move, then the start and end nodes
+MOVE_KINDS = {"place": 1, "remove": 2, "move": 3}
+KIND_NAMES = {kind: name for name, kind in MOVE_KINDS.items()}
+
+
+def encodeMove(move):
+    start = move[1]
+    end = move[2] if len(move) > 2 else 0
+    return MOVE_KINDS[move[0]] << 12 | start << 6 | end
+
+
+def decodeMove(code):
+    name = KIND_NAMES[code >> 12]
+    start = (code >> 6) & 0x3F
+    return (name, start, code & 0x3F) if name == "move" else (name, start)
+
+
+# Gets the default folder the books are stored in
+def defaultBookDir():
+    dataHome = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+    return os.path.join(dataHome, "qt-shax", "books")
+
+
+# Books only apply to the board layout and piece limits they were built with
+def bookName(masks, minPieces, maxPieces):
+    return f"{layoutDigest(masks)}-{minPieces}-{maxPieces}.shxb"
+
+
+# ****************************** LOOKUPS ******************************
+# A book opened from disk
+# The file is memory-mapped and only the pages touched by the binary search are read
+class OpeningBook:
+    def __init__(self, path) -> None:
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.MIN_PIECES, self.MAX_PIECES, digest, count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION or len(self.buffer) != HEADER.size + count * ENTRY_SIZE:
+            raise ValueError(f"{path} isn't a complete opening book.")
+
+        self.digest = digest.hex()
+
+        offset = HEADER.size
+        self.keys = np.frombuffer(self.buffer, np.uint64, count, offset)
+        offset += count * 8
+        self.games = np.frombuffer(self.buffer, np.uint32, count, offset)
+        offset += count * 4
+        self.points = np.frombuffer(self.buffer, np.uint32, count, offset)
+        offset += count * 4
+        self.moveCodes = np.frombuffer(self.buffer, np.uint16, count, offset)
+
+    # Opens the book of a board layout and piece limits from a folder of books
+    # Returns None if there isn't one
+    @classmethod
+    def find(cls, directory, masks, minPieces, maxPieces):
+        try:
+            return cls(os.path.join(directory, bookName(masks, minPieces, maxPieces)))
+        except (OSError, ValueError):
+            return None
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Gets the moves played in the position as (move, games, points) tuples
+    def moves(self, position):
+        key = np.uint64(position.key())
+        start = int(np.searchsorted(self.keys, key, "left"))
+        end = int(np.searchsorted(self.keys, key, "right"))
+
+        return [(decodeMove(int(self.moveCodes[entry])), int(self.games[entry]), int(self.points[entry]))
+                for entry in range(start, end)]
+
+    # Gets the move with the best score in the position, or None if the book doesn't know it well enough
+    # Moves have to have been played in at least 'minGames' games
+    def bestMove(self, position, minGames=4):
+        legal = set(position.legalMoves())
+        candidates = [(points / games, games, move) for move, games, points in self.moves(position)
+                      if games >= minGames and move in legal]
+
+        if not candidates:
+            return None
+        return max(candidates)[2]
@@ -0,0 +1,218 @@
+import struct
+
+from backend.game_stage import GameStage
+
+# Compact binary framing for the messages sent during a game
+# The client offers it in the join_game request and the server picks it in its response
+# Anything that can't be packed (joining, ending, errors) is still sent as JSON text
+PROTOCOL_JSON = "json"
+# v2 added the board checksum and the activation deltas to the responses,
+# v3 widened the coordinates to 16 bits
+PROTOCOL_BINARY = "binary-v3"
+
+# Codes identifying the action of a binary message
+ACTION_CODES = {"place_piece": 1, "remove_piece": 2, "move_piece": 3}
+ACTION_NAMES = {code: action for action, code in ACTION_CODES.items()}
+
+# ****************************** MESSAGE LAYOUTS ******************************
+# Every request starts with the action, sequence number and the index of the player sending it
+# The server already knows the player keys from the join_game handshake
+REQUEST_HEADER = struct.Struct("<BHB")
+PLACE_REQUEST = struct.Struct("<hh")  # x, y
+REMOVE_REQUEST = struct.Struct("<H")  # piece ID
+MOVE_REQUEST = struct.Struct("<Hhh")  # piece ID, new x, new y
+
+# Every response starts with the action, sequence number, flags, next stage and next player
+# Flags: bit 0 = success, bit 1 = game over, bits 2-3 = winner, bit 4 = board checksum included,
+# bit 5 = the active pieces are sent as the deactivated and activated lists instead of the full list
+RESPONSE_HEADER = struct.Struct("<BHBBB")
+PLACE_RESPONSE = struct.Struct("<Hhh")  # new piece ID, x, y
+REMOVE_RESPONSE = struct.Struct("<H")  # removed piece ID, followed by the active pieces
+MOVE_RESPONSE = struct.Struct("<Hhh")  # moved piece ID, new x, new y, followed by the active pieces
+
+# Checksum of the board after the move, at the end of the response
+BOARD_HASH = struct.Struct("<Q")
+
+# Multiplexed connections prefix every message with the ID of the game it belongs to
+CHANNEL = struct.Struct("<H")
+
+# Lists of piece IDs are prefixed with their length
+LIST_LENGTH = struct.Struct("<B")
+PIECE_ID = struct.Struct("<H")
+
+FLAG_SUCCESS = 0b1
+FLAG_GAME_OVER = 0b10
+WINNER_SHIFT = 2
+WINNER_MASK = 0b1100
+FLAG_BOARD_HASH = 0b10000
+FLAG_ACTIVE_DELTA = 0b100000
+
+
+# Packs a list of piece IDs
+def packIDs(IDs):
+    return LIST_LENGTH.pack(len(IDs)) + struct.pack(f"<{len(IDs)}H", *IDs)
+
+
+# Unpacks a list of piece IDs starting at the offset
+def unpackIDs(data, offset):
+    (length,) = LIST_LENGTH.unpack_from(data, offset)
+    return list(struct.unpack_from(f"<{length}H", data, offset + LIST_LENGTH.size))
+
+
+# Gets a coordinate as an int, or None if it isn't a whole number and has to be sent as JSON
+def wholeNumber(value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return number if number == value else None
+
+
+# Prefixes a message with the ID of its game
+def addChannel(gameId, data):
+    return CHANNEL.pack(gameId) + data
+
+
+# Splits a multiplexed message into the ID of its game and the message itself
+def splitChannel(data):
+    (gameId,) = CHANNEL.unpack_from(data)
+    return gameId, data[CHANNEL.size:]
+
+
+# ****************************** REQUESTS ******************************
+# Packs a request into the binary format
+# Returns None if the request has to be sent as JSON
+def encodeRequest(message, player_tokens):
+    code = ACTION_CODES.get(message.get("action"))
+    if code is None or message.get("player_key") not in player_tokens:
+        return None
+
+    try:
+        header = REQUEST_HEADER.pack(code, message.get("seq", 0), player_tokens.index(message["player_key"]))
+
+        if code == ACTION_CODES["place_piece"]:
+            x, y = wholeNumber(message["x"]), wholeNumber(message["y"])
+            return None if x is None or y is None else header + PLACE_REQUEST.pack(x, y)
+        elif code == ACTION_CODES["remove_piece"]:
+            return header + REMOVE_REQUEST.pack(message["piece_ID"])
+        else:
+            x, y = wholeNumber(message["new_x"]), wholeNumber(message["new_y"])
+            return None if x is None or y is None else header + MOVE_REQUEST.pack(message["piece_ID"], x, y)
+
+    # Values that don't fit in their field (e.g. coordinates of a huge board) are sent as JSON
+    except struct.error:
+        return None
+
+
+# Unpacks a binary request into the same dict as its JSON version
+def decodeRequest(data, player_tokens):
+    code, seq, player = REQUEST_HEADER.unpack_from(data)
+    offset = REQUEST_HEADER.size
+
+    message = {"action": ACTION_NAMES[code], "player_key": player_tokens[player]}
+    if seq:
+        message["seq"] = seq
+
+    if code == ACTION_CODES["place_piece"]:
+        message["x"], message["y"] = PLACE_REQUEST.unpack_from(data, offset)
+    elif code == ACTION_CODES["remove_piece"]:
+        (message["piece_ID"],) = REMOVE_REQUEST.unpack_from(data, offset)
+    else:
+        message["piece_ID"], message["new_x"], message["new_y"] = MOVE_REQUEST.unpack_from(data, offset)
+
+    return message
+
+
+# ****************************** RESPONSES ******************************
+# Packs a response into the binary format
+# Returns None if the response has to be sent as JSON
+def encodeResponse(response):
+    code = ACTION_CODES.get(response.get("action"))
+    if code is None or not response.get("success", False):
+        return None
+
+    flags = FLAG_SUCCESS
+    if response.get("game_over", False):
+        flags |= FLAG_GAME_OVER | (response.get("winner", 0) << WINNER_SHIFT)
+    if "board_hash" in response:
+        flags |= FLAG_BOARD_HASH
+    if code != ACTION_CODES["place_piece"] and "active_pieces" not in response:
+        flags |= FLAG_ACTIVE_DELTA
+
+    if code != ACTION_CODES["remove_piece"]:
+        x, y = wholeNumber(response["new_x"]), wholeNumber(response["new_y"])
+        if x is None or y is None:
+            return None
+
+    try:
+        header = RESPONSE_HEADER.pack(code, response.get("seq", 0), flags,
+                                      GameStage[response["next_state"]].value, response["next_player"])
+
+        if code == ACTION_CODES["place_piece"]:
+            body = PLACE_RESPONSE.pack(response["new_piece_ID"], x, y)
+        elif code == ACTION_CODES["remove_piece"]:
+            body = REMOVE_RESPONSE.pack(response["removed_piece"]) + packActivePieces(response, flags)
+        else:
+            body = MOVE_RESPONSE.pack(response["moved_piece"], x, y) + packActivePieces(response, flags)
+
+        if flags & FLAG_BOARD_HASH:
+            body += BOARD_HASH.pack(int(response["board_hash"], 16))
+
+    # Values that don't fit in their field (e.g. coordinates of a huge board) are sent as JSON
+    except struct.error:
+        return None
+
+    return header + body
+
+
+# Unpacks a binary response into the same dict as its JSON version
+def decodeResponse(data):
+    code, seq, flags, stage, player = RESPONSE_HEADER.unpack_from(data)
+    offset = RESPONSE_HEADER.size
+
+    response = {"action": ACTION_NAMES[code],
+                "success": bool(flags & FLAG_SUCCESS),
+                "next_state": GameStage(stage).name,
+                "next_player": player}
+    if seq:
+        response["seq"] = seq
+    if flags & FLAG_GAME_OVER:
+        response["game_over"] = True
+        response["winner"] = (flags & WINNER_MASK) >> WINNER_SHIFT
+
+    if code == ACTION_CODES["place_piece"]:
+        response["new_piece_ID"], response["new_x"], response["new_y"] = PLACE_RESPONSE.unpack_from(data, offset)
+        offset += PLACE_RESPONSE.size
+    elif code == ACTION_CODES["remove_piece"]:
+        (response["removed_piece"],) = REMOVE_RESPONSE.unpack_from(data, offset)
+        offset = unpackActivePieces(response, flags, data, offset + REMOVE_RESPONSE.size)
+    else:
+        response["moved_piece"], response["new_x"], response["new_y"] = MOVE_RESPONSE.unpack_from(data, offset)
+        offset = unpackActivePieces(response, flags, data, offset + MOVE_RESPONSE.size)
+
+    if flags & FLAG_BOARD_HASH:
+        (boardHash,) = BOARD_HASH.unpack_from(data, offset)
+        response["board_hash"] = f"{boardHash:016x}"
+
+    return response
+
+
+# Packs either the full list of active pieces or the pieces whose activation changed
+def packActivePieces(response, flags):
+    if flags & FLAG_ACTIVE_DELTA:
+        return packIDs(response.get("deactivated", [])) + packIDs(response.get("activated", []))
+
+    return packIDs(response["active_pieces"])
+
+
+# Unpacks the active pieces into the response and returns the offset of the data after them
+def unpackActivePieces(response, flags, data, offset):
+    if flags & FLAG_ACTIVE_DELTA:
+        response["deactivated"] = unpackIDs(data, offset)
+        offset += LIST_LENGTH.size + PIECE_ID.size * len(response["deactivated"])
+        response["activated"] = unpackIDs(data, offset)
+        return offset + LIST_LENGTH.size + PIECE_ID.size * len(response["activated"])
+
+    response["active_pieces"] = unpackIDs(data, offset)
+    return offset + LIST_LENGTH.size + PIECE_ID.size * len(response["active_pieces"])
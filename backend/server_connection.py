@@ -0,0 +1,91 @@
+from PyQt5.QtWebSockets import QWebSocket, QWebSocketProtocol
+from PyQt5.QtCore import QUrl, QTimer, pyqtSignal, QObject
+
+from backend.connection_base import ConnectionBase
+
+
+# Websocket connection to the shax server shared by one or more board managers
+# Carries the messages over a QWebSocket, everything else is done by ConnectionBase
+class ServerConnection(QObject, ConnectionBase):
+    # *************** SIGNALS
+    connected = pyqtSignal()
+    connectionLost = pyqtSignal(int)
+    reconnected = pyqtSignal()
+
+    def __init__(self, url, multiplexed=False) -> None:
+        super().__init__(multiplexed=multiplexed)
+
+        # ********************* WEBSOCKET VARIABLES *************************
+        self.websocket = QWebSocket()
+        self.url = QUrl(url)
+
+        self.reconnectTimer = QTimer(self)
+        self.reconnectTimer.setSingleShot(True)
+
+        self.connect_all()
+
+    # Connects the appropriate signals and slots
+    def connect_all(self):
+        self.websocket.connected.connect(self.on_connected)
+        self.websocket.disconnected.connect(self.on_disconnected)
+        self.websocket.textMessageReceived.connect(self.receiveText)
+        self.websocket.binaryMessageReceived.connect(lambda message: self.receiveBinary(bytes(message)))
+        self.websocket.error.connect(self.on_error)
+        self.reconnectTimer.timeout.connect(self.reconnect)
+
+    def open(self):
+        # The connection may have been closed before a deferred open got to run
+        if self.closing:
+            return
+
+        self.websocket.open(self.url)
+        print("Opened websocket")
+
+    # Closes the connection without trying to reconnect
+    def close(self):
+        if self.closing:
+            return
+
+        self.closing = True
+        self.reconnectTimer.stop()
+        self.websocket.close(QWebSocketProtocol.CloseCode.CloseCodeNormal)
+        print("Closing connection")
+
+    # ****************************** CONNECTION EVENTS ******************************
+    # Runs once there's an established connection with the WebSocket server
+    def on_connected(self):
+        print("Connected to server")
+
+        # Let the UI know that a connection has been made
+        if self.connectionOpened():
+            self.connected.emit()
+        else:
+            self.reconnected.emit()
+
+    # Tries to reconnect after a short, random delay whenever the connection drops
+    def on_disconnected(self):
+        self.status = False
+        if self.closing or self.reconnectTimer.isActive():
+            return
+
+        delay = self.reconnectDelay()
+        print(f"Connection lost, reconnecting in {delay} ms")
+        self.reconnectTimer.start(delay)
+        self.connectionLost.emit(delay)
+
+    def reconnect(self):
+        self.websocket.open(self.url)
+
+    def on_error(self, error_code):
+        print(f"Error: {error_code}")
+
+        # Failed connection attempts don't always emit the disconnected signal
+        if not self.status:
+            self.on_disconnected()
+
+    # ****************************** MESSAGES ******************************
+    def sendText(self, message):
+        self.websocket.sendTextMessage(message)
+
+    def sendBinary(self, message):
+        self.websocket.sendBinaryMessage(message)
@@ -0,0 +1,419 @@
+import uuid
+
+from backend.board_graph import BoardGraph
+from backend.board_mirror import pieceKey
+from backend.boards import BOARDS, serializeAdjacency
+from backend.game_stage import GameStage
+from backend.topology_cache import topologyHash
+
+
+# In-process version of the shax server's game logic
+# Takes in the same messages as the websocket server and returns the same responses
+# so local games can run without any network round-trips
+class ShaxEngine:
+    def __init__(self, minPieces, maxPieces, gameType=1) -> None:
+        # ********************** SETTING VALUES ******************************
+        # Total number of players
+        self.TOTAL_PLAYERS = 2
+
+        # Maximum number of pieces each player can have
+        self.MAX_PIECES = maxPieces
+
+        # Minimum number of pieces a player can have or its game over
+        self.MIN_PIECES = minPieces
+
+        # How far the pieces' ID needs to bit shifted to the left to store the player ID with it
+        self.ID_SHIFT = 2
+
+        # ********************** BOARD LAYOUT ********************************
+        self.gameType = gameType
+        self.adjacentPieces = BOARDS[gameType]
+        self.adjacentPieces_raw = serializeAdjacency(self.adjacentPieces)
+        self.topologyHash = topologyHash(self.adjacentPieces_raw)
+
+        # Nodes are referred to by their ID in the board's graph
+        self.graph = BoardGraph.fromAdjacency(self.adjacentPieces)
+
+        # Lookup of all the lines passing through each node
+        self.lines = self.graph.lines.tolist()
+        self.linesThrough = [[self.lines[lineId] for lineId in lineIds] for lineIds in self.graph.linesThrough()]
+
+        self.reset()
+
+    # Clears the board and all the game variables
+    def reset(self):
+        # Tracks what stage the game is currently in
+        self.gameState = GameStage.STOPPED
+
+        # Represents whose turn it is
+        self.current_turn = 0
+
+        # Maps the ID of each occupied node to the ID of the piece on it and vice versa
+        self.board = {}
+        self.pieces = {}
+
+        # Checksum of the pieces on the board, sent with every change so clients can check their copy of it
+        self.checksum = 0
+
+        # Number of pieces each player has placed and still has on the board
+        self.placed = [0] * self.TOTAL_PLAYERS
+        self.total_pieces = [0] * self.TOTAL_PLAYERS
+
+        # Tracks the ID of the player who first made a jare in the placement stage
+        # Determines which player goes first in the "first_removal" stage
+        self.firstToJare = None
+
+        # Array containing the total number of "jare" each player has made
+        self.currentJare = [0] * self.TOTAL_PLAYERS
+
+        # Pieces each player still has to remove in the "first_removal" stage
+        self.removalsLeft = [0] * self.TOTAL_PLAYERS
+        self.firstRemover = None
+
+        # ID of the player who won the last game
+        self.winner = None
+
+        self.player_tokens = [None] * self.TOTAL_PLAYERS
+
+    # ****************************** MESSAGE HANDLING ******************************
+    # Evaluates a message in the websocket server's format
+    # Returns the response the server would have sent back
+    def handleMessage(self, message: dict) -> dict:
+        action = message.get("action")
+
+        if action == "join_game":
+            response = self.joinGame_Response(message)
+        elif action == "place_piece":
+            response = self.placePiece_Response(message)
+        elif action == "remove_piece":
+            response = self.removePiece_Response(message)
+        elif action == "move_piece":
+            response = self.movePiece_Response(message)
+        elif action == "end":
+            response = self.end_Response()
+        elif action == "resync":
+            response = self.resync_Response(message)
+        elif action == "spectate":
+            response = self.spectate_Response(message)
+        else:
+            response = {"action": action, "success": False, "error": "Unknown action."}
+
+        # Echo the sequence number so the client can match the response to its request
+        if "seq" in message:
+            response["seq"] = message["seq"]
+
+        return response
+
+    def joinGame_Response(self, message):
+        self.reset()
+        self.gameState = GameStage.PLACEMENT
+        self.player_tokens = [uuid.uuid4().hex for _ in range(self.TOTAL_PLAYERS)]
+
+        response = {"action": "join_game",
+                    "success": True,
+                    "error": "",
+                    "waiting": False,
+                    "player_num": 0,
+                    "player1_key": self.player_tokens[0],
+                    "player2_key": self.player_tokens[1],
+                    "next_state": self.gameState.name,
+                    "next_player": self.current_turn,
+                    "topology_hash": self.topologyHash}
+
+        # Only send the board layout if the client doesn't have it already
+        if message.get("topology_hash") != self.topologyHash:
+            response["adjacent_pieces"] = self.adjacentPieces_raw
+
+        return response
+
+    def placePiece_Response(self, message):
+        error = self.checkPlayer(message)
+        if not error:
+            node = self.graph.nodeId(int(message["x"]), int(message["y"]))
+            error = self.place(node)
+
+        if error:
+            return self.errorResponse("place_piece", error)
+
+        ID = self.board[node]
+        x, y = self.graph.node(node)
+        return {"action": "place_piece",
+                "success": True,
+                "next_state": self.gameState.name,
+                "next_player": self.current_turn,
+                "new_piece_ID": ID,
+                "new_x": x,
+                "new_y": y,
+                "board_hash": self.boardHash()}
+
+    def removePiece_Response(self, message):
+        error = self.checkPlayer(message)
+        if not error:
+            ID = message["piece_ID"]
+            error = self.remove(ID)
+
+        if error:
+            return self.errorResponse("remove_piece", error)
+
+        response = {"action": "remove_piece",
+                    "success": True,
+                    "next_state": self.gameState.name,
+                    "next_player": self.current_turn,
+                    "removed_piece": ID,
+                    "active_pieces": self.activePieces(),
+                    "board_hash": self.boardHash()}
+        return self.addGameOver(response)
+
+    def movePiece_Response(self, message):
+        error = self.checkPlayer(message)
+        if not error:
+            ID = message["piece_ID"]
+            node = self.graph.nodeId(int(message["new_x"]), int(message["new_y"]))
+            error = self.move(ID, node)
+
+        if error:
+            response = self.errorResponse("move_piece", error)
+
+            # Lets the client put the rejected piece back where it was
+            if "piece_ID" in message:
+                response["moved_piece"] = message["piece_ID"]
+            return response
+
+        x, y = self.graph.node(node)
+        response = {"action": "move_piece",
+                    "success": True,
+                    "next_state": self.gameState.name,
+                    "next_player": self.current_turn,
+                    "moved_piece": ID,
+                    "new_x": x,
+                    "new_y": y,
+                    "active_pieces": self.activePieces(),
+                    "board_hash": self.boardHash()}
+        return self.addGameOver(response)
+
+    def end_Response(self):
+        self.reset()
+        return {"action": "end",
+                "success": True,
+                "msg": "The game has been ended.",
+                "won": False}
+
+    # Sends back the whole state of the game to a player who lost their connection
+    def resync_Response(self, message):
+        if message.get("player_key") not in self.player_tokens:
+            return self.errorResponse("resync", "You aren't part of this game.")
+
+        return self.boardResponse("resync")
+
+    # Lets anyone who knows one of the player keys watch the game
+    # Sends the board layout along with the pieces since the spectator may not have seen the board yet
+    def spectate_Response(self, message):
+        if message.get("player_key") not in self.player_tokens:
+            return self.errorResponse("spectate", "That game doesn't exist.")
+
+        response = self.boardResponse("spectate")
+        response["topology_hash"] = self.topologyHash
+        if message.get("topology_hash") != self.topologyHash:
+            response["adjacent_pieces"] = self.adjacentPieces_raw
+
+        return response
+
+    # Builds a response with the full state of the board
+    def boardResponse(self, action):
+        response = {"action": action,
+                    "success": True,
+                    "next_state": self.gameState.name,
+                    "next_player": self.current_turn,
+                    "pieces": [[ID, *self.graph.node(node)] for ID, node in self.pieces.items()],
+                    "active_pieces": self.activePieces(),
+                    "board_hash": self.boardHash()}
+        return self.addGameOver(response)
+
+    # Builds the response for a rejected move
+    def errorResponse(self, action, error):
+        return {"action": action,
+                "success": False,
+                "error": error,
+                "next_state": self.gameState.name,
+                "next_player": self.current_turn}
+
+    # Gets the checksum of the board as a hex string
+    def boardHash(self):
+        return f"{self.checksum:016x}"
+
+    # Adds the game over fields to a response if the last move ended the game
+    def addGameOver(self, response):
+        if self.winner is not None:
+            response["game_over"] = True
+            response["winner"] = self.winner
+        return response
+
+    # Checks that the message was sent by the player whose turn it is
+    def checkPlayer(self, message):
+        if message.get("player_key") != self.player_tokens[self.current_turn]:
+            return "It isn't your turn."
+        return ""
+
+    # ****************************** GAME RULES ******************************
+    # Gets the ID of the player who owns a game piece
+    def owner(self, ID):
+        return ID & (2**self.ID_SHIFT - 1)
+
+    # Counts the number of jare the player has through the given node
+    def countJare(self, node, player):
+        return sum(all(piece in self.board and self.owner(self.board[piece]) == player
+                       for piece in line)
+                   for line in self.linesThrough[node])
+
+    # Gets all the empty nodes next to the given node
+    def emptyNeighbours(self, node):
+        return [piece for piece in self.graph.neighbours(node).tolist() if piece not in self.board]
+
+    # Gets the IDs of all the pieces the current player can move
+    def activePieces(self):
+        if self.gameState != GameStage.MOVEMENT:
+            return []
+
+        return [ID for ID, node in self.pieces.items()
+                if self.owner(ID) == self.current_turn and self.emptyNeighbours(node)]
+
+    # Gets every legal action of the current player
+    # Each action is a tuple of the action name followed by its arguments
+    # Nodes are given as board coordinates like in the websocket messages
+    def legalActions(self):
+        player = self.current_turn
+
+        if self.gameState == GameStage.PLACEMENT:
+            return [("place_piece", self.graph.node(node)) for node in range(len(self.graph))
+                    if node not in self.board]
+
+        elif self.gameState in (GameStage.FIRST_REMOVAL, GameStage.REMOVAL):
+            return [("remove_piece", ID) for ID in self.pieces if self.owner(ID) != player]
+
+        elif self.gameState == GameStage.MOVEMENT:
+            return [("move_piece", ID, self.graph.node(node))
+                    for ID, start in self.pieces.items() if self.owner(ID) == player
+                    for node in self.emptyNeighbours(start)]
+
+        return []
+
+    # Places a new piece for the current player
+    # Returns an error message if the placement isn't allowed
+    def place(self, node):
+        player = self.current_turn
+
+        if self.gameState != GameStage.PLACEMENT:
+            return "Pieces can only be placed in the placement stage."
+        if node < 0:
+            return "There is no node at that position."
+        if node in self.board:
+            return "That node is already taken."
+
+        ID = (self.placed[player] << self.ID_SHIFT) | player
+        self.board[node] = ID
+        self.pieces[ID] = node
+        self.checksum ^= pieceKey(*self.graph.node(node), ID)
+        self.placed[player] += 1
+        self.total_pieces[player] += 1
+
+        # Jare made during placement only decide who removes first
+        jare = self.countJare(node, player)
+        if jare:
+            self.currentJare[player] += jare
+            if self.firstToJare is None:
+                self.firstToJare = player
+
+        # Move on once every piece has been placed or the board is full
+        if all(placed >= self.MAX_PIECES for placed in self.placed) or \
+                len(self.board) == len(self.graph):
+            self.startFirstRemoval()
+        else:
+            self.current_turn = (player + 1) % self.TOTAL_PLAYERS
+
+        return ""
+
+    # Every player removes one piece for each jare they made during placement
+    # The first player to make a jare removes first
+    # If nobody made a jare, the second player starts and everyone removes one piece
+    def startFirstRemoval(self):
+        self.gameState = GameStage.FIRST_REMOVAL
+        self.removalsLeft = [max(1, jare) for jare in self.currentJare]
+        self.firstRemover = self.firstToJare if self.firstToJare is not None else 1
+        self.current_turn = self.firstRemover
+
+    # Removes one of the opponent's pieces
+    # Returns an error message if the removal isn't allowed
+    def remove(self, ID):
+        player = self.current_turn
+
+        if self.gameState not in (GameStage.FIRST_REMOVAL, GameStage.REMOVAL):
+            return "Pieces can only be removed in the removal stages."
+        if ID not in self.pieces:
+            return "That piece doesn't exist."
+        if self.owner(ID) == player:
+            return "You can't remove your own piece."
+
+        opponent = self.owner(ID)
+        node = self.pieces.pop(ID)
+        del self.board[node]
+        self.checksum ^= pieceKey(*self.graph.node(node), ID)
+        self.total_pieces[opponent] -= 1
+
+        # Check if the opponent has run out of pieces
+        if self.total_pieces[opponent] < self.MIN_PIECES:
+            self.endGame(player)
+            return ""
+
+        if self.gameState == GameStage.FIRST_REMOVAL:
+            self.removalsLeft[player] -= 1
+
+            if self.removalsLeft[player] > 0:
+                return ""
+            elif self.removalsLeft[opponent] > 0:
+                self.current_turn = opponent
+                return ""
+
+            self.startMovement(self.firstRemover)
+        else:
+            self.startMovement(opponent)
+
+        return ""
+
+    # Moves one of the current player's pieces to an adjacent empty node
+    # Returns an error message if the move isn't allowed
+    def move(self, ID, node):
+        player = self.current_turn
+
+        if self.gameState != GameStage.MOVEMENT:
+            return "Pieces can only be moved in the movement stage."
+        if ID not in self.pieces or self.owner(ID) != player:
+            return "You can only move your own pieces."
+        if node not in self.emptyNeighbours(self.pieces[ID]):
+            return "Pieces can only be moved to an adjacent empty node."
+
+        start = self.pieces[ID]
+        del self.board[start]
+        self.board[node] = ID
+        self.pieces[ID] = node
+        self.checksum ^= pieceKey(*self.graph.node(start), ID) ^ pieceKey(*self.graph.node(node), ID)
+
+        # Making a jare lets the player remove one of the opponent's pieces
+        if self.countJare(node, player):
+            self.gameState = GameStage.REMOVAL
+        else:
+            self.startMovement((player + 1) % self.TOTAL_PLAYERS)
+
+        return ""
+
+    # Gives the turn to the player in the movement stage
+    # The player loses if none of their pieces can move
+    def startMovement(self, player):
+        self.gameState = GameStage.MOVEMENT
+        self.current_turn = player
+
+        if not self.activePieces():
+            self.endGame((player + 1) % self.TOTAL_PLAYERS)
+
+    def endGame(self, winner):
+        self.gameState = GameStage.STOPPED
+        self.winner = winner
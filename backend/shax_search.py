@@ -0,0 +1,524 @@
+import random
+import time
+
+import numpy as np
+
+from backend.bitboards import BoardMasks, nodesOf
+from backend.game_stage import GameStage
+from backend.opening_book import OpeningBook, defaultBookDir
+from backend.tablebase import Tablebase, defaultTablebaseDir
+
+# Scores of won positions, reduced by the number of moves it takes to win
+# so the search prefers the quickest win and the slowest loss
+WIN_SCORE = 100000
+
+# Deepest search ever attempted, most positions run out of time long before this
+MAX_DEPTH = 64
+
+
+# Static layout of a board used by the search
+# Built once from a BoardGraph and shared by every position on that board
+class Topology:
+    def __init__(self, boardGraph) -> None:
+        self.size = len(boardGraph)
+        self.masks = BoardMasks(boardGraph)
+
+        # Random keys for Zobrist hashing
+        # The same seed is used everywhere so every process agrees on the hash of a position
+        rng = random.Random(0x5AAC)
+        self.pieceKeys = [[rng.getrandbits(64) for _ in range(2)] for _ in range(self.size)]
+        self.stageKeys = {stage: rng.getrandbits(64) for stage in GameStage}
+        self.turnKeys = [rng.getrandbits(64) for _ in range(2)]
+        self.counterKeys = [[[rng.getrandbits(64) for _ in range(MAX_DEPTH)] for _ in range(2)] for _ in range(3)]
+        self.firstToJareKeys = {None: 0, 0: rng.getrandbits(64), 1: rng.getrandbits(64)}
+
+        # Identifies the layout so searches on different boards don't share their results
+        self.signature = hash((self.size, tuple(self.masks.lineBits)))
+
+
+# Lightweight copy of a game's state that the search can play moves on
+# Follows the same rules as the ShaxEngine, but refers to pieces by the node they're on
+# Each player's pieces are stored as a bitboard
+# Moves are tuples: ("place", node), ("remove", node) or ("move", start, end)
+class Position:
+    def __init__(self, topology, minPieces, maxPieces) -> None:
+        self.topology = topology
+        self.MIN_PIECES = minPieces
+        self.MAX_PIECES = maxPieces
+
+        # Nodes taken by each player's pieces
+        self.bitboards = [0, 0]
+
+        self.gameState = GameStage.PLACEMENT
+        self.current_turn = 0
+        self.placed = [0, 0]
+        self.total_pieces = [0, 0]
+        self.currentJare = [0, 0]
+        self.firstToJare = None
+        self.removalsLeft = [0, 0]
+        self.firstRemover = None
+        self.winner = None
+
+        # Zobrist hash of the pieces on the board, updated as pieces are added and removed
+        self.pieceHash = 0
+
+    # Copies the state of a local rules engine
+    @classmethod
+    def fromEngine(cls, engine, topology):
+        position = cls(topology, engine.MIN_PIECES, engine.MAX_PIECES)
+
+        for node, ID in engine.board.items():
+            position.addPiece(node, engine.owner(ID))
+
+        position.gameState = engine.gameState
+        position.current_turn = engine.current_turn
+        position.placed = list(engine.placed)
+        position.total_pieces = list(engine.total_pieces)
+        position.currentJare = list(engine.currentJare)
+        position.firstToJare = engine.firstToJare
+        position.removalsLeft = list(engine.removalsLeft)
+        position.firstRemover = engine.firstRemover
+        position.winner = engine.winner
+        return position
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.__dict__.update(self.__dict__)
+
+        position.bitboards = self.bitboards[:]
+        position.placed = self.placed[:]
+        position.total_pieces = self.total_pieces[:]
+        position.currentJare = self.currentJare[:]
+        position.removalsLeft = self.removalsLeft[:]
+        return position
+
+    # Gets the Zobrist hash of the whole position
+    def key(self):
+        topology = self.topology
+        key = self.pieceHash ^ topology.stageKeys[self.gameState] ^ topology.turnKeys[self.current_turn] ^ \
+            topology.firstToJareKeys[self.firstToJare]
+
+        for counter, values in enumerate((self.placed, self.currentJare, self.removalsLeft)):
+            for player in range(2):
+                key ^= topology.counterKeys[counter][player][min(values[player], MAX_DEPTH - 1)]
+
+        return key
+
+    # Gets the player whose piece is on the node, or -1 if the node is empty
+    def owner(self, node):
+        bit = 1 << node
+        if self.bitboards[0] & bit:
+            return 0
+        return 1 if self.bitboards[1] & bit else -1
+
+    def addPiece(self, node, player):
+        self.bitboards[player] |= 1 << node
+        self.pieceHash ^= self.topology.pieceKeys[node][player]
+
+    def removePiece(self, node, player):
+        self.bitboards[player] &= ~(1 << node)
+        self.pieceHash ^= self.topology.pieceKeys[node][player]
+
+    # ****************************** GAME RULES ******************************
+    # Gets every legal move of the current player
+    def legalMoves(self):
+        own = self.bitboards[self.current_turn]
+        opp = self.bitboards[1 - self.current_turn]
+
+        if self.gameState == GameStage.PLACEMENT:
+            return [("place", node) for node in nodesOf(self.topology.masks.full & ~(own | opp))]
+
+        elif self.gameState in (GameStage.FIRST_REMOVAL, GameStage.REMOVAL):
+            return [("remove", node) for node in nodesOf(opp)]
+
+        elif self.gameState == GameStage.MOVEMENT:
+            return [("move", node, end) for node, targets in self.topology.masks.moveTargets(own, opp).items()
+                    for end in nodesOf(targets)]
+
+        return []
+
+    # Gets the position after the current player makes the move
+    def play(self, move):
+        position = self.copy()
+
+        if move[0] == "place":
+            position.place(move[1])
+        elif move[0] == "remove":
+            position.remove(move[1])
+        else:
+            position.move(move[1], move[2])
+
+        return position
+
+    def place(self, node):
+        player = self.current_turn
+
+        self.addPiece(node, player)
+        self.placed[player] += 1
+        self.total_pieces[player] += 1
+
+        # Jare made during placement only decide who removes first
+        jare = self.topology.masks.countJare(self.bitboards[player], node)
+        if jare:
+            self.currentJare[player] += jare
+            if self.firstToJare is None:
+                self.firstToJare = player
+
+        if all(placed >= self.MAX_PIECES for placed in self.placed) or \
+                self.bitboards[0] | self.bitboards[1] == self.topology.masks.full:
+            self.gameState = GameStage.FIRST_REMOVAL
+            self.removalsLeft = [max(1, jare) for jare in self.currentJare]
+            self.firstRemover = self.firstToJare if self.firstToJare is not None else 1
+            self.current_turn = self.firstRemover
+        else:
+            self.current_turn = 1 - player
+
+    def remove(self, node):
+        player = self.current_turn
+        opponent = 1 - player
+
+        self.removePiece(node, opponent)
+        self.total_pieces[opponent] -= 1
+
+        if self.total_pieces[opponent] < self.MIN_PIECES:
+            self.endGame(player)
+            return
+
+        if self.gameState == GameStage.FIRST_REMOVAL:
+            self.removalsLeft[player] -= 1
+
+            if self.removalsLeft[player] > 0:
+                return
+            elif self.removalsLeft[opponent] > 0:
+                self.current_turn = opponent
+                return
+
+            self.startMovement(self.firstRemover)
+        else:
+            self.startMovement(opponent)
+
+    def move(self, start, end):
+        player = self.current_turn
+
+        self.removePiece(start, player)
+        self.addPiece(end, player)
+
+        # Making a jare lets the player remove one of the opponent's pieces
+        if self.topology.masks.countJare(self.bitboards[player], end):
+            self.gameState = GameStage.REMOVAL
+        else:
+            self.startMovement(1 - player)
+
+    def startMovement(self, player):
+        self.gameState = GameStage.MOVEMENT
+        self.current_turn = player
+
+        if not self.topology.masks.canMove(self.bitboards[player], self.bitboards[1 - player]):
+            self.endGame(1 - player)
+
+    def endGame(self, winner):
+        self.gameState = GameStage.STOPPED
+        self.winner = winner
+
+    # ****************************** EVALUATION ******************************
+    # Scores the position from the point of view of the player whose turn it is
+    # Must give the same scores as PositionBatch.evaluate()
+    def evaluate(self):
+        masks = self.topology.masks
+        player = self.current_turn
+        opponent = 1 - player
+        own = self.bitboards[player]
+        opp = self.bitboards[opponent]
+
+        score = 100 * (self.total_pieces[player] - self.total_pieces[opponent])
+
+        # Jare made during placement turn into removals
+        if self.gameState == GameStage.PLACEMENT:
+            score += 60 * (self.currentJare[player] - self.currentJare[opponent])
+        elif self.gameState == GameStage.FIRST_REMOVAL:
+            score += 100 * (self.removalsLeft[player] - self.removalsLeft[opponent])
+        elif self.gameState == GameStage.REMOVAL:
+            score += 100
+
+        # Lines that are one piece away from a jare
+        score += 10 * (masks.countThreats(own, opp) - masks.countThreats(opp, own))
+
+        # Pieces that can't move are close to losing the game in the movement stage
+        if self.gameState == GameStage.MOVEMENT:
+            score += 2 * (masks.mobility(own, opp) - masks.mobility(opp, own))
+
+        return score
+
+
+# Positions on the same board packed into arrays for the batch functions of BoardMasks
+# Every array is ordered from the point of view of the player whose turn it is
+class PositionBatch:
+    def __init__(self, positions) -> None:
+        self.masks = positions[0].topology.masks
+
+        turns = np.array([position.current_turn for position in positions])
+        rows = np.arange(len(positions))
+
+        bitboards = np.array([position.bitboards for position in positions], np.uint64)
+        self.own = bitboards[rows, turns]
+        self.opp = bitboards[rows, 1 - turns]
+
+        def difference(values):
+            values = np.array(values, np.int64).reshape(-1, 2)
+            return values[rows, turns] - values[rows, 1 - turns]
+
+        self.stages = np.array([position.gameState.value for position in positions])
+        self.pieceDifference = difference([position.total_pieces for position in positions])
+        self.jareDifference = difference([position.currentJare for position in positions])
+        self.removalsDifference = difference([position.removalsLeft for position in positions])
+
+    def __len__(self):
+        return len(self.own)
+
+    # Counts the legal moves of each position
+    def moveCounts(self):
+        return self.masks.batchMoveCounts(self.own, self.opp, self.stages)
+
+    # Scores every position the same way as Position.evaluate()
+    def evaluate(self):
+        masks = self.masks
+        stages = self.stages
+
+        score = 100 * self.pieceDifference
+        score += np.where(stages == GameStage.PLACEMENT.value, 60 * self.jareDifference, 0)
+        score += np.where(stages == GameStage.FIRST_REMOVAL.value, 100 * self.removalsDifference, 0)
+        score += np.where(stages == GameStage.REMOVAL.value, 100, 0)
+
+        score += 10 * (masks.batchThreats(self.own, self.opp) - masks.batchThreats(self.opp, self.own))
+
+        movement = stages == GameStage.MOVEMENT.value
+        if movement.any():
+            mobility = masks.batchMobility(self.own, self.opp) - masks.batchMobility(self.opp, self.own)
+            score += np.where(movement, 2 * mobility, 0)
+
+        return score
+
+
+# Scores many positions on the same board at once
+# Gives the same scores as Position.evaluate(), as a NumPy array
+def evaluatePositions(positions):
+    return PositionBatch(positions).evaluate()
+
+
+# ****************************** TRANSPOSITION TABLE ******************************
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+# Fixed size table of searched positions indexed by their Zobrist hash
+# A slot is only overwritten by a different position or a deeper search of the same one
+class TranspositionTable:
+    def __init__(self, bits=18) -> None:
+        self.mask = (1 << bits) - 1
+        self.entries = [None] * (1 << bits)
+
+    def get(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] != key or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move)
+
+    def clear(self):
+        self.entries = [None] * len(self.entries)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+# Iterative deepening alpha-beta search
+# Players can move several times in a row (removals after a jare), so the score is only
+# negated when the turn passes to the other player
+class Searcher:
+    def __init__(self, ttBits=18, tablebase=None) -> None:
+        self.table = TranspositionTable(ttBits)
+
+        # Endgame tables giving the exact result of positions with few pieces left
+        self.tablebase = tablebase
+
+        # How often each move caused a cutoff, used to order the moves
+        self.history = {}
+
+        self.deadline = 0
+        self.nodes = 0
+
+    # Finds the best move within the time budget in seconds
+    # Returns the move, its score, the depth that was completed and the number of positions searched
+    def search(self, position, budget, maxDepth=MAX_DEPTH):
+        self.deadline = time.perf_counter() + budget
+        self.nodes = 0
+        self.history = {}
+
+        moves = position.legalMoves()
+        if not moves:
+            return None, 0, 0, 0
+
+        bestMove, bestScore, completedDepth = moves[0], 0, 0
+        for depth in range(1, maxDepth + 1):
+            try:
+                bestScore, bestMove = self.root(position, moves, depth)
+            except SearchTimeout:
+                break
+
+            completedDepth = depth
+
+            # Stop early once the outcome of the game is known
+            if abs(bestScore) >= WIN_SCORE - MAX_DEPTH or len(moves) == 1:
+                break
+
+        return bestMove, bestScore, completedDepth, self.nodes
+
+    def root(self, position, moves, depth):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        bestMove = None
+
+        for move in self.orderMoves(position, moves, self.ttMove(position)):
+            score = self.child(position.play(move), position.current_turn, depth - 1, alpha, beta, 1)
+            if bestMove is None or score > alpha:
+                alpha = score
+                bestMove = move
+
+        self.table.put(position.key(), depth, alpha, EXACT, bestMove)
+        return alpha, bestMove
+
+    # Searches a child position and gets its score from the parent player's point of view
+    def child(self, position, player, depth, alpha, beta, ply):
+        if position.current_turn == player:
+            return self.negamax(position, depth, alpha, beta, ply)
+        return -self.negamax(position, depth, -beta, -alpha, ply)
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if position.winner is not None:
+            score = WIN_SCORE - ply
+            return score if position.winner == position.current_turn else -score
+
+        if self.tablebase is not None:
+            result = self.tablebase.probe(position)
+            if result is not None:
+                outcome, turns = result
+                return outcome * (WIN_SCORE - ply - turns)
+
+        if depth <= 0:
+            return position.evaluate()
+
+        key = position.key()
+        entry = self.table.get(key)
+        ttMove = None
+        if entry is not None:
+            ttMove = entry[4]
+            if entry[1] >= depth:
+                score, flag = entry[2], entry[3]
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        moves = position.legalMoves()
+        if not moves:
+            return position.evaluate()
+
+        originalAlpha = alpha
+        bestScore = -WIN_SCORE - 1
+        bestMove = None
+        for move in self.orderMoves(position, moves, ttMove):
+            score = self.child(position.play(move), position.current_turn, depth - 1, alpha, beta, ply + 1)
+
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        if bestScore <= originalAlpha:
+            flag = UPPER_BOUND
+        elif bestScore >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.put(key, depth, bestScore, flag, bestMove)
+
+        return bestScore
+
+    # Gets the best move found for the position by an earlier search
+    def ttMove(self, position):
+        entry = self.table.get(position.key())
+        return entry[4] if entry is not None else None
+
+    # Sorts the moves so the ones most likely to be best are searched first
+    # The best move from the transposition table goes first, then moves that make or
+    # block a jare, then moves that caused cutoffs elsewhere in the search
+    def orderMoves(self, position, moves, ttMove):
+        masks = position.topology.masks
+        own = position.bitboards[position.current_turn]
+        opp = position.bitboards[1 - position.current_turn]
+
+        def priority(move):
+            if move == ttMove:
+                return 1 << 30
+
+            score = self.history.get(move, 0)
+            if move[0] == "place":
+                score += 1000 * masks.countJare(own | 1 << move[1], move[1])
+                score += 500 * masks.countJare(opp | 1 << move[1], move[1])
+            elif move[0] == "move":
+                score += 1000 * masks.countJare(own & ~(1 << move[1]) | 1 << move[2], move[2])
+            else:
+                # Break up the opponent's lines before they're finished
+                score += 200 * sum((opp & line).bit_count() >= 2 for line in masks.linesThroughBits[move[1]])
+            return score
+
+        return sorted(moves, key=priority, reverse=True)
+
+
+# Searcher kept alive between moves so the transposition table can be reused
+# Each worker process has its own
+searcher = None
+searcherRules = None
+
+# Opening book for the same rules as the searcher, None if there isn't one
+book = None
+
+
+# Picks a move for the current player of the position
+# Runs in a worker process, so everything it takes and returns can be pickled
+def chooseMove(position, budget):
+    global searcher, searcherRules, book
+
+    # Start over when the board or the rules change
+    rules = (position.topology.signature, position.MIN_PIECES, position.MAX_PIECES)
+    if searcher is None or rules != searcherRules:
+        masks = position.topology.masks
+        searcher = Searcher(tablebase=Tablebase(defaultTablebaseDir(), masks, position.MIN_PIECES))
+        book = OpeningBook.find(defaultBookDir(), masks, position.MIN_PIECES, position.MAX_PIECES)
+        searcherRules = rules
+
+    # Opening moves the book knows well enough don't need to be searched
+    if book is not None and position.gameState == GameStage.PLACEMENT:
+        move = book.bestMove(position)
+        if move is not None:
+            return move, 0, 0, 0
+
+    return searcher.search(position, budget)
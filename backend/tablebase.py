@@ -0,0 +1,442 @@
+import argparse
+import hashlib
+import itertools
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+
+import numpy as np
+
+from backend.board_graph import BoardGraph
+from backend.boards import BOARDS
+from backend.bitboards import BoardMasks, nodesOf
+from backend.game_stage import GameStage
+
+# Endgame tablebases for the movement stage
+# A table holds every position where the player to move has 'a' pieces and the other player has 'b'
+# Each position gets one byte: the number of turns left with perfect play, or DRAW if neither player
+# can force a win. The player to move wins when the number is odd and loses when it's even
+# A turn is a move plus the removal that follows it when the move makes a jare
+DRAW = 255
+
+# Longest result that can be stored, anything longer is stored as a draw
+MAX_TURNS = 254
+
+# Value of the positions that haven't been solved yet while generating
+UNKNOWN = -1
+
+MAGIC = b"SHXT"
+VERSION = 1
+
+# Magic, version, number of nodes, min pieces, pieces of the player to move, pieces of the other player,
+# layout digest, number of positions
+HEADER = struct.Struct("<4sBBBBB3x20sQ")
+
+
+# Gets a digest identifying the board layout of the bitboard masks
+# Tables can only be used on the layout they were generated for
+def layoutDigest(masks):
+    layout = np.array([masks.size] + masks.neighbourBits + masks.lineBits, np.uint64)
+    return hashlib.sha1(layout.tobytes()).hexdigest()
+
+
+# Gets the default folder the tables are stored in
+def defaultTablebaseDir():
+    dataHome = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+    return os.path.join(dataHome, "qt-shax", "tablebases")
+
+
+def tableName(minPieces, a, b):
+    return f"{minPieces}-{a}v{b}.shxt"
+
+
+# ****************************** INDEXING ******************************
+# Positions are numbered by ranking the nodes of the player to move among all the nodes, then the
+# nodes of the other player among the nodes that are left, so a table has no gaps or duplicates
+# Sets of nodes are ranked in colexicographic order: rank = sum(C(node_j, j + 1)) over the sorted nodes
+class TableIndex:
+    def __init__(self, size, a, b) -> None:
+        self.size = size
+        self.a = a
+        self.b = b
+
+        # Number of ways to place the other player's pieces for each placement of the player to move
+        self.stride = comb(size - a, b)
+        self.count = comb(size, a) * self.stride
+
+    # Gets the index of a position given the sorted nodes of each player
+    def index(self, own, opp):
+        ownRank = sum(comb(node, j + 1) for j, node in enumerate(own))
+        oppRank = sum(comb(node - sum(o < node for o in own), j + 1) for j, node in enumerate(opp))
+        return ownRank * self.stride + oppRank
+
+
+# Ranks sets of nodes given as an (M, k) array of sorted nodes
+def batchRank(nodes, binomials):
+    rank = np.zeros(len(nodes), np.int64)
+    for j in range(nodes.shape[1]):
+        rank += binomials[nodes[:, j], j + 1]
+    return rank
+
+
+# Gets the index of many positions in the table of their material
+def batchIndex(own, opp, size, binomials):
+    # Number the other player's nodes as if the player to move's nodes weren't on the board
+    compressed = opp - (own[:, None, :] < opp[:, :, None]).sum(axis=2)
+    stride = int(binomials[size - own.shape[1], opp.shape[1]])
+    return batchRank(own, binomials) * stride + batchRank(compressed, binomials)
+
+
+# Gets every set of k nodes out of n in the order of their rank
+def rankedCombinations(n, k):
+    combinations = np.array(list(itertools.combinations(range(n), k)), np.int64).reshape(-1, k)
+    ranks = sum(np.vectorize(comb)(combinations[:, j], j + 1) for j in range(k)) if k else np.zeros(1, np.int64)
+    return combinations[np.argsort(ranks)]
+
+
+# ****************************** LOOKUPS ******************************
+# A table opened from disk
+# The file is memory-mapped, so a lookup only reads the page holding the position
+class Table:
+    def __init__(self, path) -> None:
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, size, self.MIN_PIECES, a, b, digest, count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION or len(self.buffer) != HEADER.size + count:
+            raise ValueError(f"{path} isn't a complete tablebase.")
+
+        self.digest = digest.hex()
+        self.layout = TableIndex(size, a, b)
+        self.values = np.frombuffer(self.buffer, np.uint8, count, HEADER.size)
+
+    def __len__(self):
+        return len(self.values)
+
+    # Gets the value of the position given the sorted nodes of each player
+    def value(self, own, opp):
+        return int(self.values[self.layout.index(own, opp)])
+
+
+# Tables of one board layout and minimum number of pieces
+# Tables are opened the first time they're needed, and missing tables are remembered so
+# positions with more pieces than were generated cost almost nothing to look up
+class Tablebase:
+    def __init__(self, directory, masks, minPieces) -> None:
+        self.masks = masks
+        self.MIN_PIECES = minPieces
+        self.directory = os.path.join(directory, layoutDigest(masks))
+
+        # Opened tables keyed by their material, None for the ones that don't exist
+        self.tables = {}
+
+    def table(self, a, b):
+        if (a, b) not in self.tables:
+            path = os.path.join(self.directory, tableName(self.MIN_PIECES, a, b))
+            try:
+                self.tables[(a, b)] = Table(path)
+            except (OSError, ValueError):
+                self.tables[(a, b)] = None
+
+        return self.tables[(a, b)]
+
+    # Gets the value of a movement stage position from the bitboards of the player to move and the other player
+    # Returns None if the material isn't covered
+    def value(self, own, opp):
+        table = self.table(own.bit_count(), opp.bit_count())
+        if table is None:
+            return None
+
+        return table.value(list(nodesOf(own)), list(nodesOf(opp)))
+
+    # Looks up a search position
+    # Returns (outcome, turns) for the player to move, where the outcome is 1 for a win, -1 for a loss
+    # and 0 for a draw, or None if the position isn't in the tablebase
+    def probe(self, position):
+        own = position.bitboards[position.current_turn]
+        opp = position.bitboards[1 - position.current_turn]
+
+        if position.gameState == GameStage.MOVEMENT:
+            value = self.value(own, opp)
+            if value is None:
+                return None
+            return outcomeOf(value)
+
+        # After making a jare the player picks the removal with the best result
+        elif position.gameState == GameStage.REMOVAL:
+            if opp.bit_count() - 1 < self.MIN_PIECES:
+                return 1, 1
+
+            results = []
+            for node in nodesOf(opp):
+                value = self.value(opp & ~(1 << node), own)
+                if value is None:
+                    return None
+                results.append(outcomeOf(value))
+
+            return bestResult(results)
+
+        return None
+
+
+# Converts a stored value to (outcome, turns) for the player to move
+def outcomeOf(value):
+    if value == DRAW:
+        return 0, 0
+    return (1 if value % 2 else -1), value
+
+
+# Picks the best result for the player to move from the results of the positions it can move to
+# The other player is to move in those, so their wins are losses for the player to move
+def bestResult(results):
+    wins = [turns for outcome, turns in results if outcome < 0]
+    if wins:
+        return 1, min(wins) + 1
+    if any(outcome == 0 for outcome, _ in results):
+        return 0, 0
+    return -1, max(turns for _, turns in results) + 1
+
+
+# ****************************** GENERATION ******************************
+# Retrograde solver for the tables of one board layout
+# Positions are stored as arrays of sorted nodes so move generation and indexing are vectorized
+class TablebaseGenerator:
+    def __init__(self, masks, minPieces, directory) -> None:
+        self.masks = masks
+        self.size = masks.size
+        self.MIN_PIECES = minPieces
+        self.directory = os.path.join(directory, layoutDigest(masks))
+        self.digest = bytes.fromhex(layoutDigest(masks))
+
+        self.binomials = np.array([[comb(n, k) for k in range(self.size + 1)] for n in range(self.size + 1)], np.int64)
+
+        # Neighbours of each node, padded with -1
+        neighbours = [list(nodesOf(bits)) for bits in masks.neighbourBits]
+        self.neighbours = np.full((self.size, max(map(len, neighbours))), -1, np.int64)
+        for node, ends in enumerate(neighbours):
+            self.neighbours[node, :len(ends)] = ends
+
+        # Lines through each node, padded with a mask no set of pieces can fill
+        lines = masks.linesThroughBits
+        self.linesThrough = np.full((self.size, max(map(len, lines))), np.iinfo(np.uint64).max, np.uint64)
+        for node, nodeLines in enumerate(lines):
+            self.linesThrough[node, :len(nodeLines)] = nodeLines
+
+    def path(self, a, b):
+        return os.path.join(self.directory, tableName(self.MIN_PIECES, a, b))
+
+    # Checks if a table has already been generated, so an interrupted run can be resumed
+    def finished(self, a, b):
+        try:
+            Table(self.path(a, b))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    # Gets every position of a table in the order of their index
+    def positions(self, a, b):
+        owns = rankedCombinations(self.size, a)
+        patterns = rankedCombinations(self.size - a, b)
+
+        # Nodes left over for the other player by each placement of the player to move
+        everything = np.arange(self.size)
+        free = np.array([np.setdiff1d(everything, own) for own in owns]).reshape(len(owns), -1)
+
+        own = np.repeat(owns, len(patterns), axis=0)
+        opp = free[:, patterns].reshape(-1, b)
+        return own, opp
+
+    def bitboards(self, nodes):
+        return np.bitwise_or.reduce(np.left_shift(np.uint64(1), nodes.astype(np.uint64)), axis=1)
+
+    # Generates the moves of every position of a table
+    # Returns a list of (child material, parent indices, child indices) for each kind of child position
+    # Moves that win straight away have None as their child material
+    def moves(self, a, b):
+        own, opp = self.positions(a, b)
+        ownBits = self.bitboards(own)
+        occupied = ownBits | self.bitboards(opp)
+
+        edges = {}
+
+        def addEdges(material, parents, children):
+            edges.setdefault(material, ([], []))
+            edges[material][0].append(parents)
+            edges[material][1].append(children)
+
+        for slot in range(a):
+            for column in range(self.neighbours.shape[1]):
+                start = own[:, slot]
+                end = self.neighbours[start, column]
+
+                valid = end >= 0
+                valid[valid] = (occupied[valid] >> end[valid].astype(np.uint64)) & np.uint64(1) == 0
+                parents = np.flatnonzero(valid)
+                if not len(parents):
+                    continue
+
+                end = end[parents]
+                newOwn = own[parents].copy()
+                newOwn[:, slot] = end
+                newOwn.sort(axis=1)
+
+                endBits = np.left_shift(np.uint64(1), end.astype(np.uint64))
+                newOwnBits = ownBits[parents] ^ np.left_shift(np.uint64(1), start[parents].astype(np.uint64)) | endBits
+                lines = self.linesThrough[end]
+                jare = ((newOwnBits[:, None] & lines) == lines).any(axis=1)
+
+                # Moves that don't make a jare pass the turn to the other player
+                quiet = ~jare
+                addEdges((b, a), parents[quiet], batchIndex(opp[parents[quiet]], newOwn[quiet], self.size,
+                                                            self.binomials))
+
+                # Moves that make a jare are followed by one of the removals
+                if not jare.any():
+                    continue
+
+                jareParents = parents[jare]
+                if b - 1 < self.MIN_PIECES:
+                    addEdges(None, jareParents, np.zeros(len(jareParents), np.int64))
+                    continue
+
+                for removed in range(b):
+                    oppLeft = np.delete(opp[jareParents], removed, axis=1)
+                    addEdges((b - 1, a), jareParents, batchIndex(oppLeft, newOwn[jare], self.size, self.binomials))
+
+        return [(material, np.concatenate(parents), np.concatenate(children))
+                for material, (parents, children) in edges.items()]
+
+    # Solves the tables of a and b pieces, and b and a pieces, which lead into each other
+    # Tables with fewer pieces have to be generated first
+    def solve(self, a, b):
+        group = [(a, b)] if a == b else [(a, b), (b, a)]
+
+        values = {}
+        edges = {}
+        childCounts = {}
+        for material in group:
+            edges[material] = self.moves(*material)
+            count = TableIndex(self.size, *material).count
+
+            childCounts[material] = np.zeros(count, np.int64)
+            for _, parents, _ in edges[material]:
+                childCounts[material] += np.bincount(parents, minlength=count)
+
+            # Players that can't move lose straight away
+            values[material] = np.where(childCounts[material] == 0, 0, UNKNOWN).astype(np.int16)
+
+        # Values of the smaller tables the moves lead into
+        known = {}
+        longest = 0
+        for material in group:
+            for child, _, _ in edges[material]:
+                if child is not None and child not in group and child not in known:
+                    known[child] = np.asarray(Table(self.path(*child)).values, np.int16)
+                    solved = known[child][known[child] != DRAW]
+                    longest = max(longest, int(solved.max()) if len(solved) else 0)
+
+        def childValues(child, children):
+            if child is None:
+                return np.zeros(len(children), np.int16)
+            table = values[child] if child in group else known[child]
+            return table[children]
+
+        # A position is won in n turns if one of its moves leads to a position lost in n - 1 turns,
+        # and lost in n turns once all of its moves lead to positions won in at most n - 1 turns
+        lastChange = 0
+        turns = 0
+        while turns < MAX_TURNS and (turns <= longest + 1 or turns - lastChange <= 2):
+            turns += 1
+            updates = {}
+
+            for material in group:
+                unsolved = values[material] == UNKNOWN
+                count = len(unsolved)
+
+                if turns % 2:
+                    solved = np.zeros(count, bool)
+                    for child, parents, children in edges[material]:
+                        solved[parents[childValues(child, children) == turns - 1]] = True
+                else:
+                    wins = np.zeros(count, np.int64)
+                    for child, parents, children in edges[material]:
+                        found = childValues(child, children)
+                        won = (found >= 0) & (found % 2 == 1) & (found <= turns - 1)
+                        wins += np.bincount(parents[won], minlength=count)
+                    solved = wins == childCounts[material]
+
+                updates[material] = unsolved & solved
+
+            # Apply the updates after every table has been checked so they all see the same turn
+            for material, solved in updates.items():
+                if solved.any():
+                    values[material][solved] = turns
+                    lastChange = turns
+
+        for material in group:
+            self.write(material, np.where(values[material] == UNKNOWN, DRAW, values[material]).astype(np.uint8))
+
+    # Writes a table to a temporary file first so a crash never leaves a broken table behind
+    def write(self, material, values):
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self.path(*material)
+        with open(path + ".tmp", "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.size, self.MIN_PIECES, *material, self.digest, len(values)))
+            file.write(values.tobytes())
+        os.replace(path + ".tmp", path)
+
+
+# Generators of the worker process, keyed by their settings
+generators = {}
+
+
+# Solves one group of tables in a worker process
+def solveGroup(gameType, minPieces, directory, material):
+    settings = (gameType, minPieces, directory)
+    if settings not in generators:
+        masks = BoardMasks(BoardGraph.fromAdjacency(BOARDS[gameType]))
+        generators[settings] = TablebaseGenerator(masks, minPieces, directory)
+
+    start = time.perf_counter()
+    generators[settings].solve(*material)
+    return material, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates endgame tablebases for the movement stage.")
+    parser.add_argument("--game-type", type=int, default=1, choices=sorted(BOARDS))
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=3, help="most pieces of either player")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default=defaultTablebaseDir())
+    args = parser.parse_args()
+
+    if args.min_pieces < 1:
+        parser.error("--min-pieces must be at least 1")
+
+    masks = BoardMasks(BoardGraph.fromAdjacency(BOARDS[args.game_type]))
+    generator = TablebaseGenerator(masks, args.min_pieces, args.output)
+    print(f"Writing to {generator.directory}")
+
+    # Tables with the same total number of pieces don't depend on each other, so they're solved in parallel
+    pieceRange = range(args.min_pieces, args.max_pieces + 1)
+    with ProcessPoolExecutor(args.workers) as executor:
+        for total in range(2 * args.min_pieces, 2 * args.max_pieces + 1):
+            groups = [(a, total - a) for a in pieceRange if a <= total - a and total - a in pieceRange]
+            groups = [(a, b) for a, b in groups if not (generator.finished(a, b) and generator.finished(b, a))]
+
+            settings = (args.game_type, args.min_pieces, args.output)
+            jobs = [executor.submit(solveGroup, *settings, group) for group in groups]
+
+            for job in jobs:
+                (a, b), elapsed = job.result()
+                table = Table(generator.path(a, b))
+                print(f"{a}v{b}: {len(table):,} positions in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
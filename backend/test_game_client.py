@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from backend.game_client import GameClient
+from backend.game_stage import GameStage
+from backend.protocol import PROTOCOL_JSON
+from backend.shax_engine import ShaxEngine
+
+
+# Stands in for the server by answering the game's messages with a local engine
+# Messages are held until reply() is called, so tests decide when and how the server answers
+class EngineConnection:
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.status = True
+        self.protocol = PROTOCOL_JSON
+        self.client = None
+        self.sent = []
+
+    def register(self, client):
+        self.client = client
+        return 1
+
+    def unregister(self, client):
+        self.client = None
+
+    def send(self, client, message):
+        self.sent.append(message)
+
+    # Answers the oldest message the way the server would
+    def reply(self):
+        self.client.handleResponse(self.engine.handleMessage(self.sent.pop(0)))
+
+
+# Sends one of the engine's legal moves through the client
+def play(client, action):
+    if action[0] == "place_piece":
+        client.placePiece(*action[1])
+    elif action[0] == "remove_piece":
+        client.removePiece(action[1])
+    else:
+        client.movePiece(action[1], *action[2])
+
+
+# Gets a client whose game has reached the movement stage
+def startMovement(seed):
+    engine = ShaxEngine(2, 10)
+    connection = EngineConnection(engine)
+    client = GameClient(2, 10, connection)
+
+    client.startGame()
+    connection.reply()
+
+    rng = random.Random(seed)
+    while engine.gameState != GameStage.MOVEMENT:
+        assert engine.gameState != GameStage.STOPPED
+        play(client, rng.choice(engine.legalActions()))
+        connection.reply()
+
+    return engine, connection, client
+
+
+# A move the server turns down is rolled back, leaving the board as the server last confirmed it
+# Servers that don't echo the sequence number or the piece are matched by the predicted move
+@pytest.mark.parametrize("echoed", [True, False])
+def test_rejectedMoveRestoresBoard(echoed):
+    engine, connection, client = startMovement(seed=1)
+    confirmed = client.predictedBoard()
+
+    evaluated = []
+    resolved = []
+    client.subscribe("movePieceEvaluated", lambda *args: evaluated.append(args))
+    client.subscribe("predictionResolved", lambda *args: resolved.append(args))
+
+    _, ID, (x, y) = engine.legalActions()[0]
+    client.movePiece(ID, x, y)
+    assert client.predictedBoard()[(x, y)] == ID
+
+    message = connection.sent.pop()
+    response = engine.errorResponse("move_piece", "Rejected by the server.")
+    if echoed:
+        response["seq"] = message["seq"]
+        response["moved_piece"] = ID
+    client.handleResponse(response)
+
+    assert client.pendingMoves == {}
+    assert client.predictedBoard() == confirmed
+    assert client.mirror.pieces() == engine.pieces
+    assert resolved == [(message["seq"], False)]
+    assert evaluated[-1][:3] == (False, "Rejected by the server.", ID)
+
+    # The piece can be moved again once the board is back
+    client.movePiece(ID, x, y)
+    connection.reply()
+
+    assert client.mirror.nodeOf(ID) == engine.pieces[ID]
+    assert evaluated[-1][:3] == (True, "", ID)
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from backend.game_record import GameRecorder, openRecords
+from backend.game_stage import GameStage
+from backend.shax_engine import ShaxEngine
+
+
+# Plays a random game on the engine while recording it
+# Returns the board, stage and next player after every move, starting with the empty board
+def recordGame(path, seed, keyframeInterval):
+    engine = ShaxEngine(2, 10)
+    engine.handleMessage({"action": "join_game"})
+
+    recorder = GameRecorder(path, engine.gameType, 2, 10, engine.topologyHash, engine.gameState,
+                            engine.current_turn, keyframeInterval)
+    states = [({}, engine.gameState, engine.current_turn)]
+
+    rng = random.Random(seed)
+    while engine.gameState != GameStage.STOPPED and len(states) < 300:
+        action = rng.choice(engine.legalActions())
+        if action[0] == "place_piece":
+            node = engine.graph.nodeId(*action[1])
+            engine.place(node)
+            recorder.place(engine.board[node], node, engine.gameState, engine.current_turn)
+        elif action[0] == "remove_piece":
+            engine.remove(action[1])
+            recorder.remove(action[1], engine.gameState, engine.current_turn)
+        else:
+            engine.move(action[1], engine.graph.nodeId(*action[2]))
+            recorder.move(action[1], engine.pieces[action[1]], engine.gameState, engine.current_turn)
+
+        states.append((dict(engine.pieces), engine.gameState, engine.current_turn))
+
+    recorder.finish(engine.winner)
+    return states, engine.winner
+
+
+# Every point of the game read back from the record matches the engine's board at that point
+@pytest.mark.parametrize("keyframeInterval", [1, 5, 16])
+def test_stateAtMatchesEngine(tmp_path, keyframeInterval):
+    states, winner = recordGame(str(tmp_path / "games.shxr"), 2, keyframeInterval)
+
+    (record,) = openRecords(str(tmp_path / "games.shxr"))
+    assert len(record) == len(states) - 1
+    assert record.winner == winner
+
+    for moveNumber, state in enumerate(states):
+        assert record.stateAt(moveNumber) == state
@@ -0,0 +1,75 @@
+import pytest
+
+from backend.protocol import (addChannel, decodeRequest, decodeResponse, encodeRequest, encodeResponse,
+                              splitChannel)
+
+PLAYER_TOKENS = ["key-1", "key-2"]
+
+
+# ****************************** REQUESTS ******************************
+@pytest.mark.parametrize("message", [
+    {"action": "place_piece", "seq": 1, "player_key": "key-1", "x": 3, "y": -2},
+    {"action": "place_piece", "player_key": "key-2", "x": 300, "y": -2000},
+    {"action": "remove_piece", "seq": 0xFFFF, "player_key": "key-2", "piece_ID": 41},
+    {"action": "move_piece", "seq": 7, "player_key": "key-1", "piece_ID": 8, "new_x": -1, "new_y": 1},
+])
+def test_requestRoundTrip(message):
+    assert decodeRequest(encodeRequest(message, PLAYER_TOKENS), PLAYER_TOKENS) == message
+
+
+# Whole numbers given as floats (e.g. from the scene) are sent as ints
+def test_requestWholeFloatCoordinates():
+    message = {"action": "move_piece", "player_key": "key-1", "piece_ID": 8, "new_x": 4.0, "new_y": -1.0}
+    decoded = decodeRequest(encodeRequest(message, PLAYER_TOKENS), PLAYER_TOKENS)
+
+    assert (decoded["new_x"], decoded["new_y"]) == (4, -1)
+    assert all(isinstance(decoded[key], int) for key in ("new_x", "new_y"))
+
+
+# Anything the binary format can't carry exactly has to be sent as JSON
+@pytest.mark.parametrize("message", [
+    {"action": "join_game", "game_type": 1},
+    {"action": "place_piece", "player_key": "someone else", "x": 0, "y": 0},
+    {"action": "place_piece", "player_key": "key-1", "x": 2.5, "y": 0},
+    {"action": "place_piece", "player_key": "key-1", "x": "1", "y": 0},
+    {"action": "move_piece", "player_key": "key-1", "piece_ID": 8, "new_x": 40000, "new_y": 0},
+    {"action": "remove_piece", "player_key": "key-1", "piece_ID": -1},
+])
+def test_requestFallsBackToJson(message):
+    assert encodeRequest(message, PLAYER_TOKENS) is None
+
+
+# ****************************** RESPONSES ******************************
+@pytest.mark.parametrize("response", [
+    {"action": "place_piece", "success": True, "next_state": "PLACEMENT", "next_player": 1, "seq": 3,
+     "new_piece_ID": 4, "new_x": -3, "new_y": 2, "board_hash": "0123456789abcdef"},
+    {"action": "remove_piece", "success": True, "next_state": "MOVEMENT", "next_player": 0,
+     "removed_piece": 9, "active_pieces": [0, 4, 8]},
+    {"action": "move_piece", "success": True, "next_state": "MOVEMENT", "next_player": 1, "seq": 12,
+     "moved_piece": 5, "new_x": 500, "new_y": -3, "deactivated": [1, 5], "activated": [9],
+     "board_hash": "ffffffffffffffff"},
+    {"action": "remove_piece", "success": True, "next_state": "STOPPED", "next_player": 1, "seq": 2,
+     "game_over": True, "winner": 1, "removed_piece": 4, "deactivated": [], "activated": [],
+     "board_hash": "0000000000000000"},
+])
+def test_responseRoundTrip(response):
+    assert decodeResponse(encodeResponse(response)) == response
+
+
+# Rejected moves carry an error message, and the other responses don't fit the binary format
+@pytest.mark.parametrize("response", [
+    {"action": "move_piece", "success": False, "error": "Not your turn.", "next_state": "MOVEMENT",
+     "next_player": 0},
+    {"action": "place_piece", "success": True, "next_state": "PLACEMENT", "next_player": 1,
+     "new_piece_ID": 4, "new_x": 1.5, "new_y": 2},
+    {"action": "move_piece", "success": True, "next_state": "MOVEMENT", "next_player": 1,
+     "moved_piece": 5, "new_x": 70000, "new_y": 0, "active_pieces": []},
+    {"action": "remove_piece", "success": True, "next_state": "MOVEMENT", "next_player": 0,
+     "removed_piece": 9, "active_pieces": list(range(300))},
+])
+def test_responseFallsBackToJson(response):
+    assert encodeResponse(response) is None
+
+
+def test_channelRoundTrip():
+    assert splitChannel(addChannel(513, b"message")) == (513, b"message")
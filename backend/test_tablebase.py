@@ -0,0 +1,28 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from backend.tablebase import TableIndex, batchIndex, rankedCombinations
+
+
+# Every position of a table gets its own index, the same one from the single and the batch versions
+@pytest.mark.parametrize("size, a, b", [(8, 2, 2), (9, 3, 2), (10, 2, 4), (12, 3, 3)])
+def test_indexMatchesBatchIndex(size, a, b):
+    table = TableIndex(size, a, b)
+    binomials = np.array([[comb(n, k) for k in range(size + 1)] for n in range(size + 1)], np.int64)
+
+    own = []
+    opp = []
+    for ownNodes in rankedCombinations(size, a):
+        left = np.setdiff1d(np.arange(size), ownNodes)
+        for oppNodes in rankedCombinations(size - a, b):
+            own.append(ownNodes)
+            opp.append(left[oppNodes])
+    own = np.array(own)
+    opp = np.array(opp)
+
+    indices = [table.index(ownNodes.tolist(), oppNodes.tolist()) for ownNodes, oppNodes in zip(own, opp)]
+
+    assert batchIndex(own, opp, size, binomials).tolist() == indices
+    assert sorted(indices) == list(range(table.count))
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+from backend.boards import parseAdjacency
+
+
+# Gets the content hash of a board layout in the server's "adjacent_pieces" format
+def topologyHash(adjacentPieces_raw):
+    canonical = json.dumps(adjacentPieces_raw, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+# Gets the default folder used to store the board layouts between sessions
+def defaultCacheDir():
+    cacheHome = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cacheHome, "qt-shax", "topologies")
+
+
+# Builds the graph of a layout
+# The graph module (and NumPy with it) is only imported once a board is actually needed
+def buildGraph(adjacentPieces_raw):
+    from backend.board_graph import BoardGraph
+    return BoardGraph.fromAdjacency(parseAdjacency(adjacentPieces_raw))
+
+
+# In-memory and on-disk cache of the board layouts sent by the server
+# Layouts are stored by their content hash so the server only needs to send the hash
+# of a layout the client has already seen
+class TopologyCache:
+    def __init__(self, cacheDir=None) -> None:
+        self.cacheDir = cacheDir or defaultCacheDir()
+
+        # Graphs of the board layouts keyed by their hash
+        self.topologies = {}
+
+        # Hash of the last layout used by each game type
+        self.hashes = self.readIndex()
+
+    # Gets the hash of the layout last used by the game type
+    # Returns None if the game type hasn't been played before
+    def knownHash(self, gameType):
+        return self.hashes.get(str(gameType))
+
+    # Stores a layout sent by the server and returns its hash and graph
+    def store(self, gameType, adjacentPieces_raw):
+        layoutHash = topologyHash(adjacentPieces_raw)
+
+        if layoutHash not in self.topologies:
+            self.topologies[layoutHash] = buildGraph(adjacentPieces_raw)
+            self.writeFile(layoutHash + ".json", adjacentPieces_raw)
+
+        self.remember(gameType, layoutHash)
+        return layoutHash, self.topologies[layoutHash]
+
+    # Gets the graph of the layout the server said the game type uses
+    # Returns None, and stops sending the hash, if the layout isn't in memory or on disk
+    def load(self, gameType, layoutHash):
+        boardGraph = self.lookup(layoutHash)
+        if boardGraph is None:
+            self.forget(gameType)
+            return None
+
+        self.remember(gameType, layoutHash)
+        return boardGraph
+
+    # Gets the graph of the layout with the given hash without changing which layout any game type uses,
+    # e.g. for the board of a recorded game
+    # Returns None if the layout isn't in memory or on disk
+    def lookup(self, layoutHash):
+        if layoutHash not in self.topologies:
+            adjacentPieces_raw = self.readFile(layoutHash + ".json")
+
+            # Ignore files that have been changed since they were written
+            if adjacentPieces_raw is None or topologyHash(adjacentPieces_raw) != layoutHash:
+                return None
+
+            self.topologies[layoutHash] = buildGraph(adjacentPieces_raw)
+
+        return self.topologies[layoutHash]
+
+    # Stops sending the hash of the game type's layout to the server
+    def forget(self, gameType):
+        if self.hashes.pop(str(gameType), None) is not None:
+            self.writeFile("index.json", self.hashes)
+
+    # Updates which layout the game type uses
+    def remember(self, gameType, layoutHash):
+        if self.hashes.get(str(gameType)) != layoutHash:
+            self.hashes[str(gameType)] = layoutHash
+            self.writeFile("index.json", self.hashes)
+
+    # ****************************** FILE ACCESS ******************************
+    # The cache is only an optimization so any file errors are ignored
+    def readIndex(self):
+        index = self.readFile("index.json")
+        return index if isinstance(index, dict) else {}
+
+    def readFile(self, filename):
+        try:
+            with open(os.path.join(self.cacheDir, filename)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def writeFile(self, filename, data):
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+
+            # Write to a temporary file first so a crash can't leave a half written file
+            path = os.path.join(self.cacheDir, filename)
+            with open(path + ".tmp", "w") as file:
+                json.dump(data, file)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print("Couldn't write to the board layout cache: ", e)
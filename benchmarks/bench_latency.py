@@ -0,0 +1,178 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer
+
+# Allow running the script directly from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.board_manager import BoardManager
+from backend.shax_engine import ShaxEngine
+from benchmarks.stand_in_server import StandInServer
+
+# Games that are still going after this many moves are ended early
+MAX_ACTIONS = 400
+
+
+# Plays a random game with the local engine and returns the moves that were made
+# The stand-in server uses the same rules so the same moves are legal when replayed
+def scriptGame(rng, minPieces, maxPieces):
+    engine = ShaxEngine(minPieces, maxPieces)
+    engine.handleMessage({"action": "join_game"})
+
+    script = []
+    while engine.winner is None and len(script) < MAX_ACTIONS:
+        action = rng.choice(engine.legalActions())
+        script.append(action)
+
+        key = engine.player_tokens[engine.current_turn]
+        if action[0] == "place_piece":
+            engine.handleMessage({"action": "place_piece", "x": action[1][0], "y": action[1][1],
+                                  "player_key": key})
+        elif action[0] == "remove_piece":
+            engine.handleMessage({"action": "remove_piece", "piece_ID": action[1], "player_key": key})
+        else:
+            engine.handleMessage({"action": "move_piece", "piece_ID": action[1],
+                                  "new_x": action[2][0], "new_y": action[2][1], "player_key": key})
+
+    return script
+
+
+# Gets the value below which the given fraction of the sorted samples fall
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+# Drives a BoardManager through a list of scripted games
+# Times every action from the moment it's sent until the board manager evaluates the response
+class GameDriver(QObject):
+    def __init__(self, boardManager, scripts, onFinished) -> None:
+        super().__init__()
+
+        self.boardManager = boardManager
+        self.scripts = scripts
+        self.onFinished = onFinished
+
+        self.script = []
+        self.index = 0
+
+        # Round trip times in seconds, keyed by action
+        self.timings = {}
+        self.errors = []
+
+        self.action = None
+        self.sentAt = 0
+
+        boardManager.startGameEvaluated.connect(lambda success, error, *_: self.evaluated(success, error))
+        boardManager.placePieceEvaluated.connect(lambda success, error, *_: self.evaluated(success, error))
+        boardManager.removePieceEvaluated.connect(lambda success, error, *_: self.evaluated(success, error))
+        boardManager.movePieceEvaluated.connect(lambda success, error, *_: self.evaluated(success, error))
+        boardManager.endEvaluated.connect(lambda success, msg, *_: self.evaluated(success, msg))
+
+    # Starts the next game
+    def start(self):
+        if not self.scripts:
+            self.onFinished()
+            return
+
+        self.script = self.scripts.pop(0)
+        self.index = 0
+        self.send("join_game", self.boardManager.startGame)
+
+    # Stamps an action and sends it
+    def send(self, action, method, *args):
+        self.action = action
+        self.sentAt = time.perf_counter()
+        method(*args)
+
+    # Records the round trip of the last action and sends the next one
+    def evaluated(self, success, error):
+        self.timings.setdefault(self.action, []).append(time.perf_counter() - self.sentAt)
+        if not success:
+            self.errors.append(f"{self.action}: {error}")
+
+        finishedAction = self.action
+        self.action = None
+
+        # Wait for the board manager to finish handling the response first
+        if finishedAction == "end":
+            QTimer.singleShot(0, self.start)
+        else:
+            QTimer.singleShot(0, self.next)
+
+    # Sends the next scripted move, or ends the game once the script is done
+    def next(self):
+        if self.index >= len(self.script):
+            self.send("end", self.boardManager.end)
+            return
+
+        action = self.script[self.index]
+        self.index += 1
+
+        if action[0] == "place_piece":
+            self.send(action[0], self.boardManager.placePiece, *action[1])
+        elif action[0] == "remove_piece":
+            self.send(action[0], self.boardManager.removePiece, action[1])
+        else:
+            self.send(action[0], self.boardManager.movePiece, action[1], *action[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the client's round trip latency against a local server.")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=10)
+    parser.add_argument("--json-only", action="store_true", help="don't negotiate the binary protocol")
+    parser.add_argument("--max-p99-ms", type=float, default=None,
+                        help="exit with an error if any action's p99 round trip is slower than this")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+
+    server = StandInServer(args.min_pieces, args.max_pieces, not args.json_only)
+    if not server.listen():
+        sys.exit("Couldn't start the stand-in server")
+
+    rng = random.Random(args.seed)
+    scripts = [scriptGame(rng, args.min_pieces, args.max_pieces) for _ in range(args.games)]
+
+    boardManager = BoardManager(args.min_pieces, args.max_pieces, server.url)
+
+    # Benchmark games don't belong in the player's archive of games
+    boardManager.recordPath = None
+    driver = GameDriver(boardManager, scripts, app.quit)
+    boardManager.connected.connect(driver.start)
+
+    start = time.perf_counter()
+    app.exec_()
+    elapsed = time.perf_counter() - start
+
+    # ****************************** REPORT ******************************
+    totalMessages = sum(len(samples) for samples in driver.timings.values())
+    print(f"\n{args.games} games, {totalMessages} round trips in {elapsed:.2f} s "
+          f"({totalMessages / elapsed:.0f} messages/s), protocol: {boardManager.protocol}")
+    print(f"{'action':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+    slowest = 0
+    for action, samples in sorted(driver.timings.items()):
+        samples.sort()
+        p99 = percentile(samples, 0.99) * 1000
+        slowest = max(slowest, p99)
+        print(f"{action:<14}{len(samples):>8}{percentile(samples, 0.5) * 1000:>10.3f}"
+              f"{percentile(samples, 0.9) * 1000:>10.3f}{p99:>10.3f}{samples[-1] * 1000:>10.3f}")
+
+    if driver.errors:
+        print(f"\n{len(driver.errors)} actions were rejected, first: {driver.errors[0]}")
+        sys.exit(1)
+
+    if args.max_p99_ms is not None and slowest > args.max_p99_ms:
+        print(f"\np99 round trip of {slowest:.3f} ms is over the {args.max_p99_ms} ms limit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# Allow running the script directly from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.board_graph import BoardGraph
+from backend.boards import BOARDS
+from backend.shax_engine import ShaxEngine
+from backend.shax_search import Position, PositionBatch, Topology
+
+
+# Plays random games and collects the positions they go through
+def samplePositions(rng, topology, count, minPieces, maxPieces):
+    positions = []
+    while len(positions) < count:
+        position = Position(topology, minPieces, maxPieces)
+        while position.winner is None and len(positions) < count:
+            positions.append(position)
+            position = position.play(rng.choice(position.legalMoves()))
+
+    return positions
+
+
+# Runs the function repeatedly for about a second and returns the calls per second
+def rate(function):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < 1:
+        function()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures move generation and position scoring throughput.")
+    parser.add_argument("--positions", type=int, default=100000)
+    parser.add_argument("--game-type", type=int, default=1, choices=sorted(BOARDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    graph = BoardGraph.fromAdjacency(BOARDS[args.game_type])
+    topology = Topology(graph)
+    masks = topology.masks
+
+    rng = random.Random(args.seed)
+    positions = samplePositions(rng, topology, args.positions, 2, 12)
+
+    batch = PositionBatch(positions)
+
+    # Check the batch results against the single position code before timing anything
+    counts = batch.moveCounts()
+    assert counts.tolist() == [len(position.legalMoves()) for position in positions]
+    assert batch.evaluate().tolist() == [position.evaluate() for position in positions]
+
+    # The rules engine only keeps one game, so it's timed on a board halfway through placement
+    engine = ShaxEngine(2, 12, args.game_type)
+    engine.handleMessage({"action": "join_game"})
+    for node in range(0, len(graph), 2):
+        engine.place(node)
+
+    sample = positions[:1000]
+    timings = (("engine legalActions", 100, lambda: [engine.legalActions() for _ in range(100)]),
+               ("bitboard legalMoves", len(sample), lambda: [position.legalMoves() for position in sample]),
+               ("batch move generation", len(batch), lambda: masks.batchMoves(batch.own, batch.opp)),
+               ("batch move counts", len(batch), batch.moveCounts),
+               ("single evaluate", len(sample), lambda: [position.evaluate() for position in sample]),
+               ("batch evaluate", len(batch), batch.evaluate),
+               ("packing a batch", len(sample), lambda: PositionBatch(sample)))
+
+    print(f"{len(positions)} positions, {int(counts.sum())} legal moves")
+    print(f"{'':<28}{'positions/s':>14}")
+    for name, size, function in timings:
+        print(f"{name:<28}{rate(function) * size:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
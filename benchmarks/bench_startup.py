@@ -0,0 +1,83 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Starts the client in this process and reports how long each step took since the process was launched
+# Runs in a child process so every launch starts with nothing imported
+def child(launched):
+    timings = {"interpreter": time.time() - launched}
+    sys.path.insert(0, ROOT)
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QEvent, QObject
+
+    app = QApplication([])
+    timings["qt"] = time.time() - launched
+
+    from ui.main_window import MainWindow
+    timings["imports"] = time.time() - launched
+
+    window = MainWindow()
+    timings["window"] = time.time() - launched
+
+    # Waits for the first paint of the window
+    class PaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and "first_paint" not in timings:
+                timings["first_paint"] = time.time() - launched
+                timings["modules"] = len(sys.modules)
+                timings["numpy"] = "numpy" in sys.modules
+                app.quit()
+            return False
+
+    paintFilter = PaintFilter()
+    window.installEventFilter(paintFilter)
+    window.show()
+    app.exec()
+
+    print(json.dumps(timings))
+
+
+# Launches the client and returns its timings
+def launch(env):
+    launched = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(launched)],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the client takes to show its window.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child)
+        return
+
+    # The first launch uses an empty cache, the others reuse what it left behind
+    with tempfile.TemporaryDirectory() as cacheDir:
+        env = dict(os.environ, XDG_CACHE_HOME=cacheDir)
+        cold = launch(env)
+        warm = [launch(env) for _ in range(args.runs)]
+
+    steps = ("interpreter", "qt", "imports", "window", "first_paint")
+    print(f"{'ms since launch':<16}{'cold':>8}{'warm p50':>10}{'warm min':>10}{'warm max':>10}")
+    for step in steps:
+        samples = [run[step] * 1000 for run in warm]
+        print(f"{step:<16}{cold[step] * 1000:>8.1f}{statistics.median(samples):>10.1f}"
+              f"{min(samples):>10.1f}{max(samples):>10.1f}")
+    print(f"modules loaded at first paint: {warm[-1]['modules']}, numpy loaded: {warm[-1]['numpy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+# Allow running the script directly from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.async_connection import AsyncConnection
+from backend.board_mirror import EMPTY
+from backend.game_client import GameClient
+from backend.game_stage import GameStage
+from backend.metrics import ClientMetrics
+from backend.topology_cache import TopologyCache
+
+# Games that are still going after this many moves are ended early
+MAX_ACTIONS = 400
+
+
+# Gets the value below which the given fraction of the sorted samples fall
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+# Headless player that plays random moves for every player whose key it was given
+# Moves are picked from the client's own view of the board, so it works against any server,
+# and moves the server rejects are simply replaced by another one
+class ScriptedPlayer(GameClient):
+    def __init__(self, minPieces, maxPieces, connection, games, rng) -> None:
+        super().__init__(minPieces, maxPieces, connection)
+
+        # Load tests don't keep the records of their games
+        self.recordPath = None
+
+        # Number of games left to play
+        self.gamesLeft = games
+        self.rng = rng
+
+        self.gamesFinished = 0
+        self.actions = 0
+        self.rejections = 0
+        self.errors = []
+
+        # Moves rejected in the current turn
+        self.rejected = set()
+
+        # Resolved once every game has been played
+        self.done = asyncio.get_running_loop().create_future()
+
+        self.subscribe("startGameEvaluated", self.startGame_Evaluated)
+        self.subscribe("placePieceEvaluated", lambda success, error, *_: self.moveEvaluated(success, error))
+        self.subscribe("removePieceEvaluated", lambda success, error, *_: self.moveEvaluated(success, error))
+        self.subscribe("movePieceEvaluated", lambda success, error, *_: self.moveEvaluated(success, error))
+        self.subscribe("gameEnded", self.gameOver)
+        self.subscribe("endEvaluated", lambda *_: self.later(self.nextGame))
+
+    # Runs the function once the client has finished handling the current response
+    def later(self, function):
+        asyncio.get_running_loop().call_soon(function)
+
+    def startGame_Evaluated(self, success, error, waiting, *_):
+        if not success:
+            self.fail(f"join_game: {error}")
+        elif not waiting:
+            self.actions = 0
+            self.rejected = set()
+            self.later(self.play)
+
+    def moveEvaluated(self, success, error):
+        if success:
+            self.rejected = set()
+        else:
+            self.rejections += 1
+
+        self.later(self.play)
+
+    # Plays a move if it's the turn of a player this client has the key of
+    def play(self):
+        if not self.running or self.pendingMoves or not self.player_tokens[self.current_turn]:
+            return
+
+        if self.actions >= MAX_ACTIONS:
+            self.running = False
+            self.end()
+            return
+
+        moves = [move for move in self.candidateMoves() if move not in self.rejected]
+        if not moves:
+            self.fail(f"no moves left to try in the {self.gameState.name} stage")
+            return
+
+        move = self.rng.choice(moves)
+        self.rejected.add(move)
+        self.actions += 1
+
+        if move[0] == "place":
+            self.placePiece(*move[1])
+        elif move[0] == "remove":
+            self.removePiece(move[1])
+        else:
+            self.movePiece(move[1], *move[2])
+
+    # Gets the moves that look legal from the client's view of the board
+    def candidateMoves(self):
+        mirror = self.mirror
+        pieces = mirror.pieces()
+
+        if self.gameState == GameStage.PLACEMENT:
+            return [("place", mirror.coords[node]) for node in range(len(mirror.coords))
+                    if mirror.pieceAt(node) == EMPTY]
+
+        if self.gameState in (GameStage.FIRST_REMOVAL, GameStage.REMOVAL):
+            return [("remove", ID) for ID in pieces if self.owner(ID) != self.current_turn]
+
+        # Prefer the pieces the server said can move, if it said anything
+        own = [ID for ID in pieces if self.owner(ID) == self.current_turn]
+        movable = [ID for ID in own if ID in self.activePieces] or own
+        moves = []
+        for ID in movable:
+            for end in self.boardGraph.neighbours(pieces[ID]):
+                if mirror.pieceAt(end) == EMPTY:
+                    moves.append(("move", ID, mirror.coords[end]))
+        return moves
+
+    # Leaves the finished game before starting the next one
+    def gameOver(self):
+        self.gamesFinished += 1
+        self.later(self.end)
+
+    # Starts the next game or finishes once they've all been played
+    def nextGame(self):
+        if self.done.done():
+            return
+
+        self.gamesLeft -= 1
+        if self.gamesLeft > 0:
+            self.startGame()
+        else:
+            self.done.set_result(True)
+
+    def fail(self, error):
+        self.errors.append(error)
+        if not self.done.done():
+            self.done.set_result(False)
+
+
+# Starts a stand-in server in another process and returns the process and its URL
+def startStandInServer(args):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stand_in_server.py")
+    command = [sys.executable, script, "--port", str(port),
+               "--min-pieces", str(args.min_pieces), "--max-pieces", str(args.max_pieces)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+    # Wait until it's listening
+    line = server.stdout.readline()
+    if not line.startswith("Listening"):
+        server.kill()
+        sys.exit("Couldn't start the stand-in server")
+
+    return server, f"ws://127.0.0.1:{port}"
+
+
+# Opens the connections and plays every game, starting the players over the ramp up time
+async def run(args, url):
+    rng = random.Random(args.seed)
+    topologies = TopologyCache()
+    multiplexed = args.games_per_connection > 1
+
+    connections = []
+    players = []
+    failedConnections = 0
+
+    async def startConnection(index):
+        nonlocal failedConnections
+        await asyncio.sleep(args.ramp * index / connectionCount)
+
+        connection = AsyncConnection(url, multiplexed)
+        try:
+            await connection.open()
+        except ImportError:
+            raise
+        except Exception as e:
+            print("Couldn't connect to the server: ", e)
+            failedConnections += 1
+            return
+
+        connections.append(connection)
+        for _ in range(min(args.games_per_connection, args.players - index * args.games_per_connection)):
+            player = ScriptedPlayer(args.min_pieces, args.max_pieces, connection, args.games,
+                                    random.Random(rng.getrandbits(32)))
+            player.topologies = topologies
+            players.append(player)
+            player.startGame()
+
+    connectionCount = -(-args.players // args.games_per_connection)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(startConnection(index) for index in range(connectionCount)))
+    await asyncio.wait_for(asyncio.gather(*(player.done for player in players)), args.timeout)
+    elapsed = time.perf_counter() - start
+
+    for player in players:
+        player.close()
+    await asyncio.gather(*(connection.close() for connection in connections))
+
+    return players, failedConnections, elapsed
+
+
+# Combines the round trip times and traffic of every player
+def report(args, players, failedConnections, elapsed):
+    timings = {action: [] for action in ClientMetrics.ACTIONS}
+    for player in players:
+        for action, histogram in player.metrics.latencies.items():
+            timings[action].extend(histogram.samples)
+
+    messagesSent = sum(player.metrics.messagesSent for player in players)
+    messagesReceived = sum(player.metrics.messagesReceived for player in players)
+    gamesFinished = sum(player.gamesFinished for player in players)
+    errors = [error for player in players for error in player.errors]
+
+    summary = {"players": len(players),
+               "failed_connections": failedConnections,
+               "elapsed_s": elapsed,
+               "games_finished": gamesFinished,
+               "games_per_s": gamesFinished / elapsed,
+               "messages_sent": messagesSent,
+               "messages_received": messagesReceived,
+               "messages_per_s": (messagesSent + messagesReceived) / elapsed,
+               "rejected_moves": sum(player.rejections for player in players),
+               "errors": len(errors),
+               "round_trips": {}}
+
+    print(f"\n{len(players)} players over {-(-len(players) // args.games_per_connection)} connections, "
+          f"{gamesFinished} games finished in {elapsed:.2f} s ({summary['games_per_s']:.1f} games/s)")
+    print(f"{messagesSent} requests, {messagesReceived} responses ({summary['messages_per_s']:.0f} messages/s), "
+          f"{summary['rejected_moves']} rejected moves, {failedConnections} failed connections")
+    print(f"{'action':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'p99.9 ms':>10}{'max ms':>10}")
+
+    for action, samples in timings.items():
+        if not samples:
+            continue
+
+        samples.sort()
+        fractions = (0.5, 0.9, 0.99, 0.999, 1.0)
+        values = [percentile(samples, fraction) * 1000 for fraction in fractions]
+        summary["round_trips"][action] = dict(zip(("p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms"), values),
+                                              count=len(samples))
+        print(f"{action:<14}{len(samples):>8}" + "".join(f"{value:>10.3f}" for value in values))
+
+    if errors:
+        print(f"\n{len(errors)} players stopped early, first: {errors[0]}")
+
+    if args.export:
+        with open(args.export, "w") as file:
+            json.dump(summary, file, indent=4)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays many concurrent scripted games against a shax server "
+                                                 "and reports its throughput and round trip latency.")
+    parser.add_argument("--url", help="server to test, a local stand-in server is started if it isn't given")
+    parser.add_argument("--players", type=int, default=100, help="number of concurrent players")
+    parser.add_argument("--games", type=int, default=1, help="games played by each player")
+    parser.add_argument("--games-per-connection", type=int, default=1,
+                        help="players sharing each multiplexed connection")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which the connections are opened")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for the games to finish")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=10)
+    parser.add_argument("--export", help="write the summary to a JSON file")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = startStandInServer(args)
+
+    try:
+        players, failedConnections, elapsed = asyncio.run(run(args, url))
+    except ImportError as e:
+        sys.exit(str(e))
+    except asyncio.TimeoutError:
+        sys.exit(f"The games didn't finish within {args.timeout} s")
+    finally:
+        if server is not None:
+            server.kill()
+
+    summary = report(args, players, failedConnections, elapsed)
+    if summary["errors"] or failedConnections:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
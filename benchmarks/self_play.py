@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Allow running the script directly from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.boards import BOARDS
+from backend.shax_engine import ShaxEngine
+from backend.shax_search import Position, Searcher, Topology
+
+# Games that are still going after this many moves are counted as draws
+MAX_ACTIONS = 400
+
+# Bots that can play in the simulated games
+BOTS = ("random", "search")
+
+
+# Plays games between two bots on the local rules engine
+# Each worker process keeps its own engine and searchers between batches of games, but the searchers
+# start every game from scratch so its result only depends on its seed and not on the games played before it
+class SelfPlay:
+    def __init__(self, minPieces, maxPieces, gameType, bots, depth) -> None:
+        self.engine = ShaxEngine(minPieces, maxPieces, gameType)
+        self.topology = Topology(self.engine.graph)
+
+        self.bots = bots
+        self.depth = depth
+        self.searchers = [Searcher(ttBits=16) if bot == "search" else None for bot in bots]
+
+    # Plays one game and returns the winner (None for a draw) and the number of moves made
+    def playGame(self, seed):
+        rng = random.Random(seed)
+        engine = self.engine
+        engine.joinGame_Response({})
+
+        for searcher in self.searchers:
+            if searcher is not None:
+                searcher.table.clear()
+
+        actions = 0
+        while engine.winner is None and actions < MAX_ACTIONS:
+            player = engine.current_turn
+            if self.bots[player] == "search":
+                error = self.playSearchMove(self.searchers[player])
+            else:
+                error = self.playRandomMove(rng)
+
+            if error:
+                raise RuntimeError(f"Bot {self.bots[player]} made an illegal move: {error}")
+            actions += 1
+
+        return engine.winner, actions
+
+    def playRandomMove(self, rng):
+        engine = self.engine
+        action = rng.choice(engine.legalActions())
+
+        if action[0] == "place_piece":
+            return engine.place(engine.graph.nodeId(*action[1]))
+        elif action[0] == "remove_piece":
+            return engine.remove(action[1])
+        return engine.move(action[1], engine.graph.nodeId(*action[2]))
+
+    # Searches to a fixed depth so the games don't depend on the speed of the machine
+    def playSearchMove(self, searcher):
+        engine = self.engine
+        move = searcher.search(Position.fromEngine(engine, self.topology), float("inf"), self.depth)[0]
+
+        if move[0] == "place":
+            return engine.place(move[1])
+        elif move[0] == "remove":
+            return engine.remove(engine.board[move[1]])
+        return engine.move(engine.board[move[1]], move[2])
+
+
+# Simulators of the worker process, keyed by their settings
+simulators = {}
+
+
+# Plays a batch of games in a worker process
+# Returns a list of (winner, moves) pairs
+def playGames(settings, seeds):
+    if settings not in simulators:
+        simulators[settings] = SelfPlay(*settings)
+
+    simulator = simulators[settings]
+    return [simulator.playGame(seed) for seed in seeds]
+
+
+# Gets the value below which the given fraction of the sorted samples fall
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+# Aggregates the results of the games
+def summarize(results, elapsed):
+    lengths = sorted(moves for _, moves in results)
+    wins = [sum(winner == player for winner, _ in results) for player in range(2)]
+    draws = sum(winner is None for winner, _ in results)
+
+    return {"games": len(results),
+            "elapsed_s": elapsed,
+            "games_per_s": len(results) / elapsed if elapsed else 0,
+            "win_rate": [win / len(results) for win in wins],
+            "draw_rate": draws / len(results),
+            "length": {"mean": sum(lengths) / len(lengths),
+                       "p50": percentile(lengths, 0.5),
+                       "p90": percentile(lengths, 0.9),
+                       "max": lengths[-1]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays bots against each other on the local rules engine.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=25, help="games sent to a worker at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=10)
+    parser.add_argument("--game-type", type=int, default=1, choices=sorted(BOARDS))
+    parser.add_argument("--player1", choices=BOTS, default="random")
+    parser.add_argument("--player2", choices=BOTS, default="random")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the search bots")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    settings = (args.min_pieces, args.max_pieces, args.game_type, (args.player1, args.player2), args.depth)
+    seeds = [args.seed * args.games + game for game in range(args.games)]
+    batches = [seeds[start:start + args.batch_size] for start in range(0, len(seeds), args.batch_size)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as executor:
+        results = [result for batch in executor.map(playGames, [settings] * len(batches), batches)
+                   for result in batch]
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, elapsed)
+    summary["settings"] = {"min_pieces": args.min_pieces, "max_pieces": args.max_pieces,
+                           "game_type": args.game_type, "players": [args.player1, args.player2],
+                           "depth": args.depth, "workers": args.workers}
+
+    print(f"{summary['games']} games in {elapsed:.2f} s ({summary['games_per_s']:.1f} games/s, "
+          f"{args.workers} workers)")
+    print(f"player 1 ({args.player1}) wins {summary['win_rate'][0]:.1%}, "
+          f"player 2 ({args.player2}) wins {summary['win_rate'][1]:.1%}, draws {summary['draw_rate']:.1%}")
+    length = summary["length"]
+    print(f"game length: mean {length['mean']:.1f}, p50 {length['p50']}, p90 {length['p90']}, max {length['max']}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(summary, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QCoreApplication, QObject
+from PyQt5.QtNetwork import QHostAddress
+from PyQt5.QtWebSockets import QWebSocketServer
+
+# Allow running the script directly from the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.protocol import PROTOCOL_BINARY, PROTOCOL_JSON, addChannel, decodeRequest, encodeResponse, splitChannel
+from backend.shax_engine import ShaxEngine
+
+
+# Local websocket server that speaks the shax protocol
+# Every game is evaluated by the local rules engine
+# Clients that tag their messages with a game ID can run several games over one connection
+class StandInServer(QObject):
+    def __init__(self, minPieces=2, maxPieces=10, binary=True) -> None:
+        super().__init__()
+
+        self.MIN_PIECES = minPieces
+        self.MAX_PIECES = maxPieces
+
+        # Whether clients that offer the binary protocol get to use it
+        self.binary = binary
+
+        self.server = QWebSocketServer("Shax stand-in server", QWebSocketServer.NonSecureMode)
+        self.server.newConnection.connect(self.onNewConnection)
+
+        # Game played on each channel, a channel being a (socket, game ID) pair
+        self.engines = {}
+
+        # Wire format of each connected client and whether it tags its messages with game IDs
+        self.protocols = {}
+        self.multiplexed = {}
+
+        # Games keyed by their player keys so players can rejoin after reconnecting
+        self.games = {}
+
+        # Game watched on each spectating channel
+        self.watching = {}
+
+    # Starts listening on localhost
+    # A port of 0 picks any free port
+    def listen(self, port=0):
+        return self.server.listen(QHostAddress.LocalHost, port)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.server.serverPort()}"
+
+    def onNewConnection(self):
+        socket = self.server.nextPendingConnection()
+
+        self.protocols[socket] = PROTOCOL_JSON
+        self.multiplexed[socket] = False
+
+        socket.textMessageReceived.connect(lambda message: self.onTextMessage(socket, message))
+        socket.binaryMessageReceived.connect(lambda message: self.onBinaryMessage(socket, bytes(message)))
+        socket.disconnected.connect(lambda: self.onDisconnected(socket))
+
+    def onDisconnected(self, socket):
+        self.engines = {channel: engine for channel, engine in self.engines.items() if channel[0] is not socket}
+        self.watching = {channel: engine for channel, engine in self.watching.items() if channel[0] is not socket}
+        self.protocols.pop(socket, None)
+        self.multiplexed.pop(socket, None)
+        socket.deleteLater()
+
+    def onTextMessage(self, socket, message):
+        message = json.loads(message)
+
+        # Clients that tag their first message with a game ID keep doing so
+        if "game_id" in message:
+            self.multiplexed[socket] = True
+
+        self.reply((socket, message.get("game_id", 0)), message)
+
+    def onBinaryMessage(self, socket, message):
+        gameId = 0
+        if self.multiplexed[socket]:
+            gameId, message = splitChannel(message)
+
+        channel = (socket, gameId)
+        self.reply(channel, decodeRequest(message, self.engine(channel).player_tokens))
+
+    # Gets the game played on a channel, starting a new one if there isn't one yet
+    def engine(self, channel):
+        if channel not in self.engines:
+            self.engines[channel] = ShaxEngine(self.MIN_PIECES, self.MAX_PIECES)
+        return self.engines[channel]
+
+    # Evaluates a message and sends back the response in the client's wire format
+    def reply(self, channel, message):
+        socket = channel[0]
+        action = message.get("action")
+
+        # Reconnecting players pick up the game they were playing
+        if action == "resync" and message.get("player_key") in self.games:
+            self.engines[channel] = self.games[message["player_key"]]
+
+        # Spectators stop watching by ending their side of the game
+        if action == "end" and channel in self.watching:
+            del self.watching[channel]
+            self.send(channel, {"action": "end", "success": True, "msg": "Stopped watching the game."})
+            return
+
+        engine = self.engines.get(channel)
+        if action == "spectate" and message.get("player_key") in self.games:
+            engine = self.watching[channel] = self.games[message["player_key"]]
+        elif engine is None:
+            engine = self.engine(channel)
+
+        response = engine.handleMessage(message)
+
+        if action == "join_game":
+            for key in engine.player_tokens:
+                self.games[key] = engine
+        elif action == "end":
+            self.games = {key: game for key, game in self.games.items() if game is not engine}
+
+        # Pick the binary protocol if the client offered it
+        if action in ("join_game", "resync", "spectate"):
+            if self.binary and PROTOCOL_BINARY in message.get("protocols", []):
+                self.protocols[socket] = PROTOCOL_BINARY
+            else:
+                self.protocols[socket] = PROTOCOL_JSON
+            response["protocol"] = self.protocols[socket]
+
+        self.send(channel, response)
+
+        # Pass the moves and the end of the game on to anyone watching
+        if action in ("place_piece", "remove_piece", "move_piece", "end") and response.get("success", False):
+            for spectator in [spectator for spectator, game in self.watching.items() if game is engine]:
+                update = dict(response)
+                update.pop("seq", None)
+                if action == "end":
+                    update["msg"] = "The game was ended."
+                    del self.watching[spectator]
+                self.send(spectator, update)
+
+    # Sends a response on a channel in the client's wire format
+    def send(self, channel, response):
+        socket, gameId = channel
+
+        if self.protocols[socket] == PROTOCOL_BINARY:
+            packedResponse = encodeResponse(response)
+            if packedResponse is not None:
+                if self.multiplexed[socket]:
+                    packedResponse = addChannel(gameId, packedResponse)
+                socket.sendBinaryMessage(packedResponse)
+                return
+
+        if self.multiplexed[socket]:
+            response["game_id"] = gameId
+        socket.sendTextMessage(json.dumps(response))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a local stand-in for the shax server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--min-pieces", type=int, default=2)
+    parser.add_argument("--max-pieces", type=int, default=10)
+    parser.add_argument("--json-only", action="store_true", help="never pick the binary protocol")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    server = StandInServer(args.min_pieces, args.max_pieces, not args.json_only)
+    if not server.listen(args.port):
+        sys.exit(f"Couldn't listen on port {args.port}")
+
+    print(f"Listening on {server.url}")
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Puts the root of the repository on the path so the tests next to the code can import the backend
+# package wherever pytest is run from
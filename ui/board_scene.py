@@ -0,0 +1,45 @@
+from PyQt5.QtGui import QPainterPath
+from PyQt5.QtWidgets import QGraphicsScene
+from PyQt5.QtCore import Qt
+
+
+# Scene that draws the static board as its background
+# Every connection and node is added once to a single path, so the board costs two path
+# draws no matter how big it is and only the game pieces are kept as live items
+class BoardScene(QGraphicsScene):
+    def __init__(self, boardGraph, gridSpacing, radius, linesPen, intersectionsPen, brush) -> None:
+        super().__init__()
+
+        self.linesPen = linesPen
+        self.intersectionsPen = intersectionsPen
+        self.brush = brush
+
+        coords = boardGraph.coords.astype(float) * gridSpacing
+
+        # Add each connection between two nodes once
+        self.linesPath = QPainterPath()
+        for start, end in boardGraph.edges().tolist():
+            self.linesPath.moveTo(*coords[start].tolist())
+            self.linesPath.lineTo(*coords[end].tolist())
+
+        # Add the corners/intersections
+        self.intersectionsPath = QPainterPath()
+        for x, y in coords.tolist():
+            self.intersectionsPath.addEllipse(x - radius, y - radius, radius * 2, radius * 2)
+
+        # Leave room for the width of the pens around the board
+        margin = max(linesPen.widthF(), intersectionsPen.widthF())
+        boardRect = self.linesPath.boundingRect().united(self.intersectionsPath.boundingRect())
+        self.setSceneRect(boardRect.adjusted(-margin, -margin, margin, margin))
+
+    # Draws the board behind all the game pieces
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+
+        painter.setPen(self.linesPen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(self.linesPath)
+
+        painter.setPen(self.intersectionsPen)
+        painter.setBrush(self.brush)
+        painter.drawPath(self.intersectionsPath)
@@ -0,0 +1,76 @@
+import importlib.util
+import os
+
+from PyQt5.QtCore import PYQT_VERSION_STR
+
+# Root of the repository, so files are found relative to the code instead of the working directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Gets the default folder the compiled UI modules are stored in
+def defaultCompiledDir():
+    cacheHome = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cacheHome, "qt-shax", "ui")
+
+
+# Gets the path of a file shipped with the client, e.g. resourcePath("images", "loading.gif")
+def resourcePath(*parts):
+    return os.path.join(ROOT_DIR, *parts)
+
+
+# Sets up the widget from the Designer file with the given name, like uic.loadUi()
+# The .ui file is compiled to a Python module the first time it's loaded and again whenever it changes,
+# so later launches only import the generated code (and its cached bytecode) instead of parsing XML
+def loadUi(name, widget):
+    uiPath = resourcePath("ui_files", name + ".ui")
+
+    try:
+        module = compiledModule(name, uiPath)
+    except OSError as e:
+        # Fall back to parsing the file if the cache can't be written to
+        print("Couldn't compile the UI file: ", e)
+        from PyQt5 import uic
+        uic.loadUi(uiPath, widget)
+        return
+
+    form = next(value for key, value in vars(module).items() if key.startswith("Ui_"))()
+    form.setupUi(widget)
+
+    # uic.loadUi() makes the child widgets attributes of the widget itself
+    for key, value in vars(form).items():
+        setattr(widget, key, value)
+
+
+# Imports the compiled module of a .ui file, compiling it if it's missing or out of date
+def compiledModule(name, uiPath):
+    directory = defaultCompiledDir()
+
+    # The module's name changes with the .ui file and the PyQt version, so a stale module is never used
+    info = os.stat(uiPath)
+    stamp = f"{info.st_mtime_ns:x}_{info.st_size:x}_{PYQT_VERSION_STR.replace('.', '_')}"
+    modulePath = os.path.join(directory, f"{name}_{stamp}.py")
+
+    if not os.path.exists(modulePath):
+        compileUi(name, uiPath, modulePath)
+
+    spec = importlib.util.spec_from_file_location(f"qt_shax_ui.{name}", modulePath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Writes the compiled module and deletes the older versions of it
+def compileUi(name, uiPath, modulePath):
+    from PyQt5 import uic
+
+    directory = os.path.dirname(modulePath)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(modulePath + ".tmp", "w") as file:
+        uic.compileUi(uiPath, file)
+    os.replace(modulePath + ".tmp", modulePath)
+
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if filename.startswith(name + "_") and filename.endswith(".py") and path != modulePath:
+            os.remove(path)
@@ -0,0 +1,185 @@
+from PyQt5.QtGui import QPen, QColor, QBrush, QPainter
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QGraphicsView, QToolButton
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal
+
+from .board_scene import BoardScene
+from .piece_pool import PiecePool
+
+
+# Small read-only view of a game being watched through a spectating board manager
+# Many tiles can share a single multiplexed connection to the server
+class GameTile(QWidget):
+    # *************** SIGNALS
+    closed = pyqtSignal(object)
+
+    # Drawing sizes in scene coordinates, the view scales the board down to fit the tile
+    RADIUS = 15
+    PEN_WIDTH = 5
+    GRID_SPACING = 70
+
+    # Size of the board view in pixels
+    TILE_SIZE = 240
+
+    def __init__(self, boardManager, title) -> None:
+        super().__init__()
+
+        self.boardManager = boardManager
+        self.scene = None
+
+        # Tracks the game piece graphicItems on the board
+        self.gamePieces = {}
+
+        # Game pieces reused from game to game
+        self.piecePool = PiecePool(self.RADIUS)
+
+        # Scenes of the boards that have already been drawn, keyed by their layout's hash
+        self.boardScenes = {}
+
+        self.playerColors = [QColor(100, 0, 0), QColor(0, 0, 100)]
+
+        self.load_ui(title)
+        self.connect_all()
+
+    def load_ui(self, title):
+        self.titleLbl = QLabel(title)
+        self.titleLbl.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        self.closeBtn = QToolButton()
+        self.closeBtn.setText("x")
+        self.closeBtn.setAutoRaise(True)
+
+        header = QHBoxLayout()
+        header.addWidget(self.titleLbl, 1)
+        header.addWidget(self.closeBtn)
+
+        self.graphicsView = QGraphicsView()
+        self.graphicsView.setFixedSize(self.TILE_SIZE, self.TILE_SIZE)
+        self.graphicsView.setInteractive(False)
+        self.graphicsView.setRenderHint(QPainter.Antialiasing)
+        self.graphicsView.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.graphicsView.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.graphicsView.setCacheMode(QGraphicsView.CacheBackground)
+
+        self.statusLbl = QLabel("Connecting...")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addLayout(header)
+        layout.addWidget(self.graphicsView)
+        layout.addWidget(self.statusLbl)
+
+    # Connects the signals from the close button and the board manager
+    def connect_all(self):
+        self.closeBtn.clicked.connect(self.closeBtn_Clicked)
+
+        self.boardManager.startGameEvaluated.connect(self.startGame_Response)
+        self.boardManager.placePieceEvaluated.connect(self.placePiece_Evaluated)
+        self.boardManager.removePieceEvaluated.connect(self.removePiece_Evaluated)
+        self.boardManager.movePieceEvaluated.connect(self.movePiece_Evaluated)
+        self.boardManager.boardResynced.connect(self.board_Resynced)
+        self.boardManager.endEvaluated.connect(self.end_Evaluated)
+        self.boardManager.gameEnded.connect(self.boardManager_GameEnded)
+
+    # Stops watching the game and lets the main window remove the tile
+    @pyqtSlot()
+    def closeBtn_Clicked(self):
+        # The server keeps sending the moves of finished games until it's told to stop
+        if self.boardManager.spectating is not None:
+            self.boardManager.end()
+
+        self.boardManager.close()
+        self.boardManager.deleteLater()
+
+        self.closed.emit(self)
+        self.deleteLater()
+
+    def update_status(self, next_state, next_player):
+        self.statusLbl.setText(f"{next_state.replace('_', ' ').title()} - Player {next_player + 1}'s Turn")
+
+    # **************************** GAME EVENTS *************************************
+    # Draws the board of the watched game
+    @pyqtSlot(bool, str, bool, str, int, object, str)
+    def startGame_Response(self, success, error, waiting, next_state, next_player, boardGraph, layoutHash):
+        if not success:
+            self.statusLbl.setText(error)
+            return
+
+        # Clear the pieces of the last game out of the scene
+        for piece in self.gamePieces.values():
+            self.piecePool.release(piece)
+        self.gamePieces = {}
+
+        # Reuse the board's scene if it's already been drawn
+        if layoutHash not in self.boardScenes:
+            linesPen = QPen(QColor(0, 0, 0), self.PEN_WIDTH)
+            intersectionsPen = QPen(QColor(150, 126, 45), self.PEN_WIDTH)
+            brush = QBrush(QColor(100, 86, 30))
+
+            self.boardScenes[layoutHash] = BoardScene(boardGraph, self.GRID_SPACING, self.RADIUS,
+                                                      linesPen, intersectionsPen, brush)
+
+        self.scene = self.boardScenes[layoutHash]
+
+        self.graphicsView.setScene(self.scene)
+        self.graphicsView.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+
+        self.update_status(next_state, next_player)
+
+    @pyqtSlot(bool, str, int, int, int, str, int)
+    def placePiece_Evaluated(self, success, error, ID, x, y, nextStage, nextPlayer):
+        if not success:
+            return
+
+        self.addGamePiece(ID, x, y)
+        self.update_status(nextStage, nextPlayer)
+
+    @pyqtSlot(bool, str, int, str, int, list)
+    def removePiece_Evaluated(self, success, error, ID, nextStage, nextPlayer, activePieces):
+        if not success:
+            return
+
+        piece = self.gamePieces.pop(ID, None)
+        if piece is not None:
+            self.piecePool.release(piece)
+        self.update_status(nextStage, nextPlayer)
+
+    @pyqtSlot(bool, str, int, int, int, str, int, list)
+    def movePiece_Evaluated(self, success, error, ID, x, y, nextStage, nextPlayer, activePieces):
+        if not success or ID not in self.gamePieces:
+            return
+
+        self.gamePieces[ID].movePiece(x * self.GRID_SPACING, y * self.GRID_SPACING)
+        self.update_status(nextStage, nextPlayer)
+
+    # Brings the tile up to date with the pieces sent when it started watching or reconnected
+    @pyqtSlot(object, list, str, int, list)
+    def board_Resynced(self, changedPieces, removedPieces, nextStage, nextPlayer, activePieces):
+        for ID in removedPieces:
+            piece = self.gamePieces.pop(ID, None)
+            if piece is not None:
+                self.piecePool.release(piece)
+
+        for ID, (x, y) in changedPieces.items():
+            if ID in self.gamePieces:
+                self.gamePieces[ID].movePiece(x * self.GRID_SPACING, y * self.GRID_SPACING)
+            else:
+                self.addGamePiece(ID, x, y)
+
+        self.update_status(nextStage, nextPlayer)
+
+    @pyqtSlot(bool, str, bool, bool)
+    def end_Evaluated(self, success, msg, won, waiting):
+        self.statusLbl.setText(msg)
+
+    @pyqtSlot()
+    def boardManager_GameEnded(self):
+        self.statusLbl.setText("Game Over")
+
+    # Adds a new game piece to the scene at the board coordinates (x, y)
+    # Pieces are never activated so they can't be dragged around
+    def addGamePiece(self, ID, x, y):
+        player = self.boardManager.owner(ID)
+
+        piece = self.piecePool.acquire(self.scene, ID, x * self.GRID_SPACING, y * self.GRID_SPACING,
+                                       self.playerColors[player])
+        self.gamePieces[ID] = piece
@@ -1,65 +1,172 @@
-from PyQt5 import QtWidgets, uic, QtGui
+from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtGui import QPen, QColor, QBrush, QTransform, QMovie, QPixmap
-from PyQt5.QtWidgets import QGraphicsScene, QGraphicsEllipseItem, QMessageBox, QGraphicsPixmapItem, QLabel
-from PyQt5.QtCore import QEvent, Qt, pyqtSlot, pyqtSignal, QVariant, QSettings, QSize
+from PyQt5.QtWidgets import QGraphicsScene, QGraphicsEllipseItem, QMessageBox, QGraphicsPixmapItem, QLabel, QGraphicsView, QFileDialog, \
+    QDockWidget, QScrollArea, QWidget, QGridLayout, QInputDialog
+from PyQt5.QtCore import QEvent, Qt, pyqtSlot, pyqtSignal, QVariant, QSettings, QSize, QTimer
 
 from PyQt5 import QtCore
 
 from backend.board_manager import BoardManager, GameStage
 from backend.game_piece import GamePiece
-
+from backend.game_record import openRecords, defaultRecordPath
+
+from .board_scene import BoardScene
+from .compiled_ui import loadUi, resourcePath
+from .game_tile import GameTile
+from .move_highlights import MoveHighlights
+from .piece_pool import PiecePool
+from .replay_bar import ReplayBar
 from .settings_window import SettingsWindow
 
-import numpy as np
-import os
-
 
 class MainWindow(QtWidgets.QMainWindow):
+    # Number of watched games shown side by side
+    TILE_COLUMNS = 2
 
     # ************************************* INIT METHODS ******************************************
     def __init__(self) -> None:
         super().__init__()
 
-        self.loading_gif_path = "images/loading.gif"
+        self.loading_gif_path = resourcePath("images", "loading.gif")
 
         # Load application settings
         self.settings = QSettings("SA LLC", "Qt Shax")
         self.settings.clear()
 
-        self.MARGIN_OF_ERROR = float(self.settings.value("marginOfError", 0.2))
-        self.mode = self.settings.value("mode", "remote")
+        # Connection to the server shared by the player's game and every watched game
+        self.connection = None
 
-        minPieces = int(self.settings.value("minPieces", 2))
-        maxPieces = int(self.settings.value("maxPieces", 10))
-        url = self.settings.value("url", "ws://localhost:8765")
+        # Tiles of the games being watched
+        self.gameTiles = []
 
         # Start up a local game manager to setup the initial board
-        self.boardManager = BoardManager(minPieces, maxPieces, url)
+        self.load_settings()
 
         # Tracks the game piece graphicItems on the board
         self.gamePieces = {}
 
+        # Tracks the graphicItems changed by moves the server hasn't confirmed yet
+        self.predictions = {}
+
+        # IDs of the game pieces that are currently activated
+        self.activePieces = set()
+
+        # Nodes the piece being dragged can be dropped on and their scene coordinates
+        self.dragTargets = {}
+
+        # Rings around the legal targets of a drag and the preview of where the piece will snap to
+        self.highlights = None
+
+        # Game pieces reused for every piece and prediction shown, game after game
+        self.piecePool = None
+
+        # Scenes of the boards that have already been drawn, keyed by their layout's hash
+        self.boardScenes = {}
+
+        # Record of the game being replayed, None when not watching a replay
+        self.replay = None
+
         # Initialize the UI and signal-slot connections
         self.load_ui()
         self.connect_all()
 
-    # Loads the Qt UI file with the same name
+    # Reads the application settings and creates a board manager that uses them
+    def load_settings(self):
+        self.MARGIN_OF_ERROR = float(self.settings.value("marginOfError", 0.2))
+        self.mode = self.settings.value("mode", "remote")
+
+        self.minPieces = int(self.settings.value("minPieces", 2))
+        self.maxPieces = int(self.settings.value("maxPieces", 10))
+        self.url = self.settings.value("url", "ws://localhost:8765")
+
+        connection = None if self.mode in ("Local", "Computer") else self.sharedConnection()
+        self.boardManager = BoardManager(self.minPieces, self.maxPieces, self.url, self.mode, connection)
+
+        # Keep a record of the player's games so they can be replayed
+        self.boardManager.recordPath = defaultRecordPath()
+
+    # Gets the multiplexed connection to the server, opening it the first time it's needed
+    # The socket is only opened once the event loop is running, so it never delays the first paint
+    def sharedConnection(self):
+        if self.connection is None:
+            from backend.server_connection import ServerConnection
+
+            self.connection = ServerConnection(self.url, multiplexed=True)
+            QTimer.singleShot(0, self.connection.open)
+
+        return self.connection
+
+    # Loads the compiled Qt UI file with the same name
     def load_ui(self):
-        cwd = os.getcwd()
-        filename = os.path.splitext(os.path.basename(__file__))[0]
-        uic.loadUi(cwd + "/ui_files/" + filename + ".ui", self)
+        loadUi("main_window", self)
 
         # Add a blank scene to the graphics view
         self.graphicsView.setScene(QGraphicsScene())
 
+        # The board is drawn as the scene's background so it only needs to be rendered once
+        self.graphicsView.setCacheMode(QGraphicsView.CacheBackground)
+        self.graphicsView.installEventFilter(self)
+
+        # Optional overlay in the status bar showing the latency and traffic of the connection
+        self.metricsLbl = QLabel()
+        self.metricsLbl.hide()
+        self.statusbar.addPermanentWidget(self.metricsLbl)
+
+        self.metricsTimer = QTimer(self)
+        self.metricsTimer.setInterval(500)
+
+        self.metricsAction = self.menuSettings.addAction("Show Latency Overlay")
+        self.metricsAction.setCheckable(True)
+        self.exportMetricsAction = self.menuSettings.addAction("Export Metrics...")
+
+        # Dock showing the games being watched in a grid of tiles
+        self.watchGameAction = self.menuSettings.addAction("Watch Game...")
+
+        self.tilesLayout = QGridLayout()
+        self.tilesLayout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        tilesWidget = QWidget()
+        tilesWidget.setLayout(self.tilesLayout)
+
+        scrollArea = QScrollArea()
+        scrollArea.setWidgetResizable(True)
+        scrollArea.setWidget(tilesWidget)
+
+        self.tilesDock = QDockWidget("Watched Games", self)
+        self.tilesDock.setWidget(scrollArea)
+        self.tilesDock.hide()
+        self.addDockWidget(Qt.RightDockWidgetArea, self.tilesDock)
+
+        # Timeline for replaying recorded games, only shown in replay mode
+        self.replayAction = self.menuSettings.addAction("Watch Replay...")
+
+        self.replayBar = ReplayBar()
+        self.replayDock = QDockWidget("Replay", self)
+        self.replayDock.setWidget(self.replayBar)
+        self.replayDock.setFeatures(QDockWidget.DockWidgetMovable)
+        self.replayDock.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.replayDock)
+
     # Connects all the signals and slots
     def connect_all(self):
         # Connect UI elements
         self.gameBtn.clicked.connect(self.gameBtn_Clicked)
         self.settingsAction.triggered.connect(self.settingsAction_Triggered)
+        self.metricsAction.toggled.connect(self.metricsAction_Toggled)
+        self.exportMetricsAction.triggered.connect(self.exportMetricsAction_Triggered)
+        self.watchGameAction.triggered.connect(self.watchGameAction_Triggered)
+        self.replayAction.triggered.connect(self.replayAction_Triggered)
+        self.replayBar.moveChanged.connect(self.replay_MoveChanged)
+        self.metricsTimer.timeout.connect(self.update_metrics_overlay)
 
+        self.connect_boardManager()
+
+    # Connects the signals from the board manager
+    def connect_boardManager(self):
         # Connect signals from the board manager
         self.boardManager.connected.connect(self.connected_to_board)
+        self.boardManager.connectionLost.connect(self.connection_Lost)
+        self.boardManager.reconnected.connect(self.reconnected_to_board)
+        self.boardManager.boardResynced.connect(self.board_Resynced)
         self.boardManager.gameEnded.connect(self.boardManager_GameEnded)
 
         self.boardManager.startGameEvaluated.connect(self.startGame_Response)
@@ -68,12 +175,27 @@ class MainWindow(QtWidgets.QMainWindow):
         self.boardManager.movePieceEvaluated.connect(self.movePiece_Evaluated)
         self.boardManager.endEvaluated.connect(self.end_Evaluated)
 
+        self.boardManager.placePiecePredicted.connect(self.placePiece_Predicted)
+        self.boardManager.removePiecePredicted.connect(self.removePiece_Predicted)
+        self.boardManager.movePiecePredicted.connect(self.movePiece_Predicted)
+        self.boardManager.predictionResolved.connect(self.prediction_Resolved)
+
     @pyqtSlot()
     def connected_to_board(self):
         self.announcementLbl.setText("Connected to Server")
 
+    @pyqtSlot(int)
+    def connection_Lost(self, delay):
+        self.statusbar.showMessage(f"Connection lost, reconnecting in {delay} ms...")
+
+    @pyqtSlot()
+    def reconnected_to_board(self):
+        self.statusbar.showMessage("Reconnected to Server", 3000)
+
     def closeEvent(self, event):
         del self.boardManager
+        if self.connection is not None:
+            self.connection.close()
         event.accept()
 
     def update_on_screen_text(self, next_state, next_player, msg, waiting):
@@ -110,7 +232,10 @@ class MainWindow(QtWidgets.QMainWindow):
     # ************************* INIT METHODS FOR THE GAME BOARD ***************
     # Draws the initial state of the board
     @pyqtSlot()
-    def initGraphics(self, adjacentPieces):
+    def initGraphics(self, boardGraph, layoutHash):
+        # Graph of the board used to snap clicks to the nearest node
+        self.boardGraph = boardGraph
+
         # Radius of drawn circles
         self.RADIUS = 15
 
@@ -120,8 +245,12 @@ class MainWindow(QtWidgets.QMainWindow):
         # Space between each space on the board grid
         self.GRID_SPACING = 70
 
+        # How close a dragged piece needs to be to a legal target to snap to it
+        # A fraction of the grid spacing, kept under half so a piece never snaps while still over its own node
+        self.SNAP_MARGIN = 0.45
+
         # Array containing the color of each player's pieces
-        self.playerColors = np.empty(2, QColor)
+        self.playerColors = [None, None]
 
         # Common colors used for drawing the board
         self.COLOR_BLACK = QColor(0, 0, 0)
@@ -135,46 +264,63 @@ class MainWindow(QtWidgets.QMainWindow):
         # Set the color of player 2's pieces to blue
         self.playerColors[1] = self.COLOR_BLUE
 
-        # Generate a new QGraphicsScene of the board
-        self.drawBoard(adjacentPieces)
+        # Reuse the board's scene if it's already been drawn
+        if layoutHash in self.boardScenes:
+            self.showBoard(self.boardScenes[layoutHash])
+
+        # Otherwise generate a new QGraphicsScene of the board
+        else:
+            self.drawBoard(boardGraph)
+            self.boardScenes[layoutHash] = self.scene
 
         print("Initialized the graphics")
 
     # Generates a new QGraphicsScene based on the current state of the board
-    def drawBoard(self, adjacentPieces):
-        # Create a new empty scene
-        scene = QGraphicsScene()
-
+    def drawBoard(self, boardGraph):
         # Create the pens and brush for drawing the board
         linesPen = QPen(self.COLOR_BLACK, self.PEN_WIDTH)
         intersectionsPen = QPen(QColor(150, 126, 45), self.PEN_WIDTH)
         brush = QBrush(QColor(100, 86, 30))
 
-        # Add all the corners/intersections and their connecting lines
-        for rootPiece, connectedPieces in adjacentPieces.items():
-            x1 = rootPiece[0]
-            y1 = rootPiece[1]
+        # Create a new scene with all the corners/intersections and their connecting lines
+        scene = BoardScene(boardGraph, self.GRID_SPACING, self.RADIUS, linesPen, intersectionsPen, brush)
 
-            for piece in connectedPieces:
-                x2 = piece[0]
-                y2 = piece[1]
+        self.showBoard(scene)
 
-                scene.addLine(x1 * self.GRID_SPACING, y1 * self.GRID_SPACING,
-                              x2 * self.GRID_SPACING, y2 * self.GRID_SPACING, linesPen)
+        print("Finished drawing the board.")
+        print(f"Board graph: {len(boardGraph)} nodes, {boardGraph.nbytes} bytes, "
+              f"built in {boardGraph.buildTime * 1000:.3f} ms")
+
+    # Shows the scene of a board after clearing out the pieces from the last game
+    # The pieces go back to the pool and are reused by the next game instead of being deleted
+    def showBoard(self, scene):
+        if self.piecePool is None:
+            self.piecePool = PiecePool(self.RADIUS, self.connect_gamePiece)
+
+        for piece in self.gamePieces.values():
+            self.piecePool.release(piece)
 
-        for rootPiece, connectedPieces in adjacentPieces.items():
-            x = rootPiece[0] * self.GRID_SPACING
-            y = rootPiece[1] * self.GRID_SPACING
-            scene.addEllipse(x - self.RADIUS, y - self.RADIUS,
-                             self.RADIUS * 2, self.RADIUS * 2,
-                             intersectionsPen, brush)
+        # Pieces whose removal was predicted are already in gamePieces
+        for piece in self.predictions.values():
+            if piece.ID < 0:
+                self.piecePool.release(piece)
+
+        self.gamePieces = {}
+        self.predictions = {}
+        self.activePieces = set()
+        self.dragTargets = {}
 
         # Show the scene in the graphics view
         self.scene = scene
         self.graphicsView.setScene(scene)
-        self.graphicsView.installEventFilter(self)
+        self.graphicsView.resetCachedContent()
 
-        print("Finished drawing the board.")
+        if self.highlights is None:
+            self.highlights = MoveHighlights(self.RADIUS)
+        self.highlights.attach(scene)
+
+        # Build every piece a game can have up front so placing them doesn't create any
+        self.piecePool.reserve(scene, 2 * self.boardManager.MAX_PIECES)
 
     # ****************************** UI EVENTS *************************************************
     # Event filter for the QGraphicsScene displaying the game board
@@ -213,18 +359,66 @@ class MainWindow(QtWidgets.QMainWindow):
 
         return super().eventFilter(obj, event)
 
+    # Highlights the nodes a piece can be moved to as soon as it's picked up
+    # The targets come from the board manager's copy of the board, so nothing is sent to the server
+    @pyqtSlot(int)
+    def gamePiece_DragStarted(self, ID):
+        self.dragTargets = {node: self.boardToScene(*self.boardGraph.node(node))
+                            for node in self.boardManager.moveTargets(ID)}
+        self.highlights.show(list(self.dragTargets.values()))
+
+    # Previews where the dragged piece will snap to
+    # Game pieces send at most one update per frame while being dragged
+    @pyqtSlot(int, float, float)
+    def gamePiece_Dragged(self, ID, x, y):
+        node = self.snapTarget(x, y)
+        if node < 0:
+            self.highlights.snap(None)
+        else:
+            self.highlights.snap(self.dragTargets[node], self.gamePieces[ID].color)
+
     # Signal received from the game pieces
     # Responsible for alerting the board manager of any piece movement
     @pyqtSlot(int, float, float)
     def gamePiece_Moved(self, ID, x, y):
-        # Convert to board coordinates for the board manager
-        x, y = self.sceneToBoard(x, y)
+        piece = self.gamePieces[ID]
+        node = self.snapTarget(x, y)
+        targets = self.dragTargets
 
-        self.boardManager.movePiece(ID, x, y)
+        self.dragTargets = {}
+        self.highlights.clear()
+
+        # Illegal drops are rejected without asking the server
+        if node < 0:
+            piece.movePiece()
+
+            # Letting go of the piece where it was picked up isn't a move
+            if (x - piece.x) ** 2 + (y - piece.y) ** 2 > (self.SNAP_MARGIN * self.GRID_SPACING) ** 2:
+                if targets:
+                    self.announcementLbl.setText("Please drop the piece on one of the highlighted nodes")
+                else:
+                    self.announcementLbl.setText(self.boardManager.turnError() or "That piece can't be moved right now")
+            return
+
+        self.boardManager.movePiece(ID, *self.boardGraph.node(node))
+
+    # Gets the legal target of the dragged piece that the scene point snaps to, or -1 if there isn't one
+    def snapTarget(self, x, y):
+        reach = (self.SNAP_MARGIN * self.GRID_SPACING) ** 2
+
+        for node, (targetX, targetY) in self.dragTargets.items():
+            if (x - targetX) ** 2 + (y - targetY) ** 2 <= reach:
+                return node
+        return -1
 
     # Alerts the board manager that the user either wants to start or end a game
     @pyqtSlot()
     def gameBtn_Clicked(self):
+        # Leaves the replay mode
+        if self.replay is not None:
+            self.exit_replay()
+            return
+
         # Tries to end the game
         if (self.boardManager.running or self.boardManager.waiting):
             self.boardManager.end()
@@ -248,11 +442,122 @@ class MainWindow(QtWidgets.QMainWindow):
             if (settingsWindow.exec()):
                 print("Your settings were saved!")
 
+                # Replace the board manager so the new game mode takes effect
+                self.boardManager.close()
+                self.boardManager.deleteLater()
+
+                # The watched games are on the old server
+                for tile in list(self.gameTiles):
+                    tile.closeBtn_Clicked()
+                if self.connection is not None:
+                    self.connection.close()
+                    self.connection.deleteLater()
+                    self.connection = None
+
+                self.load_settings()
+                self.connect_boardManager()
+
+    # Shows or hides the latency overlay
+    @pyqtSlot(bool)
+    def metricsAction_Toggled(self, checked):
+        self.metricsLbl.setVisible(checked)
+
+        if checked:
+            self.update_metrics_overlay()
+            self.metricsTimer.start()
+        else:
+            self.metricsTimer.stop()
+
+    # Saves the board manager's metrics to a JSON file
+    @pyqtSlot()
+    def exportMetricsAction_Triggered(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "metrics.json", "JSON Files (*.json)")
+        if not path:
+            return
+
+        try:
+            self.boardManager.metrics.export(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Export Failed", f"The metrics couldn't be saved: {e}")
+
+    # Asks for the key of a player and starts watching their game in a new tile
+    @pyqtSlot()
+    def watchGameAction_Triggered(self):
+        player_key, ok = QInputDialog.getText(self, "Watch Game", "Key of one of the players:")
+        player_key = player_key.strip()
+        if not ok or not player_key:
+            return
+
+        # Servers that don't route by game ID would send the watched game's moves to the player's game,
+        # so the game only shares the connection once the server has shown it can tell them apart
+        connection = self.sharedConnection()
+        if not connection.shareable:
+            connection = None
+
+        boardManager = BoardManager(self.minPieces, self.maxPieces, self.url, "Online", connection)
+        tile = GameTile(boardManager, player_key[:8])
+        tile.closed.connect(self.gameTile_Closed)
+
+        self.gameTiles.append(tile)
+        self.layout_tiles()
+        self.tilesDock.show()
+
+        boardManager.spectate(player_key)
+
+    @pyqtSlot(object)
+    def gameTile_Closed(self, tile):
+        self.gameTiles.remove(tile)
+        self.tilesLayout.removeWidget(tile)
+        self.layout_tiles()
+
+        if not self.gameTiles:
+            self.tilesDock.hide()
+
+    # Places the tiles in rows of TILE_COLUMNS
+    def layout_tiles(self):
+        for tile in self.gameTiles:
+            self.tilesLayout.removeWidget(tile)
+
+        for index, tile in enumerate(self.gameTiles):
+            self.tilesLayout.addWidget(tile, index // self.TILE_COLUMNS, index % self.TILE_COLUMNS)
+
+    # Asks for a file of recorded games and the game in it to replay
+    @pyqtSlot()
+    def replayAction_Triggered(self):
+        if (self.boardManager.running or self.boardManager.waiting):
+            QMessageBox.critical(self, "Ongoing Game",
+                                 "The current game must be finished before watching a replay.")
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, "Watch Replay", defaultRecordPath(), "Game Records (*.shxr)")
+        if not path:
+            return
+
+        try:
+            records = openRecords(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Watch Replay", f"The file couldn't be opened: {e}")
+            return
+
+        if not records:
+            QMessageBox.critical(self, "Watch Replay", "The file doesn't contain any games.")
+            return
+
+        # Default to the most recent game
+        number, ok = QInputDialog.getInt(self, "Watch Replay", f"Game to replay (1 - {len(records)}):",
+                                         len(records), 1, len(records))
+        if ok:
+            self.start_replay(records[number - 1])
+
+    @pyqtSlot()
+    def update_metrics_overlay(self):
+        self.metricsLbl.setText(self.boardManager.metrics.overview())
+
     # **************************** GAME EVENTS *************************************
     # Starts up a game
 
-    @pyqtSlot(bool, str, bool, str, int, dict)
-    def startGame_Response(self, success, error, waiting, next_state, next_player, adjacentPieces):
+    @pyqtSlot(bool, str, bool, str, int, object, str)
+    def startGame_Response(self, success, error, waiting, next_state, next_player, boardGraph, layoutHash):
         # Update on screen text
         self.update_on_screen_text(next_state, next_player, "", waiting)
 
@@ -279,7 +584,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Initialize the graphics if the game has started
         else:
-            self.initGraphics(adjacentPieces)
+            self.initGraphics(boardGraph, layoutHash)
 
     # Updates the board visuals after the board manager evaluates the piece placement request
     @pyqtSlot(bool, str, int, int, int, str, int)
@@ -293,20 +598,25 @@ class MainWindow(QtWidgets.QMainWindow):
             print(error)
             return
 
+        self.addGamePiece(ID, x, y)
+
+    # Adds a new game piece to the scene at the board coordinates (x, y)
+    def addGamePiece(self, ID, x, y):
         # Get the properties of the new game piece
         x, y = self.boardToScene(x, y)
         player = ID & (2**self.boardManager.ID_SHIFT - 1)
 
-        # Create a new game piece
-        newPiece = GamePiece(ID, x, y, self.RADIUS, self.playerColors[player])
+        # Take a game piece from the pool and show it in the scene
+        newPiece = self.piecePool.acquire(self.scene, ID, x, y, self.playerColors[player])
 
-        # Add the piece to the scene
-        self.scene.addItem(newPiece)
         # Store the piece for future use
         self.gamePieces[ID] = newPiece
 
-        # Connect the signals from the game piece
-        newPiece.pieceMoved.connect(self.gamePiece_Moved)
+    # Connects the signals from a game piece once, when the pool builds it
+    def connect_gamePiece(self, piece):
+        piece.pieceMoved.connect(self.gamePiece_Moved)
+        piece.dragStarted.connect(self.gamePiece_DragStarted)
+        piece.dragMoved.connect(self.gamePiece_Dragged)
 
     # Updates the board visuals after the board manager evaluates the piece removal request
     @pyqtSlot(bool, str, int, str, int, list)
@@ -319,10 +629,10 @@ class MainWindow(QtWidgets.QMainWindow):
             print(error)
             return
 
-        # Removes the game piece from the scene
+        # Removes the game piece from the scene and keeps it for later
         piece = self.gamePieces.pop(ID)
-        self.scene.removeItem(piece)
-        del piece
+        self.piecePool.release(piece)
+        self.activePieces.discard(ID)
 
         # ***PREPARES FOR THE NEXT MOVE
         # Activates any pieces that can be moved in the next stage
@@ -334,23 +644,87 @@ class MainWindow(QtWidgets.QMainWindow):
         # Update on screen text
         self.update_on_screen_text(nextStage, nextPlayer, "", False)
 
-        # Get the piece corresponding to the evaluated piece movement
-        piece = self.gamePieces[ID]
-
         # If piece movement was not approved, move the piece back to its original position
+        # The piece may be gone already if the board was resynced in the meantime
         if not success:
             print("The piece couldn't be moved")
             print(error)
-            piece.movePiece()
+            if ID in self.gamePieces:
+                self.gamePieces[ID].movePiece()
             return
 
         # Otherwise move it to its new position
         x, y = self.boardToScene(x, y)
-        piece.movePiece(x, y)
+        self.gamePieces[ID].movePiece(x, y)
 
         # Activates any pieces that can be moved in the next stage
         self.activatePlayer(activePieces)
 
+    # **************************** PREDICTED GAME EVENTS *************************************
+    # Shows a faded piece where the player placed one until the server confirms it
+    @pyqtSlot(int, int, int, int)
+    def placePiece_Predicted(self, seq, x, y, player):
+        x, y = self.boardToScene(x, y)
+
+        ghostPiece = self.piecePool.acquire(self.scene, -1, x, y, self.playerColors[player])
+        ghostPiece.setOpacity(0.5)
+
+        self.predictions[seq] = ghostPiece
+
+    # Hides the removed piece until the server confirms the removal
+    @pyqtSlot(int, int)
+    def removePiece_Predicted(self, seq, ID):
+        piece = self.gamePieces[ID]
+        piece.hide()
+
+        self.predictions[seq] = piece
+
+    # Snaps the moved piece to its new node until the server confirms the move
+    # The piece keeps its last confirmed position, so a rejected move can put it back there
+    @pyqtSlot(int, int, int, int)
+    def movePiece_Predicted(self, seq, ID, x, y):
+        x, y = self.boardToScene(x, y)
+        piece = self.gamePieces[ID]
+        piece.previewMove(x, y)
+
+        self.predictions[seq] = piece
+
+    # Cleans up after a predicted move once the server has responded
+    @pyqtSlot(int, bool)
+    def prediction_Resolved(self, seq, confirmed):
+        piece = self.predictions.pop(seq, None)
+        if piece is None:
+            return
+
+        # Placed pieces get replaced with the piece created by placePiece_Evaluated
+        if piece.ID < 0:
+            self.piecePool.release(piece)
+
+        # Bring back pieces whose removal or move was rejected, or never answered before reconnecting
+        elif not confirmed and self.gamePieces.get(piece.ID) is piece:
+            piece.movePiece()
+            piece.show()
+
+    # Applies the changes to the board found after reconnecting to the server
+    # Only the pieces that changed are touched instead of redrawing the board
+    @pyqtSlot(object, list, str, int, list)
+    def board_Resynced(self, changedPieces, removedPieces, nextStage, nextPlayer, activePieces):
+        self.update_on_screen_text(nextStage, nextPlayer, "", False)
+
+        for ID in removedPieces:
+            piece = self.gamePieces.pop(ID, None)
+            if piece is not None:
+                self.piecePool.release(piece)
+                self.activePieces.discard(ID)
+
+        for ID, (x, y) in changedPieces.items():
+            if ID in self.gamePieces:
+                self.gamePieces[ID].movePiece(*self.boardToScene(x, y))
+            else:
+                self.addGamePiece(ID, x, y)
+
+        self.activatePlayer(activePieces)
+
     @pyqtSlot(bool, str, bool, bool)
     def end_Evaluated(self, success, msg, won, waiting):
         if not success:
@@ -369,22 +743,88 @@ class MainWindow(QtWidgets.QMainWindow):
         self.announcementLbl.setText("Game Over")
         self.gameBtn.setText("New Game")
 
+    # **************************** REPLAYS *************************************
+    # Shows the board of a recorded game and the timeline to go through its moves
+    def start_replay(self, record):
+        boardGraph = self.boardManager.topologies.lookup(record.layoutHash)
+        if boardGraph is None:
+            QMessageBox.critical(self, "Watch Replay", "The board layout of the game couldn't be loaded.")
+            return
+
+        # Reuses the board's scene and clears the pieces of the last game
+        self.initGraphics(boardGraph, record.layoutHash)
+
+        self.replay = record
+        self.replayBar.load(len(record))
+        self.replayDock.show()
+
+        self.gameBtn.setText("Exit Replay")
+        self.printLbl.setText("")
+        self.replay_MoveChanged(0)
+
+    # Clears the replayed game from the board
+    def exit_replay(self):
+        self.replayBar.pause()
+        self.replayDock.hide()
+        self.replay = None
+
+        self.showBoard(self.scene)
+
+        self.gameBtn.setText("New Game")
+        self.announcementLbl.setText("")
+        self.gameStateLbl.setText("")
+
+    # Shows the board after the given number of moves of the replayed game
+    # The record is read from the nearest keyframe, and only the pieces that differ from the board
+    # being shown are moved, shown or hidden. Removed pieces are hidden instead of deleted so
+    # scrubbing back and forth never creates the same piece twice
+    @pyqtSlot(int)
+    def replay_MoveChanged(self, moveNumber):
+        if self.replay is None:
+            return
+
+        pieces, stage, player = self.replay.stateAt(moveNumber)
+
+        for ID, piece in self.gamePieces.items():
+            if ID not in pieces and piece.isVisible():
+                piece.hide()
+
+        for ID, node in pieces.items():
+            x, y = self.boardGraph.node(node)
+            piece = self.gamePieces.get(ID)
+
+            if piece is None:
+                self.addGamePiece(ID, x, y)
+                continue
+
+            x, y = self.boardToScene(x, y)
+            if (piece.x, piece.y) != (x, y):
+                piece.movePiece(x, y)
+            if not piece.isVisible():
+                piece.show()
+
+        # Show who won once the end of the game is reached
+        if moveNumber == len(self.replay) and self.replay.winner is not None:
+            self.announcementLbl.setText("Player " + str(self.replay.winner + 1) + " Won")
+            self.gameStateLbl.setText("Game Over")
+        else:
+            self.announcementLbl.setText("Player " + str(player + 1) + "'s Turn")
+            self.gameStateLbl.setText(stage.name.replace("_", " ").title() + " Stage")
+
     # **************************** BOARD-SCENE TRANSLATIONS **************************
     # Translates the scene's x and y coordinates to the nearest board index
+    # Returns (-1, -1) if the spot isn't near a node on the board
 
     def sceneToBoard(self, x: float, y: float):
         raw_x: float = x / self.GRID_SPACING
         raw_y: float = y / self.GRID_SPACING
 
-        error_x: float = abs(round(raw_x) - raw_x)
-        error_y: float = abs(round(raw_y) - raw_y)
-
         # Check if spot is near a valid node on the board
-        if (error_x > self.MARGIN_OF_ERROR and
-                error_y > self.MARGIN_OF_ERROR):
+        node = self.boardGraph.nearestNode(raw_x, raw_y, self.MARGIN_OF_ERROR)
+        if node < 0:
             return (-1, -1)
 
-        return (round(raw_x), round(raw_y))
+        return self.boardGraph.node(node)
 
     # Translates the board's index to scene coordinates
     def boardToScene(self, x, y):
@@ -396,10 +836,17 @@ class MainWindow(QtWidgets.QMainWindow):
     # ************************** PIECE ACTIVATION METHODS ****************************
     # Activates the movable game pieces of the current player
     # while deactivating the pieces of all the other players
+    # Only the pieces whose state changed since the last turn are updated
     @pyqtSlot(int)
     def activatePlayer(self, activePieces):
-        for id, piece in self.gamePieces.items():
-            if id in activePieces:
-                piece.activate()
-            else:
-                piece.deactivate()
+        activePieces = set(activePieces)
+
+        for id in self.activePieces - activePieces:
+            if id in self.gamePieces:
+                self.gamePieces[id].deactivate()
+
+        for id in activePieces - self.activePieces:
+            if id in self.gamePieces:
+                self.gamePieces[id].activate()
+
+        self.activePieces = activePieces
@@ -0,0 +1,80 @@
+from PyQt5.QtGui import QPen, QColor, QBrush
+from PyQt5.QtWidgets import QGraphicsEllipseItem
+from PyQt5.QtCore import Qt
+
+
+# Marks the nodes a dragged piece can be dropped on and previews where it will snap to
+# The items are created once and reused for every drag, and follow the board from scene to scene
+class MoveHighlights:
+    # Color of the rings around the legal targets
+    RING_COLOR = QColor(0, 150, 0)
+
+    # Width of the ring's outline
+    RING_WIDTH = 3
+
+    # How far the rings reach past the board's nodes
+    RING_MARGIN = 5
+
+    # Opacity of the preview of the piece at the node it will snap to
+    PREVIEW_OPACITY = 0.5
+
+    def __init__(self, radius) -> None:
+        self.radius = radius
+
+        self.scene = None
+
+        # Rings around the legal targets, grown as needed and hidden when not in use
+        self.rings = []
+
+        # Outline of a piece at the node it will snap to
+        self.preview = QGraphicsEllipseItem(-radius, -radius / 2, radius * 2, radius)
+        self.preview.setOpacity(self.PREVIEW_OPACITY)
+        self.preview.setPen(QPen(Qt.NoPen))
+        self.preview.setZValue(-1)
+        self.preview.hide()
+
+    # Moves the highlights to the scene of the board being shown
+    def attach(self, scene):
+        if scene is self.scene:
+            return
+
+        for item in self.rings + [self.preview]:
+            if item.scene() is not None:
+                item.scene().removeItem(item)
+            scene.addItem(item)
+
+        self.scene = scene
+        self.clear()
+
+    # Puts a ring around each of the scene points
+    def show(self, points):
+        ringRadius = self.radius + self.RING_MARGIN
+        while len(self.rings) < len(points):
+            ring = QGraphicsEllipseItem(-ringRadius, -ringRadius, ringRadius * 2, ringRadius * 2)
+            ring.setPen(QPen(self.RING_COLOR, self.RING_WIDTH))
+            ring.setZValue(-1)
+            self.scene.addItem(ring)
+            self.rings.append(ring)
+
+        for ring, (x, y) in zip(self.rings, points):
+            ring.setPos(x, y)
+            ring.show()
+
+        for ring in self.rings[len(points):]:
+            ring.hide()
+
+    # Shows where the piece will snap to, or hides the preview if the point is None
+    def snap(self, point, color=None):
+        if point is None:
+            self.preview.hide()
+            return
+
+        if color is not None:
+            self.preview.setBrush(QBrush(color))
+        self.preview.setPos(*point)
+        self.preview.show()
+
+    def clear(self):
+        for ring in self.rings:
+            ring.hide()
+        self.preview.hide()
@@ -0,0 +1,58 @@
+from backend.game_piece import GamePiece
+
+
+# Game pieces that are built once and reused for every piece placed, game after game
+# Released pieces are hidden instead of being removed from their scene, so taking one back out
+# only moves and shows it, and the pieces and their signal connections are never rebuilt
+class PiecePool:
+    def __init__(self, radius, setup=None) -> None:
+        self.radius = radius
+
+        # Called once with every new piece, e.g. to connect its signals
+        self.setup = setup
+
+        # Hidden pieces waiting to be reused
+        self.free = []
+
+        # Number of pieces built so far
+        self.size = 0
+
+    # Builds pieces in the scene until there are at least count pieces free, before they're needed
+    def reserve(self, scene, count):
+        while len(self.free) < count:
+            piece = self.build()
+            piece.hide()
+            scene.addItem(piece)
+            self.free.append(piece)
+
+    # Gets a piece shown in the scene at the scene coordinates (x, y)
+    def acquire(self, scene, ID, x, y, color):
+        if self.free:
+            piece = self.free.pop()
+            piece.reset(ID, x, y, color)
+        else:
+            piece = self.build(ID, x, y, color)
+
+        # Pieces follow the board from scene to scene
+        if piece.scene() is not scene:
+            if piece.scene() is not None:
+                piece.scene().removeItem(piece)
+            scene.addItem(piece)
+
+        piece.show()
+        return piece
+
+    # Hides the piece and keeps it for later
+    def release(self, piece):
+        piece.hide()
+        piece.reset(-1, piece.x, piece.y, piece.color)
+        self.free.append(piece)
+
+    def build(self, ID=-1, x=0, y=0, color=None):
+        piece = GamePiece(ID, x, y, self.radius, color)
+        self.size += 1
+
+        if self.setup is not None:
+            self.setup(piece)
+
+        return piece
@@ -0,0 +1,106 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QSlider, QToolButton, QComboBox, QStyle
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer
+
+
+# Timeline controls for replaying a recorded game
+# Emits the number of the move to show whenever the slider moves, either from the user or while playing
+class ReplayBar(QWidget):
+    # *************** SIGNALS
+    moveChanged = pyqtSignal(int)
+
+    # Time between two moves at normal speed in milliseconds
+    MOVE_INTERVAL = 600
+
+    # Playback speeds offered in the speed box
+    SPEEDS = (0.25, 0.5, 1, 2, 4, 8)
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.MOVE_INTERVAL)
+
+        self.load_ui()
+        self.connect_all()
+
+    def load_ui(self):
+        self.playBtn = QToolButton()
+        self.playBtn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.playBtn.setAutoRaise(True)
+
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setPageStep(16)
+
+        self.moveLbl = QLabel()
+
+        self.speedBox = QComboBox()
+        for speed in self.SPEEDS:
+            self.speedBox.addItem(f"{speed:g}x", speed)
+        self.speedBox.setCurrentIndex(self.SPEEDS.index(1))
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self.playBtn)
+        layout.addWidget(self.slider, 1)
+        layout.addWidget(self.moveLbl)
+        layout.addWidget(self.speedBox)
+
+    # Connects the signals of the controls
+    def connect_all(self):
+        self.playBtn.clicked.connect(self.playBtn_Clicked)
+        self.slider.valueChanged.connect(self.slider_ValueChanged)
+        self.speedBox.currentIndexChanged.connect(self.speedBox_IndexChanged)
+        self.timer.timeout.connect(self.timer_Timeout)
+
+    # Resets the timeline for a game with the given number of moves
+    def load(self, moveCount):
+        self.pause()
+
+        # Block the signal so the owner decides which move is shown first
+        self.slider.blockSignals(True)
+        self.slider.setRange(0, moveCount)
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+
+        self.update_label()
+
+    def play(self):
+        # Start over if the game has already been played to the end
+        if self.slider.value() == self.slider.maximum():
+            self.slider.setValue(0)
+
+        self.timer.start()
+        self.playBtn.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
+
+    def pause(self):
+        self.timer.stop()
+        self.playBtn.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+
+    def update_label(self):
+        self.moveLbl.setText(f"Move {self.slider.value()} / {self.slider.maximum()}")
+
+    # **************************** UI EVENTS *************************************
+    @pyqtSlot()
+    def playBtn_Clicked(self):
+        if self.timer.isActive():
+            self.pause()
+        else:
+            self.play()
+
+    @pyqtSlot(int)
+    def slider_ValueChanged(self, value):
+        self.update_label()
+        self.moveChanged.emit(value)
+
+    @pyqtSlot(int)
+    def speedBox_IndexChanged(self, index):
+        self.timer.setInterval(int(self.MOVE_INTERVAL / self.speedBox.itemData(index)))
+
+    # Steps to the next move while playing
+    @pyqtSlot()
+    def timer_Timeout(self):
+        if self.slider.value() >= self.slider.maximum():
+            self.pause()
+            return
+
+        self.slider.setValue(self.slider.value() + 1)
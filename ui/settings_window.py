@@ -1,6 +1,7 @@
-from PyQt5 import QtWidgets, uic, QtGui
+from PyQt5 import QtWidgets, QtGui
 from PyQt5.QtCore import pyqtSlot, QVariant
-import os
+
+from .compiled_ui import loadUi
 
 class SettingsWindow(QtWidgets.QDialog):
 	def __init__(self, settings) -> None:
@@ -10,11 +11,9 @@ class SettingsWindow(QtWidgets.QDialog):
 		self.settings = settings
 		self.readSettings()
 
-	# Loads the Qt UI file with the same name
+	# Loads the compiled Qt UI file with the same name
 	def load_ui(self):
-		cwd = os.getcwd()
-		filename = os.path.splitext(os.path.basename(__file__))[0]
-		uic.loadUi(cwd + "/ui_files/" + filename + ".ui", self)
+		loadUi("settings_window", self)
 		self.connect_all()
 
     # Connects all the signals and slots